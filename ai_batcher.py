@@ -0,0 +1,228 @@
+"""
+Micro-batching layer for Claude API calls
+Collects concurrent requests over a short window and issues grouped calls
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config import Config
+
+
+class _PendingRequest:
+    """A single prompt waiting to be dispatched in a batch"""
+
+    __slots__ = ('kind', 'prompt', 'max_tokens', 'future', 'enqueued_at')
+
+    def __init__(self, kind, prompt, max_tokens):
+        self.kind = kind
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class AIRequestBatcher:
+    """
+    Groups Claude API requests that arrive within a short window.
+
+    Identical prompts in a batch share a single API call. Distinct prompts of a
+    combinable kind (short JSON/text answers) are packed into one call that asks
+    for a JSON array of answers; if that response cannot be split, each prompt
+    is retried individually, in parallel, so callers always get their own answer.
+
+    Other kinds (per-user suggestion prompts) gain nothing from waiting for a
+    batch, so they are called at once on the caller's thread; only a call for
+    an identical prompt already in flight is shared.
+    """
+
+    def __init__(self, call_api, max_wait_ms=None, max_batch=None, combine_kinds=None, workers=None):
+        self.call_api = call_api
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else Config.AI_BATCH_MAX_WAIT_MS) / 1000.0
+        self.max_batch = max_batch or Config.AI_BATCH_MAX_SIZE
+        self.combine_kinds = set(combine_kinds if combine_kinds is not None else Config.AI_BATCH_COMBINE_KINDS)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or Config.AI_BATCH_WORKERS,
+            thread_name_prefix='ai-batch'
+        )
+        self._pending = []
+        self._cond = threading.Condition()
+        self._inflight = {}  # (prompt, max_tokens) -> Future of a direct call in flight
+        self._inflight_lock = threading.Lock()
+        self._worker = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'api_calls': 0,
+            'deduplicated': 0,
+            'combined_calls': 0,
+            'combine_fallbacks': 0,
+            'total_queue_wait_ms': 0.0,
+        }
+
+    def submit(self, kind, prompt, max_tokens=2000, timeout=None):
+        """Queue a prompt and block until its batched response is available"""
+        if kind not in self.combine_kinds:
+            return self._submit_direct(prompt, max_tokens, timeout)
+        pending = _PendingRequest(kind, prompt, max_tokens)
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append(pending)
+            self._cond.notify()
+        return pending.future.result(timeout=timeout)
+
+    def _submit_direct(self, prompt, max_tokens, timeout):
+        """Call the API for a prompt that cannot be combined, sharing the call with identical prompts in flight"""
+        key = (prompt, max_tokens)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        self._count('requests')
+        if not leader:
+            self._count('deduplicated')
+            return future.result(timeout=timeout)
+
+        self._count('api_calls')
+        try:
+            result = self.call_api(prompt, max_tokens=max_tokens)
+        except Exception as e:
+            with self._inflight_lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._inflight_lock:
+            del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    def get_stats(self):
+        """Return batching efficiency metrics"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        requests = stats['requests']
+        stats['avg_batch_size'] = round(requests / stats['batches'], 2) if stats['batches'] else 0.0
+        stats['calls_saved'] = requests - stats['api_calls']
+        stats['call_reduction'] = round(1 - stats['api_calls'] / requests, 3) if requests else 0.0
+        stats['avg_queue_wait_ms'] = round(stats.pop('total_queue_wait_ms') / requests, 2) if requests else 0.0
+        return stats
+
+    def _ensure_worker(self):
+        """Start the dispatcher thread on first use"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='ai-batcher', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Dispatcher loop: wait for a batch to fill or its window to close"""
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0].enqueued_at + self.max_wait
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        """Group a batch by kind and token limit, then issue the calls"""
+        now = time.monotonic()
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['requests'] += len(batch)
+            self._stats['total_queue_wait_ms'] += sum((now - p.enqueued_at) * 1000 for p in batch)
+
+        groups = {}
+        for pending in batch:
+            groups.setdefault((pending.kind, pending.max_tokens), []).append(pending)
+
+        for (kind, max_tokens), requests in groups.items():
+            # Identical prompts share one call
+            by_prompt = {}
+            for pending in requests:
+                by_prompt.setdefault(pending.prompt, []).append(pending)
+            self._count('deduplicated', len(requests) - len(by_prompt))
+
+            prompts = list(by_prompt)
+            if len(prompts) > 1 and kind in self.combine_kinds:
+                self._call_combined(prompts, by_prompt, max_tokens)
+            else:
+                for prompt in prompts:
+                    self._call_single(prompt, by_prompt[prompt], max_tokens)
+
+    def _call_single(self, prompt, waiters, max_tokens):
+        """Issue one API call and fan the result out to every waiter"""
+        self._count('api_calls')
+        try:
+            result = self.call_api(prompt, max_tokens=max_tokens)
+        except Exception as e:
+            for pending in waiters:
+                pending.future.set_exception(e)
+            return
+        for pending in waiters:
+            pending.future.set_result(result)
+
+    def _call_combined(self, prompts, by_prompt, max_tokens):
+        """Pack several prompts into one call that returns a JSON array of answers"""
+        self._count('api_calls')
+        self._count('combined_calls')
+        try:
+            response = self.call_api(
+                self._build_combined_prompt(prompts),
+                max_tokens=min(max_tokens * len(prompts), Config.AI_BATCH_MAX_COMBINED_TOKENS)
+            )
+        except Exception as e:
+            # The API itself failed; calling it again per prompt would only fail (or time out) once per prompt
+            for waiters in by_prompt.values():
+                for pending in waiters:
+                    pending.future.set_exception(e)
+            return
+
+        answers = self._split_combined_response(response, len(prompts))
+        if answers is None:
+            # Could not split the grouped answer - fall back to one call per prompt, all at once
+            self._count('combine_fallbacks')
+            for prompt in prompts:
+                self._executor.submit(self._call_single, prompt, by_prompt[prompt], max_tokens)
+            return
+
+        for prompt, answer in zip(prompts, answers):
+            for pending in by_prompt[prompt]:
+                pending.future.set_result(answer)
+
+    def _build_combined_prompt(self, prompts):
+        """Wrap independent prompts into a single grouped request"""
+        sections = [f"### Request {idx + 1}\n{prompt}" for idx, prompt in enumerate(prompts)]
+        return (
+            f"You will receive {len(prompts)} independent requests. Answer each one exactly as it instructs.\n\n"
+            + "\n\n".join(sections)
+            + f"\n\nRespond with ONLY a JSON array of exactly {len(prompts)} strings, where element i is your "
+            "complete response to Request i. Do not include any text outside the JSON array."
+        )
+
+    def _split_combined_response(self, response, expected):
+        """Split a grouped response back into per-prompt answers"""
+        cleaned = response.strip()
+        if cleaned.startswith("```"):
+            lines = cleaned.split('\n')
+            cleaned = '\n'.join(lines[1:-1]) if len(lines) > 2 else cleaned
+        try:
+            answers = json.loads(cleaned)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(answers, list) or len(answers) != expected:
+            return None
+        return [a if isinstance(a, str) else json.dumps(a) for a in answers]
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
@@ -10,23 +10,48 @@ from flask import Flask, render_template_string, jsonify, request, session, redi
 from flask_cors import CORS
 from datetime import datetime, timedelta
 import random
+import itertools
+import math
 import os
+import threading
 
 # Import project modules
 from config import Config
 from models import User, Order, DiningHallAdmin
 from data_manager import DataManager
+from freshness import URGENCY_SCORES, RequestClock
+from health import HealthReporter
+from health import init_app as init_health
+from http_cache import init_app as init_http_cache
+from json_provider import init_app as init_json
+from app_logging import get_logger
+from app_startup import StartupLoader
+from app_startup import init_app as init_startup
+from metrics import init_app as init_metrics
+from metrics import track
+from profiler import init_app as init_profiler
+from refresh_jobs import RateLimited, RefreshCoordinator
 from templates import HTML_TEMPLATE
 from admin_templates import ADMIN_LOGIN_TEMPLATE, ADMIN_REGISTER_TEMPLATE, ADMIN_DASHBOARD_TEMPLATE
 
+logger = get_logger('app')
+
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
+init_json(app)
+init_metrics(app)
+init_profiler(app)
+# Registered last so it runs first: metrics and profiles include compression time
+init_http_cache(app)
 
-# Initialize data manager and load dining data
+# Initialize data manager; dining data loads in the background (see create_app)
 data_manager = DataManager()
-data_manager.load_dining_data()
+startup = StartupLoader(data_manager)
+init_startup(app, startup)
+init_health(app, HealthReporter(startup))
+refresh_jobs = RefreshCoordinator(data_manager)
 
 
 class BhookhBusterService:
@@ -36,40 +61,45 @@ class BhookhBusterService:
         self.data_manager = data_manager
         self.users = {}
         self.orders = []
-        self.order_counter = 0
+        # next() on a count is atomic, so concurrent requests never share an ID
+        self._order_ids = itertools.count(1)
         self.admins = {}
-        self.admin_counter = 0
+        self._admin_ids = itertools.count(1)
+        self._admins_lock = threading.Lock()
         self._init_demo_admin()
     
     def _init_demo_admin(self):
         """Create a demo admin account for testing"""
-        # Get first restaurant if available
-        if self.data_manager.restaurants:
+        # Get first restaurant if available; runs again once startup has loaded the data
+        if self.data_manager.restaurants and 'admin' not in self.admins:
             first_restaurant_id = list(self.data_manager.restaurants.keys())[0]
             demo_admin = DiningHallAdmin(
-                'A001',
+                f'A{next(self._admin_ids):03d}',
                 first_restaurant_id,
                 'admin',
                 DiningHallAdmin.hash_password('admin123'),
                 'admin@cornell.edu'
             )
             self.admins['admin'] = demo_admin
-            print(f"✓ Demo admin created - Username: admin, Password: admin123")
+            logger.info("Demo admin created", extra={'username': 'admin', 'restaurant_id': first_restaurant_id})
     
     def register_admin(self, restaurant_id, username, email, password):
         """Register a new dining hall admin"""
-        if username in self.admins:
-            return {'success': False, 'error': 'Username already exists'}
+        password_hash = DiningHallAdmin.hash_password(password)
         
-        self.admin_counter += 1
-        admin = DiningHallAdmin(
-            f'A{self.admin_counter:03d}',
-            restaurant_id,
-            username,
-            DiningHallAdmin.hash_password(password),
-            email
-        )
-        self.admins[username] = admin
+        # Check and insert together, so two requests cannot claim the same username
+        with self._admins_lock:
+            if username in self.admins:
+                return {'success': False, 'error': 'Username already exists'}
+            
+            admin = DiningHallAdmin(
+                f'A{next(self._admin_ids):03d}',
+                restaurant_id,
+                username,
+                password_hash,
+                email
+            )
+            self.admins[username] = admin
         return {'success': True, 'admin_id': admin.admin_id}
     
     def authenticate_admin(self, username, password):
@@ -102,24 +132,25 @@ class BhookhBusterService:
         if not user:
             return {'error': 'User not found'}
         
-        # Get all available items
-        available_items = self.data_manager.get_all_available_items(user.location)
+        bag_size = random.randint(Config.SURPRISE_BAG_MIN_ITEMS, Config.SURPRISE_BAG_MAX_ITEMS)
+        urgency_weights = Config.SURPRISE_BAG_URGENCY_WEIGHTS if Config.SURPRISE_BAG_URGENCY_WEIGHTED else None
         
-        if not available_items:
-            return {'error': 'No surplus food available nearby'}
+        # Sample from the food types matching the user's preferences, if any
+        surprise_bag = []
+        if user.dietary_preferences:
+            food_types = self.data_manager.get_food_types_matching(user.dietary_preferences)
+            if food_types:
+                surprise_bag = self.data_manager.sample_available_items(
+                    bag_size, food_types, urgency_weights=urgency_weights
+                )
         
-        # Filter by user preferences if any
-        filtered_items = self._filter_by_preferences(available_items, user)
-        
-        if not filtered_items:
-            filtered_items = available_items  # Fallback to all items
+        if not surprise_bag:
+            surprise_bag = self.data_manager.sample_available_items(  # Fallback to all items
+                bag_size, urgency_weights=urgency_weights
+            )
         
-        # Select random items for surprise bag
-        bag_size = min(
-            random.randint(Config.SURPRISE_BAG_MIN_ITEMS, Config.SURPRISE_BAG_MAX_ITEMS),
-            len(filtered_items)
-        )
-        surprise_bag = random.sample(filtered_items, bag_size)
+        if not surprise_bag:
+            return {'error': 'No surplus food available nearby'}
         
         return {
             'type': 'surprise_bag',
@@ -135,25 +166,37 @@ class BhookhBusterService:
         if not user:
             return []
         
-        # Get all available items
-        available_items = self.data_manager.get_all_available_items(user.location)
+        # Get available items, already partitioned by how soon they expire
+        clock = RequestClock()
+        items_by_urgency = self.data_manager.get_items_by_urgency(clock.now)
         
-        if not available_items:
+        if not any(items_by_urgency.values()):
             return []
         
-        # Score each item
-        scored_items = []
-        for item in available_items:
-            score = self._calculate_item_score(item, user, mood)
+        # Score each item: the type terms are computed once per indexed food type
+        # and the urgency term is shared by every item in a bucket
+        with track('scoring'):
+            type_scores = {
+                food_type: self._calculate_type_score(food_type, user, mood)
+                for food_type in self.data_manager.get_food_types()
+            }
+            scored_items = []
+            for bucket, items in items_by_urgency.items():
+                urgency_score = URGENCY_SCORES[bucket]
+                for item in items:
+                    type_score = type_scores.get(item['food_type'])
+                    if type_score is None:
+                        type_score = self._calculate_type_score(item['food_type'], user, mood)
+                    score = type_score + urgency_score
+                    
+                    scored_items.append({
+                        'item': item,
+                        'score': score,
+                        'discount_price': round(item['original_price'] * Config.DISCOUNT_RATE, 2)
+                    })
             
-            scored_items.append({
-                'item': item,
-                'score': score,
-                'discount_price': round(item['original_price'] * Config.DISCOUNT_RATE, 2)
-            })
-        
-        # Sort by score and return top suggestions
-        scored_items.sort(key=lambda x: x['score'], reverse=True)
+            # Sort by score and return top suggestions
+            scored_items.sort(key=lambda x: x['score'], reverse=True)
         return scored_items[:Config.MAX_SUGGESTIONS]
     
     def create_custom_order(self, user_id, selected_items, mood=None):
@@ -178,9 +221,8 @@ class BhookhBusterService:
                 total_cost += discount_price
         
         # Create order
-        self.order_counter += 1
         order = Order(
-            order_id=f"ORD_{self.order_counter:04d}",
+            order_id=f"ORD_{next(self._order_ids):04d}",
             user_id=user_id,
             order_type='custom_bag',
             items=custom_items,
@@ -190,41 +232,32 @@ class BhookhBusterService:
         self.orders.append(order)
         return order.to_dict()
     
-    def _filter_by_preferences(self, items, user):
-        """Filter items by user's dietary preferences"""
-        if not user.dietary_preferences:
-            return items
+    def _calculate_item_score(self, item, user, mood, clock=None, urgency_score=None):
+        """Calculate recommendation score for an item (pass one RequestClock per request)"""
+        score = self._calculate_type_score(item['food_type'], user, mood)
+        
+        # Urgency based on expiry time (callers iterating urgency buckets pass the bucket's score)
+        if urgency_score is None:
+            urgency_score = (clock or RequestClock()).urgency_score(item)
+        score += urgency_score
         
-        return [
-            item for item in items 
-            if any(pref in item['food_type'] for pref in user.dietary_preferences)
-        ]
+        return score
     
-    def _calculate_item_score(self, item, user, mood):
-        """Calculate recommendation score for an item"""
+    def _calculate_type_score(self, food_type, user, mood):
+        """The part of an item's score that depends only on its food type"""
         score = 0
         
         # Preference score based on past interactions
-        if item['food_type'] in user.preferences_score:
-            score += user.preferences_score[item['food_type']] * Config.PREFERENCE_SCORE_WEIGHT
+        if food_type in user.preferences_score:
+            score += user.preferences_score[food_type] * Config.PREFERENCE_SCORE_WEIGHT
         
         # Dietary preference match
-        if item['food_type'] in user.dietary_preferences:
+        if food_type in user.dietary_preferences:
             score += Config.DIETARY_MATCH_SCORE
         
         # Mood-based scoring
         if mood:
-            score += self._get_mood_score(item['food_type'], mood)
-        
-        # Urgency based on expiry time
-        hours_until_expiry = (
-            datetime.fromisoformat(item['expiry']) - datetime.now()
-        ).total_seconds() / 3600
-        
-        if hours_until_expiry < Config.URGENT_EXPIRY_HOURS:
-            score += Config.URGENT_EXPIRY_SCORE
-        elif hours_until_expiry < Config.NORMAL_EXPIRY_HOURS:
-            score += Config.NORMAL_EXPIRY_SCORE
+            score += self._get_mood_score(food_type, mood)
         
         return score
     
@@ -236,6 +269,7 @@ class BhookhBusterService:
 
 # Initialize service
 bhookh_service = BhookhBusterService(data_manager)
+startup.on_ready(bhookh_service._init_demo_admin)
 
 
 # ============= API ROUTES =============
@@ -315,9 +349,47 @@ def rate_item():
 
 @app.route('/api/refresh-data', methods=['POST'])
 def refresh_data():
-    """Refresh dining data from Cornell API"""
-    success = data_manager.refresh_data()
-    return jsonify({'success': success})
+    """Start refreshing dining data from Cornell API in the background, or join the refresh in progress"""
+    try:
+        job, coalesced = refresh_jobs.submit(request.remote_addr)
+    except RateLimited as e:
+        response = jsonify({'success': False, 'error': 'Too many refresh requests', 'retry_after': round(e.retry_after, 1)})
+        response.headers['Retry-After'] = str(math.ceil(e.retry_after))
+        return response, 429
+    status_url = f'/api/refresh-data/{job.job_id}'
+    response = jsonify({'success': True, 'coalesced': coalesced, 'status_url': status_url, **job.to_dict()})
+    response.headers['Location'] = status_url
+    return response, 202
+
+
+@app.route('/api/refresh-data/<job_id>', methods=['GET'])
+def get_refresh_job(job_id):
+    """Get the state of a refresh job"""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown refresh job'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/waste-stats', methods=['GET'])
+def get_waste_stats():
+    """Get surplus items that expired unsold, and expiry scheduler state"""
+    return jsonify({
+        'waste': data_manager.waste_tracker.get_stats(),
+        'expiry_scheduler': data_manager.expiry_scheduler.get_stats()
+    })
+
+
+@app.route('/api/expiring-soon', methods=['GET'])
+def get_expiring_soon():
+    """Get items about to expire (urgent bucket), soonest first"""
+    items = data_manager.get_expiring_soon(
+        limit=request.args.get('limit', Config.MAX_SUGGESTIONS, type=int),
+        restaurant_id=request.args.get('restaurant_id')
+    )
+    for item in items:
+        item['discount_price'] = round(item['original_price'] * Config.DISCOUNT_RATE, 2)
+    return jsonify({'items': items, 'counts': data_manager.get_urgency_counts()})
 
 
 # ============= ADMIN ROUTES =============
@@ -408,7 +480,7 @@ def admin_get_inventory():
     if not restaurant:
         return jsonify({'success': False, 'error': 'Restaurant not found'}), 404
     
-    items = restaurant.surplus_inventory
+    items = restaurant.get_inventory_copy()
     return jsonify({'success': True, 'items': items})
 
 
@@ -426,9 +498,8 @@ def admin_add_item():
     
     data = request.json
     
-    # Generate item ID
-    item_count = len(restaurant.surplus_inventory) + 1
-    item_id = f"{restaurant.restaurant_id}_F{item_count:03d}"
+    # Generate item ID (reserved atomically, so concurrent adds never share one)
+    item_id = restaurant.new_item_id()
     
     # Calculate expiry time
     expiry_time = datetime.now() + timedelta(hours=data['expiry_hours'])
@@ -466,10 +537,8 @@ def admin_update_quantity():
     item_id = data['item_id']
     change = data['change']
     
-    item = restaurant.get_item_by_id(item_id)
-    if item:
-        new_quantity = max(0, item['quantity'] + change)
-        restaurant.update_item_quantity(item_id, new_quantity)
+    # Read-modify-write under the restaurant's lock, so concurrent updates are not lost
+    if restaurant.adjust_item_quantity(item_id, change) is not None:
         return jsonify({'success': True})
     
     return jsonify({'success': False, 'error': 'Item not found'})
@@ -516,15 +585,28 @@ def admin_delete_item():
     return jsonify({'success': True})
 
 
+def create_app(wait=False):
+    """
+    The app, with dining data loading in the background; /readyz answers
+    503 until it is in. WSGI servers should load the app through this:
+    gunicorn 'app:create_app()'
+    """
+    startup.start()
+    if wait:
+        startup.wait()
+    return app
+
+
 # ============= MAIN =============
 
 if __name__ == '__main__':
+    create_app()
     print("\n" + "="*60)
     print("🍽️  BHOOKH BUSTER - Cornell Dining Edition")
     print("="*60)
     print("\n✅ Server starting...")
     print(f"📱 Open your browser: http://localhost:{Config.PORT}")
-    print(f"📊 Loaded {len(data_manager.restaurants)} dining halls")
+    print("📊 Loading dining data in the background (ready when /readyz answers 200)")
     print("🔄 Press Ctrl+C to stop the server\n")
     print("="*60 + "\n")
     
@@ -0,0 +1,284 @@
+"""
+Bhookh Buster - ASGI (Starlette) variant of app_enhanced.py
+Serves the same endpoints from one event loop: calls to Claude and the
+Cornell dining API are awaited with httpx instead of blocking a request
+thread, so a single worker can hold hundreds of suggestion requests open
+while they wait on the AI. Business logic is app_enhanced's
+BhookhBusterService, shared with the Flask app.
+
+Needs the optional packages starlette, httpx and uvicorn (or another ASGI server).
+
+Run: python app_asgi.py
+  or: uvicorn app_asgi:app --port 5001
+"""
+
+import math
+import os
+import re
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from starlette.responses import JSONResponse as StarletteJSONResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from app_enhanced import bhookh_service, claude_ai, data_manager, health_reporter, startup
+from config import Config
+from http_cache import ASGIHTTPCache
+from json_provider import JSONCodec
+from metrics import registry
+from refresh_jobs import AsyncRefreshCoordinator, RateLimited
+from templates import HTML_TEMPLATE
+
+# The template's only Jinja expression is the static script URL
+INDEX_HTML = re.sub(
+    r"\{\{\s*url_for\('static',\s*filename='([^']+)'\)\s*\}\}",
+    lambda match: f"/static/{match.group(1)}",
+    HTML_TEMPLATE
+)
+
+codec = JSONCodec()
+refresh_jobs = AsyncRefreshCoordinator(data_manager)
+
+
+class JSONResponse(StarletteJSONResponse):
+    """JSON response encoded like the Flask app's (json_provider.py)"""
+
+    def render(self, content):
+        return codec.dumps(content)
+
+
+def _login_required(endpoint):
+    """Reject requests without a registered user in the session, like the Flask routes do"""
+    async def wrapper(request):
+        user_id = request.session.get('user_id')
+        if not user_id:
+            return JSONResponse({'error': 'Not logged in'}, status_code=401)
+        return await endpoint(request, user_id)
+    wrapper.__name__ = endpoint.__name__
+    wrapper.__doc__ = endpoint.__doc__
+    return wrapper
+
+
+# ============= API ROUTES =============
+
+async def index(request):
+    """Main page"""
+    return HTMLResponse(INDEX_HTML)
+
+
+async def register(request):
+    """Register a new user with comprehensive profile"""
+    data = await request.json()
+    user = bhookh_service.register_user(
+        user_id=data['user_id'],
+        name=data['name'],
+        location=data['location'],
+        dietary_preferences=data.get('dietary_preferences', []),
+        email=data.get('email'),
+        phone=data.get('phone'),
+        dietary_restrictions=data.get('dietary_restrictions', []),
+        allergens=data.get('allergens', []),
+        food_categories=data.get('food_categories', []),
+        quick_preferences=data.get('quick_preferences', []),
+        dislikes=data.get('dislikes', [])
+    )
+    request.session['user_id'] = user.user_id
+    return JSONResponse({'success': True, 'user_id': user.user_id})
+
+
+@_login_required
+async def get_surprise_bag(request, user_id):
+    """Get a free surprise bag"""
+    return JSONResponse(bhookh_service.create_surprise_bag(user_id))
+
+
+@_login_required
+async def get_suggestions(request, user_id):
+    """Get AI-powered food suggestions using Claude"""
+    data = await request.json()
+    mood = data.get('mood')
+
+    # Stream suggestions as server-sent events when the client asks for them
+    if 'text/event-stream' in request.headers.get('accept', '') or request.query_params.get('stream'):
+        return _stream_suggestions(user_id, mood)
+
+    suggestions = await bhookh_service.get_ai_suggestions_async(user_id, mood)
+    return JSONResponse(suggestions)
+
+
+def _stream_suggestions(user_id, mood):
+    """Build a server-sent event response forwarding each suggestion as it completes"""
+    async def generate():
+        count = 0
+        async for suggestion in bhookh_service.stream_ai_suggestions_async(user_id, mood):
+            count += 1
+            yield f"event: suggestion\ndata: {codec.dumps(suggestion).decode('utf-8')}\n\n"
+        yield f"event: done\ndata: {codec.dumps({'count': count}).decode('utf-8')}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@_login_required
+async def get_meal_insights(request, user_id):
+    """Get AI insights about selected items"""
+    data = await request.json()
+    insights = await bhookh_service.get_meal_insights_async(user_id, data['selected_items'])
+    return JSONResponse(insights)
+
+
+@_login_required
+async def create_custom_order(request, user_id):
+    """Create a custom order"""
+    data = await request.json()
+    order = await bhookh_service.create_custom_order_async(
+        user_id,
+        data['selected_items'],
+        data.get('mood')
+    )
+    return JSONResponse(order)
+
+
+@_login_required
+async def rate_item(request, user_id):
+    """Rate a food item"""
+    data = await request.json()
+    user = bhookh_service.get_user(user_id)
+    user.add_interaction(data['food_type'], data['rating'])
+    return JSONResponse({'success': True})
+
+
+async def get_ai_batch_stats(request):
+    """Get AI request batching efficiency metrics"""
+    return JSONResponse(claude_ai.get_batching_stats())
+
+
+async def get_ai_circuit(request):
+    """Get AI circuit breaker state and latency budget outcomes"""
+    return JSONResponse(claude_ai.get_circuit_stats())
+
+
+async def get_ai_stream_stats(request):
+    """Get streaming time-to-first-suggestion metrics"""
+    return JSONResponse(claude_ai.get_stream_stats())
+
+
+async def refresh_data(request):
+    """Start refreshing dining data from Cornell API in the background, or join the refresh in progress"""
+    try:
+        job, coalesced = refresh_jobs.submit(request.client.host if request.client else None)
+    except RateLimited as e:
+        return JSONResponse({'success': False, 'error': 'Too many refresh requests', 'retry_after': round(e.retry_after, 1)},
+                            status_code=429, headers={'Retry-After': str(math.ceil(e.retry_after))})
+    status_url = f'/api/refresh-data/{job.job_id}'
+    return JSONResponse({'success': True, 'coalesced': coalesced, 'status_url': status_url, **job.to_dict()},
+                        status_code=202, headers={'Location': status_url})
+
+
+async def get_refresh_job(request):
+    """Get the state of a refresh job"""
+    job = refresh_jobs.get(request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({'success': False, 'error': 'Unknown refresh job'}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+
+async def get_waste_stats(request):
+    """Get surplus items that expired unsold, and expiry scheduler state"""
+    return JSONResponse({
+        'waste': data_manager.waste_tracker.get_stats(),
+        'expiry_scheduler': data_manager.expiry_scheduler.get_stats()
+    })
+
+
+async def get_expiring_soon(request):
+    """Get items about to expire (urgent bucket), soonest first"""
+    try:
+        limit = int(request.query_params.get('limit', Config.MAX_SUGGESTIONS))
+    except ValueError:
+        limit = Config.MAX_SUGGESTIONS
+    items = data_manager.get_expiring_soon(
+        limit=limit,
+        restaurant_id=request.query_params.get('restaurant_id')
+    )
+    for item in items:
+        item['discount_price'] = round(item['original_price'] * Config.DISCOUNT_RATE, 2)
+    return JSONResponse({'items': items, 'counts': data_manager.get_urgency_counts()})
+
+
+async def healthz(request):
+    """Liveness probe: 200 unless startup failed"""
+    body, status = health_reporter.liveness()
+    return JSONResponse(body, status_code=status)
+
+
+async def readyz(request):
+    """Readiness probe: 200 once dining data is loaded, 503 before"""
+    body, status = health_reporter.readiness()
+    return JSONResponse(body, status_code=status)
+
+
+async def metrics_endpoint(request):
+    """Prometheus text exposition of the process-wide registry"""
+    return PlainTextResponse(registry.expose(), media_type='text/plain; version=0.0.4')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    startup.start()
+    yield
+    await claude_ai.aclose()
+
+
+app = Starlette(
+    debug=Config.DEBUG,
+    routes=[
+        Route('/', index),
+        Route('/api/register', register, methods=['POST']),
+        Route('/api/surprise-bag', get_surprise_bag, methods=['GET']),
+        Route('/api/suggestions', get_suggestions, methods=['POST']),
+        Route('/api/meal-insights', get_meal_insights, methods=['POST']),
+        Route('/api/custom-order', create_custom_order, methods=['POST']),
+        Route('/api/rate-item', rate_item, methods=['POST']),
+        Route('/api/ai/batch-stats', get_ai_batch_stats, methods=['GET']),
+        Route('/api/ai/circuit', get_ai_circuit, methods=['GET']),
+        Route('/api/ai/stream-stats', get_ai_stream_stats, methods=['GET']),
+        Route('/api/refresh-data', refresh_data, methods=['POST']),
+        Route('/api/refresh-data/{job_id}', get_refresh_job, methods=['GET']),
+        Route('/api/waste-stats', get_waste_stats, methods=['GET']),
+        Route('/api/expiring-soon', get_expiring_soon, methods=['GET']),
+        Route('/metrics', metrics_endpoint, methods=['GET']),
+        Route('/healthz', healthz, methods=['GET']),
+        Route('/readyz', readyz, methods=['GET']),
+        Mount('/static', StaticFiles(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')), name='static'),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(ASGIHTTPCache),
+        Middleware(SessionMiddleware, secret_key=Config.SECRET_KEY),
+    ],
+    lifespan=lifespan
+)
+
+
+# ============= MAIN =============
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("\n" + "="*60)
+    print("🍽️  BHOOKH BUSTER - Cornell Dining Edition with AI (ASGI)")
+    print("="*60)
+    print(f"📱 Open your browser: http://localhost:{Config.PORT}")
+    print("📊 Loading dining data in the background (ready when /readyz answers 200)")
+    print("="*60 + "\n")
+
+    uvicorn.run(app, host=Config.HOST, port=Config.PORT, log_level='warning')
@@ -6,31 +6,56 @@ Run: python app.py
 Then open: http://localhost:5000
 """
 
+import itertools
+import math
 import os
 import random
 from datetime import datetime
 
-from flask import Flask, jsonify, render_template_string, request, session
+from flask import Flask, Response, jsonify, render_template_string, request, session, stream_with_context
 from flask_cors import CORS
 
 from claude_ai_service import ClaudeAIService
 # Import project modules
 from config import Config
+from app_logging import get_logger
+from app_startup import StartupLoader
+from app_startup import init_app as init_startup
 from data_manager import DataManager
+from freshness import RequestClock
+from health import HealthReporter
+from health import init_app as init_health
+from http_cache import init_app as init_http_cache
+from json_provider import init_app as init_json
+from metrics import init_app as init_metrics
+from metrics import timed
 from models import Order, User
+from profiler import init_app as init_profiler
+from refresh_jobs import RateLimited, RefreshCoordinator
+from safe_set_cache import SafeSetCache
 from templates import HTML_TEMPLATE
 
+logger = get_logger('app_enhanced')
+
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
+init_json(app)
+init_metrics(app)
+init_profiler(app)
+# Registered last so it runs first: metrics and profiles include compression time
+init_http_cache(app)
 
-# Initialize data manager and load dining data
+# Initialize data manager; dining data loads in the background (see create_app)
 data_manager = DataManager()
-data_manager.load_dining_data()
+startup = StartupLoader(data_manager)
+init_startup(app, startup)
+refresh_jobs = RefreshCoordinator(data_manager)
 
 # Initialize Claude AI service
 claude_ai = ClaudeAIService()
+health_reporter = init_health(app, HealthReporter(startup, claude_ai.breaker))
 
 
 class BhookhBusterService:
@@ -41,7 +66,9 @@ class BhookhBusterService:
         self.claude_ai = claude_service
         self.users = {}
         self.orders = []
-        self.order_counter = 0
+        # next() on a count is atomic, so concurrent requests never share an order ID
+        self._order_ids = itertools.count(1)
+        self.safe_sets = SafeSetCache(data_manager, self._is_item_safe)
     
     def register_user(self, user_id, name, location, dietary_preferences=None, email=None, phone=None,
                       dietary_restrictions=None, allergens=None, food_categories=None,
@@ -73,25 +100,20 @@ class BhookhBusterService:
         if not user:
             return {'error': 'User not found'}
         
-        # Get all available items
-        available_items = self.data_manager.get_all_available_items(user.location)
-        
-        if not available_items:
-            return {'error': 'No surplus food available nearby'}
-        
-        # CRITICAL: Filter by dietary restrictions and allergens
-        safe_items = self._filter_safe_items(available_items, user)
+        # Select random items for surprise bag from safe items only.
+        # CRITICAL: the dietary/allergen check is the acceptance test, so unsafe items are never drawn
+        bag_size = random.randint(Config.SURPRISE_BAG_MIN_ITEMS, Config.SURPRISE_BAG_MAX_ITEMS)
+        surprise_bag = self.data_manager.sample_available_items(
+            bag_size,
+            accept=self.safe_sets.is_cached_safe(user),
+            urgency_weights=Config.SURPRISE_BAG_URGENCY_WEIGHTS if Config.SURPRISE_BAG_URGENCY_WEIGHTED else None
+        )
         
-        if not safe_items:
+        if not surprise_bag:
+            if not self.data_manager.count_available_items():
+                return {'error': 'No surplus food available nearby'}
             return {'error': 'No items available matching your dietary requirements. Please check your preferences.'}
         
-        # Select random items for surprise bag from safe items only
-        bag_size = min(
-            random.randint(Config.SURPRISE_BAG_MIN_ITEMS, Config.SURPRISE_BAG_MAX_ITEMS),
-            len(safe_items)
-        )
-        surprise_bag = random.sample(safe_items, bag_size)
-        
         return {
             'type': 'surprise_bag',
             'cost': 0,
@@ -106,157 +128,192 @@ class BhookhBusterService:
         if not user:
             return []
         
-        # Get all available items
-        all_items = self.data_manager.get_all_available_items(user.location)
-        
-        if not all_items:
-            return []
-        
-        # CRITICAL: Filter out items based on dietary restrictions and allergens
-        safe_items = self._filter_safe_items(all_items, user)
-        
+        clock = RequestClock()
+        safe_items = self._suggestion_candidates(user, clock.now)
         if not safe_items:
-            print(f"No safe items found for user {user_id} after filtering")
             return []
         
-        print(f"Filtered from {len(all_items)} to {len(safe_items)} safe items for user")
-        
         # Use Claude AI for intelligent recommendations on safe items only
         try:
             suggestions = self.claude_ai.get_personalized_suggestions(
                 user=user,
                 available_items=safe_items,  # Only send safe items to AI
                 mood=mood,
-                context={'time': datetime.now().hour}
+                context={'time': clock.hour},
+                clock=clock
             )
             return suggestions
         except Exception as e:
-            print(f"Error getting AI suggestions: {e}")
+            logger.warning("Error getting AI suggestions", extra={'user_id': user_id, 'error': str(e)})
             # Fallback to basic scoring with safe items only
-            return self._basic_suggestions(safe_items, user, mood)
+            return self._basic_suggestions(safe_items, user, mood, clock)
+    
+    def stream_ai_suggestions(self, user_id, mood=None):
+        """Stream AI-powered suggestions one at a time, using the same strict filtering"""
+        user = self.get_user(user_id)
+        if not user:
+            return
+        
+        clock = RequestClock()
+        safe_items = self._get_safe_items(user, clock.now)
+        
+        if not safe_items:
+            return
+        
+        yield from self.claude_ai.stream_personalized_suggestions(
+            user=user,
+            available_items=safe_items,
+            mood=mood,
+            context={'time': clock.hour},
+            clock=clock
+        )
     
+    def _suggestion_candidates(self, user, now=None):
+        """CRITICAL: Only items passing the dietary restriction and allergen check go to the AI"""
+        safe_items = self._get_safe_items(user, now)
+        
+        if not safe_items:
+            logger.info("No safe items found after filtering", extra={'user_id': user.user_id})
+            return []
+        
+        logger.debug("Filtered safe items", extra={
+            'user_id': user.user_id, 'available': self.data_manager.count_available_items(), 'safe': len(safe_items)
+        })
+        return safe_items
+    
+    @timed('safe_items')
+    def _get_safe_items(self, user, now=None):
+        """
+        Available items that are safe for the user, from the safe set cache shared by
+        every user with the same allergens and restrictions.
+        """
+        return self.data_manager.build_listings(self.safe_sets.safe_entries(user, now))
+    
+    @timed('safe_filter')
     def _filter_safe_items(self, items, user):
         """
         Filter items to ensure they're safe and compatible with user's dietary restrictions.
         This is CRITICAL for user safety and satisfaction.
         """
-        safe_items = []
-        
-        for item in items:
-            # Skip if None
-            if not item:
-                continue
+        return [item for item in items if self._is_item_safe(item, user)]
+    
+    def _is_item_safe(self, item, user):
+        """
+        Check one item against the user's allergens and dietary restrictions.
+        Also the acceptance test when sampling surprise bags.
+        """
+        # Skip if None
+        if not item:
+            return False
+        
+        item_name = item.get('name', '').lower()
+        item_type = item.get('food_type', '').lower()
+        
+        # CRITICAL: Check allergens - NEVER show items with user's allergens
+        if user.allergens:
+            has_allergen = False
+            for allergen in user.allergens:
+                allergen_lower = allergen.lower()
+                # Check in name and food type
+                if allergen_lower in item_name or allergen_lower in item_type:
+                    has_allergen = True
+                    break
+                
+                # Common allergen mappings
+                allergen_keywords = {
+                    'peanuts': ['peanut', 'pb&j', 'peanut butter'],
+                    'tree-nuts': ['almond', 'walnut', 'cashew', 'pecan', 'pistachio', 'nut'],
+                    'milk': ['milk', 'dairy', 'cheese', 'yogurt', 'cream', 'butter'],
+                    'eggs': ['egg', 'omelet', 'omelette', 'quiche'],
+                    'soy': ['soy', 'tofu', 'edamame', 'miso'],
+                    'wheat': ['wheat', 'bread', 'pasta', 'noodle', 'flour'],
+                    'fish': ['fish', 'salmon', 'tuna', 'cod', 'tilapia'],
+                    'shellfish': ['shrimp', 'crab', 'lobster', 'shellfish', 'prawn'],
+                    'sesame': ['sesame', 'tahini']
+                }
+                
+                if allergen_lower in allergen_keywords:
+                    keywords = allergen_keywords[allergen_lower]
+                    if any(keyword in item_name for keyword in keywords):
+                        has_allergen = True
+                        break
             
-            item_name = item.get('name', '').lower()
-            item_type = item.get('food_type', '').lower()
+            if has_allergen:
+                return False  # Skip this item - contains allergen
+        
+        # Check dietary restrictions
+        if user.dietary_restrictions:
+            is_compatible = True
             
-            # CRITICAL: Check allergens - NEVER show items with user's allergens
-            if user.allergens:
-                has_allergen = False
-                for allergen in user.allergens:
-                    allergen_lower = allergen.lower()
-                    # Check in name and food type
-                    if allergen_lower in item_name or allergen_lower in item_type:
-                        has_allergen = True
+            for restriction in user.dietary_restrictions:
+                restriction_lower = restriction.lower()
+                
+                # Vegetarian: No meat or fish
+                if restriction_lower == 'vegetarian':
+                    meat_keywords = ['chicken', 'beef', 'pork', 'turkey', 'meat', 
+                                   'bacon', 'sausage', 'ham', 'lamb', 'goat', 
+                                   'fish', 'salmon', 'tuna', 'shrimp', 'seafood']
+                    if any(keyword in item_name for keyword in meat_keywords):
+                        is_compatible = False
                         break
-                    
-                    # Common allergen mappings
-                    allergen_keywords = {
-                        'peanuts': ['peanut', 'pb&j', 'peanut butter'],
-                        'tree-nuts': ['almond', 'walnut', 'cashew', 'pecan', 'pistachio', 'nut'],
-                        'milk': ['milk', 'dairy', 'cheese', 'yogurt', 'cream', 'butter'],
-                        'eggs': ['egg', 'omelet', 'omelette', 'quiche'],
-                        'soy': ['soy', 'tofu', 'edamame', 'miso'],
-                        'wheat': ['wheat', 'bread', 'pasta', 'noodle', 'flour'],
-                        'fish': ['fish', 'salmon', 'tuna', 'cod', 'tilapia'],
-                        'shellfish': ['shrimp', 'crab', 'lobster', 'shellfish', 'prawn'],
-                        'sesame': ['sesame', 'tahini']
-                    }
-                    
-                    if allergen_lower in allergen_keywords:
-                        keywords = allergen_keywords[allergen_lower]
-                        if any(keyword in item_name for keyword in keywords):
-                            has_allergen = True
-                            break
                 
-                if has_allergen:
-                    continue  # Skip this item - contains allergen
-            
-            # Check dietary restrictions
-            if user.dietary_restrictions:
-                is_compatible = True
+                # Vegan: No animal products
+                elif restriction_lower == 'vegan':
+                    animal_keywords = ['chicken', 'beef', 'pork', 'turkey', 'meat',
+                                     'bacon', 'sausage', 'ham', 'lamb', 'goat',
+                                     'fish', 'salmon', 'tuna', 'shrimp', 'seafood',
+                                     'milk', 'dairy', 'cheese', 'yogurt', 'cream',
+                                     'egg', 'butter', 'honey']
+                    if any(keyword in item_name for keyword in animal_keywords):
+                        is_compatible = False
+                        break
                 
-                for restriction in user.dietary_restrictions:
-                    restriction_lower = restriction.lower()
-                    
-                    # Vegetarian: No meat or fish
-                    if restriction_lower == 'vegetarian':
-                        meat_keywords = ['chicken', 'beef', 'pork', 'turkey', 'meat', 
-                                       'bacon', 'sausage', 'ham', 'lamb', 'goat', 
-                                       'fish', 'salmon', 'tuna', 'shrimp', 'seafood']
-                        if any(keyword in item_name for keyword in meat_keywords):
-                            is_compatible = False
-                            break
-                    
-                    # Vegan: No animal products
-                    elif restriction_lower == 'vegan':
-                        animal_keywords = ['chicken', 'beef', 'pork', 'turkey', 'meat',
-                                         'bacon', 'sausage', 'ham', 'lamb', 'goat',
-                                         'fish', 'salmon', 'tuna', 'shrimp', 'seafood',
-                                         'milk', 'dairy', 'cheese', 'yogurt', 'cream',
-                                         'egg', 'butter', 'honey']
-                        if any(keyword in item_name for keyword in animal_keywords):
-                            is_compatible = False
-                            break
-                    
-                    # Gluten-Free: No wheat products
-                    elif restriction_lower == 'gluten-free':
-                        gluten_keywords = ['bread', 'pasta', 'noodle', 'wheat', 'flour',
-                                         'bagel', 'muffin', 'cake', 'cookie', 'pizza',
-                                         'sandwich', 'wrap', 'tortilla', 'pita']
-                        if any(keyword in item_name for keyword in gluten_keywords):
-                            is_compatible = False
-                            break
-                    
-                    # Dairy-Free: No dairy products
-                    elif restriction_lower == 'dairy-free':
-                        dairy_keywords = ['milk', 'cheese', 'yogurt', 'cream', 'butter',
-                                        'dairy', 'ice cream', 'whey', 'casein']
-                        if any(keyword in item_name for keyword in dairy_keywords):
-                            is_compatible = False
-                            break
-                    
-                    # Pescatarian: No meat except fish
-                    elif restriction_lower == 'pescatarian':
-                        meat_keywords = ['chicken', 'beef', 'pork', 'turkey', 'meat',
-                                       'bacon', 'sausage', 'ham', 'lamb', 'goat']
-                        if any(keyword in item_name for keyword in meat_keywords):
-                            is_compatible = False
-                            break
-                    
-                    # Halal: No pork
-                    elif restriction_lower == 'halal':
-                        if 'pork' in item_name or 'bacon' in item_name or 'ham' in item_name:
-                            is_compatible = False
-                            break
-                    
-                    # Kosher: No pork, no shellfish
-                    elif restriction_lower == 'kosher':
-                        non_kosher = ['pork', 'bacon', 'ham', 'shrimp', 'crab', 'lobster', 'shellfish']
-                        if any(keyword in item_name for keyword in non_kosher):
-                            is_compatible = False
-                            break
+                # Gluten-Free: No wheat products
+                elif restriction_lower == 'gluten-free':
+                    gluten_keywords = ['bread', 'pasta', 'noodle', 'wheat', 'flour',
+                                     'bagel', 'muffin', 'cake', 'cookie', 'pizza',
+                                     'sandwich', 'wrap', 'tortilla', 'pita']
+                    if any(keyword in item_name for keyword in gluten_keywords):
+                        is_compatible = False
+                        break
                 
-                if not is_compatible:
-                    continue  # Skip this item - doesn't match dietary restrictions
-            
-            # Check dislikes (negative preference, not strict filter)
-            # We'll let some through but penalize in scoring
+                # Dairy-Free: No dairy products
+                elif restriction_lower == 'dairy-free':
+                    dairy_keywords = ['milk', 'cheese', 'yogurt', 'cream', 'butter',
+                                    'dairy', 'ice cream', 'whey', 'casein']
+                    if any(keyword in item_name for keyword in dairy_keywords):
+                        is_compatible = False
+                        break
+                
+                # Pescatarian: No meat except fish
+                elif restriction_lower == 'pescatarian':
+                    meat_keywords = ['chicken', 'beef', 'pork', 'turkey', 'meat',
+                                   'bacon', 'sausage', 'ham', 'lamb', 'goat']
+                    if any(keyword in item_name for keyword in meat_keywords):
+                        is_compatible = False
+                        break
+                
+                # Halal: No pork
+                elif restriction_lower == 'halal':
+                    if 'pork' in item_name or 'bacon' in item_name or 'ham' in item_name:
+                        is_compatible = False
+                        break
+                
+                # Kosher: No pork, no shellfish
+                elif restriction_lower == 'kosher':
+                    non_kosher = ['pork', 'bacon', 'ham', 'shrimp', 'crab', 'lobster', 'shellfish']
+                    if any(keyword in item_name for keyword in non_kosher):
+                        is_compatible = False
+                        break
             
-            # Item passed all filters!
-            safe_items.append(item)
+            if not is_compatible:
+                return False  # Skip this item - doesn't match dietary restrictions
         
-        return safe_items
+        # Check dislikes (negative preference, not strict filter)
+        # We'll let some through but penalize in scoring
+        
+        # Item passed all filters!
+        return True
     
     def get_meal_insights(self, user_id, selected_items):
         """Get AI insights about selected meal"""
@@ -268,7 +325,7 @@ class BhookhBusterService:
             insights = self.claude_ai.get_meal_insights(user, selected_items)
             return insights
         except Exception as e:
-            print(f"Error getting meal insights: {e}")
+            logger.warning("Error getting meal insights", extra={'user_id': user_id, 'error': str(e)})
             return {
                 'nutritional_overview': 'Your meal selection looks great!',
                 'balance_score': 8,
@@ -282,23 +339,7 @@ class BhookhBusterService:
         if not user:
             return {'error': 'User not found'}
         
-        custom_items = []
-        total_cost = 0
-        
-        # Get all available items
-        all_items = self.data_manager.get_all_available_items(user.location)
-        
-        # Filter to safe items only
-        safe_items = self._filter_safe_items(all_items, user)
-        
-        for item in safe_items:
-            if item['item_id'] in selected_items:
-                discount_price = round(item['original_price'] * Config.DISCOUNT_RATE, 2)
-                custom_items.append({
-                    **item,
-                    'discount_price': discount_price
-                })
-                total_cost += discount_price
+        custom_items, total_cost = self._select_custom_items(user, selected_items)
         
         if not custom_items:
             return {'error': 'Selected items are not compatible with your dietary restrictions'}
@@ -312,10 +353,31 @@ class BhookhBusterService:
         except:
             impact_message = f"Great job! You saved {len(custom_items)} meals from waste! 🌱"
         
+        return self._place_custom_order(user_id, custom_items, total_cost, impact_message)
+    
+    def _select_custom_items(self, user, selected_items):
+        """The selected items that are safe for the user, priced, and their total"""
+        custom_items = []
+        total_cost = 0
+        
+        # Safe items only
+        safe_items = self._get_safe_items(user)
+        
+        for item in safe_items:
+            if item['item_id'] in selected_items:
+                discount_price = round(item['original_price'] * Config.DISCOUNT_RATE, 2)
+                custom_items.append({
+                    **item,
+                    'discount_price': discount_price
+                })
+                total_cost += discount_price
+        
+        return custom_items, total_cost
+    
+    def _place_custom_order(self, user_id, custom_items, total_cost, impact_message):
         # Create order
-        self.order_counter += 1
         order = Order(
-            order_id=f"ORD_{self.order_counter:04d}",
+            order_id=f"ORD_{next(self._order_ids):04d}",
             user_id=user_id,
             order_type='custom_bag',
             items=custom_items,
@@ -329,6 +391,7 @@ class BhookhBusterService:
         
         return order_dict
     
+    @timed('preference_filter')
     def _filter_by_preferences(self, items, user):
         """Filter items by user's dietary preferences"""
         if not user.dietary_preferences:
@@ -339,11 +402,13 @@ class BhookhBusterService:
             if any(pref in item['food_type'] for pref in user.dietary_preferences)
         ]
     
-    def _basic_suggestions(self, items, user, mood):
+    @timed('scoring')
+    def _basic_suggestions(self, items, user, mood, clock=None):
         """Basic suggestions fallback"""
+        clock = clock or RequestClock()
         scored_items = []
         for item in items[:15]:
-            score = self._calculate_item_score(item, user, mood)
+            score = self._calculate_item_score(item, user, mood, clock)
             
             scored_items.append({
                 'item': item,
@@ -355,8 +420,8 @@ class BhookhBusterService:
         scored_items.sort(key=lambda x: x['score'], reverse=True)
         return scored_items[:Config.MAX_SUGGESTIONS]
     
-    def _calculate_item_score(self, item, user, mood):
-        """Calculate recommendation score for an item"""
+    def _calculate_item_score(self, item, user, mood, clock=None, urgency_score=None):
+        """Calculate recommendation score for an item (pass one RequestClock per request)"""
         score = 0
         
         # Preference score based on past interactions
@@ -371,15 +436,10 @@ class BhookhBusterService:
         if mood:
             score += self._get_mood_score(item['food_type'], mood)
         
-        # Urgency based on expiry time
-        hours_until_expiry = (
-            datetime.fromisoformat(item['expiry']) - datetime.now()
-        ).total_seconds() / 3600
-        
-        if hours_until_expiry < Config.URGENT_EXPIRY_HOURS:
-            score += Config.URGENT_EXPIRY_SCORE
-        elif hours_until_expiry < Config.NORMAL_EXPIRY_HOURS:
-            score += Config.NORMAL_EXPIRY_SCORE
+        # Urgency based on expiry time (callers iterating urgency buckets pass the bucket's score)
+        if urgency_score is None:
+            urgency_score = (clock or RequestClock()).urgency_score(item)
+        score += urgency_score
         
         return score
     
@@ -387,6 +447,71 @@ class BhookhBusterService:
         """Get score based on mood-food mapping"""
         mood_map = Config.MOOD_FOOD_MAP.get(mood.lower(), {})
         return mood_map.get(food_type, 0)
+    
+    # ============= ASYNCIO VARIANTS (app_asgi.py) =============
+    
+    async def get_ai_suggestions_async(self, user_id, mood=None):
+        """get_ai_suggestions for an event loop, awaiting the AI instead of blocking a thread"""
+        user = self.get_user(user_id)
+        if not user:
+            return []
+        
+        clock = RequestClock()
+        safe_items = self._suggestion_candidates(user, clock.now)
+        if not safe_items:
+            return []
+        
+        try:
+            return await self.claude_ai.get_personalized_suggestions_async(
+                user=user,
+                available_items=safe_items,
+                mood=mood,
+                context={'time': clock.hour},
+                clock=clock
+            )
+        except Exception as e:
+            logger.warning("Error getting AI suggestions", extra={'user_id': user_id, 'error': str(e)})
+            return self._basic_suggestions(safe_items, user, mood, clock)
+    
+    async def stream_ai_suggestions_async(self, user_id, mood=None):
+        """Async generator form of stream_ai_suggestions"""
+        user = self.get_user(user_id)
+        if not user:
+            return
+        
+        clock = RequestClock()
+        safe_items = self._get_safe_items(user, clock.now)
+        if not safe_items:
+            return
+        
+        async for suggestion in self.claude_ai.stream_personalized_suggestions_async(
+            user=user,
+            available_items=safe_items,
+            mood=mood,
+            context={'time': clock.hour},
+            clock=clock
+        ):
+            yield suggestion
+    
+    async def get_meal_insights_async(self, user_id, selected_items):
+        """get_meal_insights for an event loop"""
+        user = self.get_user(user_id)
+        if not user:
+            return {'error': 'User not found'}
+        return await self.claude_ai.get_meal_insights_async(user, selected_items)
+    
+    async def create_custom_order_async(self, user_id, selected_items, mood=None):
+        """create_custom_order for an event loop"""
+        user = self.get_user(user_id)
+        if not user:
+            return {'error': 'User not found'}
+        
+        custom_items, total_cost = self._select_custom_items(user, selected_items)
+        if not custom_items:
+            return {'error': 'Selected items are not compatible with your dietary restrictions'}
+        
+        impact_message = await self.claude_ai.generate_food_waste_impact_async(len(custom_items), total_cost / 100)
+        return self._place_custom_order(user_id, custom_items, total_cost, impact_message)
 
 
 # Initialize service
@@ -442,10 +567,31 @@ def get_suggestions():
     
     data = request.json
     mood = data.get('mood')
+    
+    # Stream suggestions as server-sent events when the client asks for them
+    if request.accept_mimetypes.best == 'text/event-stream' or request.args.get('stream'):
+        return _stream_suggestions(user_id, mood)
+    
     suggestions = bhookh_service.get_ai_suggestions(user_id, mood)
     return jsonify(suggestions)
 
 
+def _stream_suggestions(user_id, mood):
+    """Build a server-sent event response forwarding each suggestion as it completes"""
+    def generate():
+        count = 0
+        for suggestion in bhookh_service.stream_ai_suggestions(user_id, mood):
+            count += 1
+            yield f"event: suggestion\ndata: {app.json.dumps(suggestion)}\n\n"
+        yield f"event: done\ndata: {app.json.dumps({'count': count})}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/meal-insights', methods=['POST'])
 def get_meal_insights():
     """Get AI insights about selected items"""
@@ -487,22 +633,91 @@ def rate_item():
     return jsonify({'success': True})
 
 
+@app.route('/api/ai/batch-stats', methods=['GET'])
+def get_ai_batch_stats():
+    """Get AI request batching efficiency metrics"""
+    return jsonify(claude_ai.get_batching_stats())
+
+
+@app.route('/api/ai/circuit', methods=['GET'])
+def get_ai_circuit():
+    """Get AI circuit breaker state and latency budget outcomes"""
+    return jsonify(claude_ai.get_circuit_stats())
+
+
+@app.route('/api/ai/stream-stats', methods=['GET'])
+def get_ai_stream_stats():
+    """Get streaming time-to-first-suggestion metrics"""
+    return jsonify(claude_ai.get_stream_stats())
+
+
 @app.route('/api/refresh-data', methods=['POST'])
 def refresh_data():
-    """Refresh dining data from Cornell API"""
-    success = data_manager.refresh_data()
-    return jsonify({'success': success})
+    """Start refreshing dining data from Cornell API in the background, or join the refresh in progress"""
+    try:
+        job, coalesced = refresh_jobs.submit(request.remote_addr)
+    except RateLimited as e:
+        response = jsonify({'success': False, 'error': 'Too many refresh requests', 'retry_after': round(e.retry_after, 1)})
+        response.headers['Retry-After'] = str(math.ceil(e.retry_after))
+        return response, 429
+    status_url = f'/api/refresh-data/{job.job_id}'
+    response = jsonify({'success': True, 'coalesced': coalesced, 'status_url': status_url, **job.to_dict()})
+    response.headers['Location'] = status_url
+    return response, 202
+
+
+@app.route('/api/refresh-data/<job_id>', methods=['GET'])
+def get_refresh_job(job_id):
+    """Get the state of a refresh job"""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown refresh job'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/waste-stats', methods=['GET'])
+def get_waste_stats():
+    """Get surplus items that expired unsold, and expiry scheduler state"""
+    return jsonify({
+        'waste': data_manager.waste_tracker.get_stats(),
+        'expiry_scheduler': data_manager.expiry_scheduler.get_stats()
+    })
+
+
+@app.route('/api/expiring-soon', methods=['GET'])
+def get_expiring_soon():
+    """Get items about to expire (urgent bucket), soonest first"""
+    items = data_manager.get_expiring_soon(
+        limit=request.args.get('limit', Config.MAX_SUGGESTIONS, type=int),
+        restaurant_id=request.args.get('restaurant_id')
+    )
+    for item in items:
+        item['discount_price'] = round(item['original_price'] * Config.DISCOUNT_RATE, 2)
+    return jsonify({'items': items, 'counts': data_manager.get_urgency_counts()})
+
+
+def create_app(wait=False):
+    """
+    The app, with dining data loading in the background; /readyz answers
+    503 until it is in. WSGI servers should load the app through this:
+    gunicorn 'app_enhanced:create_app()'
+    """
+    startup.start()
+    if wait:
+        startup.wait()
+    return app
 
 
 # ============= MAIN =============
 
 if __name__ == '__main__':
+    create_app()
     print("\n" + "="*60)
     print("🍽️  BHOOKH BUSTER - Cornell Dining Edition with AI")
     print("="*60)
     print("\n✅ Server starting...")
     print(f"📱 Open your browser: http://localhost:{Config.PORT}")
-    print(f"📊 Loaded {len(data_manager.restaurants)} dining halls")
+    print("📊 Loading dining data in the background (ready when /readyz answers 200)")
     print("🤖 Claude AI integration enabled")
     print("📄 Press Ctrl+C to stop the server\n")
     print("="*60 + "\n")
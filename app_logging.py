@@ -0,0 +1,160 @@
+"""
+Structured logging for Bhookh Buster
+Request threads only put records on an in-memory queue; a background listener
+thread formats them (JSON by default) and writes them out, so a slow or
+blocked stdout never stalls a request. Per-request DEBUG lines are sampled.
+
+Importing a module that logs does not start the listener; the apps start it
+with start_logging() when they start up (create_app() or the ASGI lifespan).
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+from config import Config
+
+ROOT_LOGGER = 'bhookh'
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with `extra=` become top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Pass one in `every` records below `level`; records at or above it always pass.
+    Passed records carry `sample_every` so log volume can be scaled back up.
+    """
+
+    def __init__(self, every, level=logging.INFO):
+        super().__init__()
+        self.every = max(1, int(every))
+        self.level = level
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= self.level:
+            return True
+        if next(self._counter) % self.every:
+            return False
+        if self.every > 1:
+            record.sample_every = self.every
+        return True
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that does only the work that must happen on the caller's thread"""
+
+    def prepare(self, record):
+        # Render the message now (args may be mutated later) but leave
+        # JSON encoding to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level=None, fmt=None, stream=None, debug_sample_every=None):
+    """
+    (Re)configure the `bhookh` logger tree
+
+    Args:
+        level: Level name or number (default Config.LOG_LEVEL)
+        fmt: 'json' or 'text' (default Config.LOG_FORMAT)
+        stream: Where the listener writes (default sys.stderr)
+        debug_sample_every: Keep 1 in N DEBUG records (default Config.LOG_DEBUG_SAMPLE_EVERY)
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener
+
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+
+        if fmt is None:
+            fmt = Config.LOG_FORMAT
+        if fmt == 'json':
+            formatter = JSONFormatter()
+        else:
+            formatter = logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        handler = _EnqueueHandler(log_queue)
+        handler.addFilter(SamplingFilter(
+            Config.LOG_DEBUG_SAMPLE_EVERY if debug_sample_every is None else debug_sample_every))
+
+        logger = logging.getLogger(ROOT_LOGGER)
+        for old in list(logger.handlers):
+            logger.removeHandler(old)
+        logger.addHandler(handler)
+        logger.setLevel(level or Config.LOG_LEVEL)
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+        return _listener
+
+
+def flush_logging():
+    """
+    Drain queued records and stop the listener (registered with atexit).
+    Records logged afterwards are queued but not written.
+    """
+    global _listener
+
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def start_logging():
+    """configure_logging() with the defaults, unless logging is already configured"""
+    with _configure_lock:
+        if logging.getLogger(ROOT_LOGGER).handlers:
+            return _listener
+    return configure_logging()
+
+
+def get_logger(name):
+    """
+    Logger under the `bhookh` tree. Until logging is started, its warnings
+    and errors go to Python's last-resort stderr handler
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+atexit.register(flush_logging)
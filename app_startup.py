@@ -0,0 +1,90 @@
+"""
+Background startup for the Bhookh Buster apps
+Importing an app module no longer loads dining data: the loader does it in
+a background thread, started by create_app() (or the ASGI lifespan, or the
+first request), so a worker accepts connections and answers its readiness
+probe at once and reports ready when the inventory is in.
+"""
+
+import threading
+import time
+
+from app_logging import get_logger, start_logging
+
+logger = get_logger('startup')
+
+
+class StartupLoader:
+    """Loads a DataManager's dining data once, off the request path"""
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self.state = 'pending'  # pending -> loading -> ready | failed
+        self.started_at = None
+        self.load_seconds = None
+        self.error = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    def on_ready(self, callback):
+        """Call `callback()` once the data is loaded, before the app reports ready"""
+        self._callbacks.append(callback)
+
+    def start(self):
+        """Begin loading in the background unless it has already begun; returns at once"""
+        if self.state != 'pending':
+            return
+        with self._lock:
+            if self.state != 'pending':
+                return
+            self.state = 'loading'
+            self.started_at = time.time()
+        # The log listener thread starts with the app, not when its modules are imported
+        start_logging()
+        threading.Thread(target=self._load, name='startup-loader', daemon=True).start()
+
+    def wait(self, timeout=None):
+        """Block until loading finishes (or `timeout` seconds pass); True if the data is ready"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            # Tools that bring their own inventory populate it before serving; keep theirs
+            if not self.data_manager.restaurants:
+                self.data_manager.load_dining_data()
+            self.data_manager.start_expiry_scheduler()
+            for callback in self._callbacks:
+                callback()
+            self.state = 'ready'
+        except Exception as e:
+            self.error = str(e)
+            self.state = 'failed'
+            logger.exception("Loading dining data failed")
+        finally:
+            self.load_seconds = round(time.perf_counter() - start, 3)
+            self._done.set()
+        logger.info("Startup finished", extra={'state': self.state, 'load_seconds': self.load_seconds,
+                                               'restaurants': len(self.data_manager.restaurants)})
+
+    def get_status(self):
+        return {
+            'ready': self.ready,
+            'state': self.state,
+            'load_seconds': self.load_seconds,
+            'error': self.error
+        }
+
+
+def init_app(app, loader):
+    """Start `loader` on a Flask app's first request (health.py reports its state)"""
+
+    @app.before_request
+    def _start_loading():
+        loader.start()
@@ -0,0 +1,184 @@
+"""
+Flask vs ASGI suggestion benchmark
+Boots app_enhanced.py (threaded werkzeug server) and app_asgi.py (one
+uvicorn worker) in their own processes against a synthetic inventory and a
+mock LLM process with fixed latency, then fires waves of concurrent
+/api/suggestions requests at each and reports latency, throughput and how
+many answers actually came from the AI within AI_SUGGESTION_BUDGET_MS
+rather than the local fallback.
+
+Needs starlette, httpx and uvicorn.
+
+Run: python benchmarks/asgi_bench.py [--concurrency 50,200,400] [--waves 3] [--llm-latency-ms 400]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import uvicorn
+from werkzeug.serving import make_server
+
+from app_logging import configure_logging
+from config import Config
+from load_test import summarize
+from synthetic_data import generate_inventory, generate_user_profile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(kind, port, llm_url, num_items):
+    """Child process: one app on `port` with synthetic data, calling the mock LLM at `llm_url`"""
+    configure_logging(level='ERROR', stream=io.StringIO())
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app_enhanced
+        module = app_enhanced
+        if kind == 'asgi':
+            import app_asgi
+            module = app_asgi
+    app_enhanced.claude_ai.api_url = llm_url
+    app_enhanced.data_manager.clear_inventory()
+    app_enhanced.data_manager._populate_restaurants(generate_inventory(30, num_items, seed=7))
+
+    if kind == 'asgi':
+        uvicorn.run(module.app, host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+    else:
+        make_server('127.0.0.1', port, module.app, threaded=True).serve_forever()
+
+
+def spawn(args, probe_url):
+    """Start a child process and wait until `probe_url` answers"""
+    process = subprocess.Popen([sys.executable] + args, cwd=ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(probe_url, timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{args} did not start")
+
+
+async def register_users(client, base_url, num_users, seed):
+    """Register users and return one Cookie header per session"""
+    rng = random.Random(seed)
+    cookies = []
+    for idx in range(num_users):
+        response = await client.post(f"{base_url}/api/register", json=generate_user_profile(idx, rng))
+        response.raise_for_status()
+        cookies.append('; '.join(f"{name}={value}" for name, value in response.cookies.items()))
+    return cookies
+
+
+async def run_wave(client, base_url, cookies, concurrency):
+    """`concurrency` suggestion requests in flight at once; returns (latencies, errors, elapsed)"""
+    latencies = []
+    errors = 0
+
+    async def one(idx):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"{base_url}/api/suggestions", json={'mood': 'happy'},
+                                         headers={'Cookie': cookies[idx % len(cookies)]})
+            if response.status_code != 200:
+                errors += 1
+                return
+        except httpx.HTTPError:
+            errors += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(idx) for idx in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def bench_app(label, base_url, levels, waves, num_users):
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        cookies = await register_users(client, base_url, num_users, seed=7)
+        rows = []
+        for concurrency in levels:
+            before = (await client.get(f"{base_url}/api/ai/circuit")).json()
+            latencies, errors, elapsed = [], 0, 0.0
+            for _ in range(waves):
+                wave_latencies, wave_errors, wave_elapsed = await run_wave(client, base_url, cookies, concurrency)
+                latencies.extend(wave_latencies)
+                errors += wave_errors
+                elapsed += wave_elapsed
+            # Let calls that outlived their budget finish before the next level
+            await asyncio.sleep(1.0)
+            after = (await client.get(f"{base_url}/api/ai/circuit")).json()
+            served = after['ai_served'] - before['ai_served']
+            summary = summarize(latencies, errors, elapsed)
+            summary['ai_served_pct'] = round(100.0 * served / max(1, len(latencies)), 1)
+            rows.append((label, concurrency, summary))
+            print(f"{label:8} {concurrency:>6} {summary['p50_ms']:>9} {summary['p95_ms']:>9} "
+                  f"{summary['throughput_rps']:>9} {summary['ai_served_pct']:>9} {errors:>7}", flush=True)
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', default='50,200,400')
+    parser.add_argument('--waves', type=int, default=3)
+    parser.add_argument('--users', type=int, default=400)
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--llm-latency-ms', type=int, default=400)
+    parser.add_argument('--apps', default='flask,asgi')
+    parser.add_argument('--serve', choices=['flask', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--llm-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.llm_url, args.items)
+        return
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    llm_port = _free_port()
+    llm_url = f"http://127.0.0.1:{llm_port}/v1/messages"
+    llm = spawn(['mock_llm_server.py', '--host', '127.0.0.1', '--port', str(llm_port),
+                 '--latency', f"fixed:{args.llm_latency_ms}"], f"http://127.0.0.1:{llm_port}/stats")
+
+    print(f"LLM latency {args.llm_latency_ms}ms, AI budget {Config.AI_SUGGESTION_BUDGET_MS}ms, "
+          f"{args.waves} wave(s) per level\n")
+    print(f"{'app':8} {'conc':>6} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>9} {'AI %':>9} {'errors':>7}")
+    try:
+        for kind in args.apps.split(','):
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = spawn([os.path.abspath(__file__), '--serve', kind, '--port', str(port),
+                            '--llm-url', llm_url, '--items', str(args.items)], f"{base_url}/api/ai/circuit")
+            try:
+                asyncio.run(bench_app(kind, base_url, levels, args.waves, args.users))
+            finally:
+                server.kill()
+    finally:
+        llm.kill()
+
+
+if __name__ == '__main__':
+    main()
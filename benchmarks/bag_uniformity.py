@@ -0,0 +1,142 @@
+"""
+Surprise-bag sampler check
+Verifies that DataManager.sample_available_items draws uniformly (with and
+without an acceptance predicate) and in proportion to the urgency weights
+when weighting is on, using chi-square tests on item inclusion counts, then
+times a bag draw against inventory size next to the old list-then-sample path.
+
+Exits non-zero if any distribution test fails.
+
+Run: python benchmarks/bag_uniformity.py [--draws 20000] [--alpha 0.001]
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_logging import configure_logging
+from freshness import RequestClock
+from synthetic_data import generate_inventory
+
+BAG_SIZE = 4
+UNSAFE_WORDS = ('peanut', 'cheese', 'shrimp')
+
+
+def build_data_manager(num_items, seed=11):
+    from data_manager import DataManager
+
+    data_manager = DataManager()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_manager._populate_restaurants(generate_inventory(max(1, num_items // 50), num_items, seed=seed))
+    return data_manager
+
+
+def is_safe(item):
+    return not any(word in item['name'].lower() for word in UNSAFE_WORDS)
+
+
+def chi_square_p(observed, expected):
+    """Chi-square statistic and upper-tail p-value (Wilson-Hilferty approximation)"""
+    stat = sum((observed.get(key, 0) - exp) ** 2 / exp for key, exp in expected.items())
+    df = len(expected) - 1
+    z = ((stat / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return stat, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def inclusion_counts(data_manager, draws, k, rng, **kwargs):
+    counts = Counter()
+    for _ in range(draws):
+        bag = data_manager.sample_available_items(k, rng=rng, **kwargs)
+        assert len({item['item_id'] for item in bag}) == len(bag), 'duplicate item in bag'
+        counts.update(item['item_id'] for item in bag)
+    return counts
+
+
+def check(label, counts, expected, alpha):
+    stat, p = chi_square_p(counts, expected)
+    ok = p >= alpha and set(counts) <= set(expected)
+    print(f"{label:38} chi2={stat:9.1f} df={len(expected) - 1:4d} p={p:.4f} {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def run_distribution_checks(draws, alpha):
+    data_manager = build_data_manager(200)
+    items = [item for restaurant in data_manager.restaurants.values() for item in restaurant.get_available_items()]
+    rng = random.Random(3)
+    results = []
+
+    # Every item should appear in k/n of the bags
+    counts = inclusion_counts(data_manager, draws, BAG_SIZE, rng)
+    expected = {item['item_id']: draws * BAG_SIZE / len(items) for item in items}
+    results.append(check('uniform, all items', counts, expected, alpha))
+
+    # Rejected items never appear; the rest stay equally likely
+    safe = [item for item in items if is_safe(item)]
+    counts = inclusion_counts(data_manager, draws, BAG_SIZE, rng, accept=is_safe)
+    expected = {item['item_id']: draws * BAG_SIZE / len(safe) for item in safe}
+    results.append(check(f'uniform, accept ({len(safe)}/{len(items)} safe)', counts, expected, alpha))
+
+    # Restricted to a few food types
+    food_types = ['asian', 'italian']
+    members = [item for item in items if item['food_type'] in food_types]
+    counts = inclusion_counts(data_manager, draws, BAG_SIZE, rng, food_types=food_types)
+    expected = {item['item_id']: draws * BAG_SIZE / len(members) for item in members}
+    results.append(check('uniform, food types asian+italian', counts, expected, alpha))
+
+    # Single draws are proportional to the bucket weight
+    weights = {'urgent': 3, 'soon': 2, 'later': 1}
+    now = time.time()
+    clock = RequestClock(now)
+    counts = inclusion_counts(data_manager, draws, 1, rng, urgency_weights=weights, now=now)
+    total_weight = sum(weights[clock.bucket(item)] for item in items)
+    expected = {item['item_id']: draws * weights[clock.bucket(item)] / total_weight for item in items}
+    results.append(check('urgency-weighted, k=1', counts, expected, alpha))
+
+    return all(results)
+
+
+def run_scaling(sizes, repeats):
+    print(f"\n{'inventory':>10} {'sampled us':>12} {'list+sample us':>15}")
+    rng = random.Random(5)
+    for size in sizes:
+        data_manager = build_data_manager(size)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            data_manager.sample_available_items(BAG_SIZE, accept=is_safe, rng=rng)
+        sampled = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            candidates = [item for item in data_manager.get_all_available_items() if is_safe(item)]
+            rng.sample(candidates, min(BAG_SIZE, len(candidates)))
+        listed = (time.perf_counter() - start) / repeats
+
+        print(f"{size:>10} {sampled * 1e6:>12.1f} {listed * 1e6:>15.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--draws', type=int, default=20000)
+    parser.add_argument('--alpha', type=float, default=0.001)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    configure_logging(level='WARNING', stream=io.StringIO())
+    ok = run_distribution_checks(args.draws, args.alpha)
+    run_scaling(args.sizes, args.repeats)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
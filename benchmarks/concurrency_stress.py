@@ -0,0 +1,266 @@
+"""
+Concurrency stress test for app.py's service layer and models
+Runs many threads at once against one app instance: admins adding,
+adjusting and deleting items, admins racing to register the same usernames,
+users placing orders and rating food, and readers listing and sampling the
+inventory. Afterwards it checks the invariants that unsynchronized code
+breaks:
+- order, admin and item IDs are unique
+- no quantity adjustment or rating increment is lost
+- each contested username was registered exactly once
+- the indexes agree with the restaurants' inventories
+- every inventory snapshot a reader grabbed was internally consistent,
+  and its items did not change while the reader held it
+- no reader raised an exception
+
+It also reports read throughput alone and while the writers run.
+
+Exits non-zero if any check fails.
+
+Run: python benchmarks/concurrency_stress.py [--threads 32] [--seconds 5]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_logging import configure_logging
+from synthetic_data import generate_inventory
+
+CONTESTED_USERNAMES = [f'contested{idx}' for idx in range(20)]
+SHARED_USER = 'stress_shared_user'
+
+
+class Stress:
+    """Shared state for one run; each worker records what it did so the end state can be checked"""
+
+    def __init__(self, module, seconds):
+        self.module = module
+        self.service = module.bhookh_service
+        self.data_manager = module.data_manager
+        self.seconds = seconds
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.errors = []
+        self.added_ids = []
+        self.order_ids = []
+        self.adjustments = 0
+        self.ratings = 0
+        self.registrations = Counter()
+        self.reads = 0
+        self.torn_snapshots = 0
+
+        self.restaurant = next(iter(self.data_manager.restaurants.values()))
+        # The item furthest from expiry, so it stays listed for the whole run; updates replace it, so go by ID
+        self.counter_id = max(self.restaurant.get_available_items(), key=lambda item: item['expiry_ts'])['item_id']
+        self.restaurant.update_item_quantity(self.counter_id, 0)
+        self.service.register_user(SHARED_USER, 'Shared', 'Campus')
+
+    def record(self, name, value=1):
+        with self.lock:
+            current = getattr(self, name)
+            if isinstance(current, list):
+                current.extend(value)
+            else:
+                setattr(self, name, current + value)
+
+    def run(self, target, seed):
+        """Loop `target` until stopped, recording any exception it raises"""
+        rng = random.Random(seed)
+        client = self.module.app.test_client()
+        try:
+            state = target.setup(self, client, rng) if hasattr(target, 'setup') else None
+            while not self.stop.is_set():
+                target(self, client, rng, state)
+        except Exception as e:
+            with self.lock:
+                self.errors.append(f"{target.__name__}: {type(e).__name__}: {e}")
+
+
+def admin_writer(stress, client, rng, state):
+    """Add an item, bump the shared counter item, and delete one of our own items"""
+    response = client.post('/admin/api/add-item', json={
+        'name': 'Stress Tray', 'food_type': rng.choice(['asian', 'italian', 'bakery']),
+        'original_price': 200, 'quantity': 3, 'expiry_hours': 4
+    })
+    item_id = response.get_json()['item']['item_id']
+    state.append(item_id)
+    stress.record('added_ids', [item_id])
+
+    response = client.post('/admin/api/update-quantity',
+                           json={'item_id': stress.counter_id, 'change': 1})
+    if response.get_json()['success']:
+        stress.record('adjustments')
+
+    if len(state) > 5:
+        client.post('/admin/api/delete-item', json={'item_id': state.pop(rng.randrange(len(state)))})
+
+
+def _admin_login(stress, client, rng):
+    response = client.post('/admin/api/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.get_json()['success'], 'demo admin login failed'
+    return []
+
+
+admin_writer.setup = _admin_login
+
+
+def admin_registrant(stress, client, rng, state):
+    """Race the other registrants for the same usernames"""
+    username = rng.choice(CONTESTED_USERNAMES)
+    result = stress.service.register_admin(stress.restaurant.restaurant_id, username, f'{username}@cornell.edu', 'pw')
+    if result['success']:
+        with stress.lock:
+            stress.registrations[username] += 1
+
+
+def customer(stress, client, rng, state):
+    """Place a custom order and rate food on a user every customer shares"""
+    items = stress.data_manager.sample_available_items(2, rng=rng)
+    response = client.post('/api/custom-order', json={'selected_items': [item['item_id'] for item in items]})
+    stress.record('order_ids', [response.get_json()['order_id']])
+
+    stress.service.get_user(SHARED_USER).add_interaction('asian', 1)
+    stress.record('ratings')
+
+
+def _customer_login(stress, client, rng):
+    user_id = f"stress_user_{rng.random()}"
+    client.post('/api/register', json={'user_id': user_id, 'name': 'Stress', 'location': 'Campus'})
+    return None
+
+
+customer.setup = _customer_login
+
+
+def reader(stress, client, rng, state):
+    """Listing, sampling, admin-view and snapshot reads"""
+    snapshot = stress.data_manager.snapshot
+    held = snapshot.inventories[stress.restaurant.restaurant_id]
+    quantities = [item['quantity'] for item in held]
+
+    stress.data_manager.get_all_available_items()
+    stress.data_manager.sample_available_items(4, rng=rng)
+    stress.restaurant.get_inventory_copy()
+    for restaurant in stress.data_manager.restaurants.values():
+        restaurant.to_dict()
+
+    # One snapshot: its inventories and slot table list the same items, versions never go back,
+    # and the items it holds (the contested counter item among them) kept their quantities meanwhile
+    listed = {id(item) for items in snapshot.inventories.values() for item in items}
+    slotted = {id(entry[1]) for entry in snapshot.slots if entry is not None}
+    if (listed != slotted or len(listed) != snapshot.item_count or snapshot.version < state['version']
+            or [item['quantity'] for item in held] != quantities):
+        stress.record('torn_snapshots')
+    state['version'] = snapshot.version
+    stress.record('reads')
+
+
+reader.setup = lambda stress, client, rng: {'version': 0}
+
+
+def measure_reads(stress, threads, seconds):
+    """Reads per second from `threads` readers alone"""
+    stress.stop.clear()
+    workers = [threading.Thread(target=stress.run, args=(reader, idx)) for idx in range(threads)]
+    before = stress.reads
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stress.stop.set()
+    for worker in workers:
+        worker.join()
+    return (stress.reads - before) / seconds
+
+
+def run_mixed(stress, threads, seconds):
+    """All roles at once; returns reader throughput while writers run"""
+    roles = [admin_writer, admin_registrant, customer, reader]
+    stress.stop.clear()
+    workers = [threading.Thread(target=stress.run, args=(roles[idx % len(roles)], 1000 + idx))
+               for idx in range(threads)]
+    before = stress.reads
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stress.stop.set()
+    for worker in workers:
+        worker.join()
+    return (stress.reads - before) / seconds
+
+
+def check_invariants(stress, start_order_count):
+    service = stress.service
+    data_manager = stress.data_manager
+    data_manager.expiry_scheduler.run_pending()
+    results = []
+
+    def check(label, ok, detail=''):
+        print(f"{label:44} {'ok' if ok else 'FAIL'} {detail}")
+        results.append(ok)
+
+    check('no worker exceptions', not stress.errors, '; '.join(stress.errors[:3]))
+    check('order IDs unique', len(set(stress.order_ids)) == len(stress.order_ids), f"({len(stress.order_ids)} orders)")
+    check('every order recorded', len(service.orders) - start_order_count == len(stress.order_ids))
+    check('added item IDs unique', len(set(stress.added_ids)) == len(stress.added_ids), f"({len(stress.added_ids)} items)")
+    counter = stress.restaurant.get_item_by_id(stress.counter_id)['quantity']
+    check('no quantity update lost', counter == stress.adjustments, f"({counter} of {stress.adjustments})")
+    shared = service.get_user(SHARED_USER)
+    check('no rating lost', shared.get_preference_score('asian') == stress.ratings == len(shared.interaction_history),
+          f"({shared.get_preference_score('asian')} of {stress.ratings})")
+    duplicated = [name for name, count in stress.registrations.items() if count != 1]
+    check('contested usernames registered once', not duplicated and bool(stress.registrations), ', '.join(duplicated))
+    admin_ids = [admin.admin_id for admin in service.admins.values()]
+    check('admin IDs unique', len(set(admin_ids)) == len(admin_ids), f"({len(admin_ids)} admins)")
+
+    check('snapshots consistent', not stress.torn_snapshots, f"({stress.torn_snapshots} torn of {stress.reads} reads)")
+    held = sum(len(restaurant.surplus_inventory) for restaurant in data_manager.restaurants.values())
+    published = data_manager.snapshot.item_count
+    indexed = data_manager.food_type_index.count()
+    slotted = len(data_manager.item_table)
+    bucketed = sum(data_manager.get_urgency_counts().values())
+    check('indexes match inventory', held == published == indexed == slotted == bucketed,
+          f"(held {held}, snapshot {published}, food-type {indexed}, slots {slotted}, urgency {bucketed})")
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--restaurants', type=int, default=30)
+    args = parser.parse_args()
+
+    configure_logging(level='ERROR', stream=io.StringIO())
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+
+    app.data_manager.clear_inventory()
+    app.data_manager._populate_restaurants(generate_inventory(args.restaurants, args.items, seed=7))
+    app.bhookh_service.admins.clear()
+    app.bhookh_service._init_demo_admin()
+
+    stress = Stress(app, args.seconds)
+    start_order_count = len(app.bhookh_service.orders)
+    readers = max(1, args.threads // 4)
+
+    print(f"{args.threads} threads, {args.seconds}s, {args.items} items in {args.restaurants} restaurants\n")
+    read_only = measure_reads(stress, readers, args.seconds)
+    mixed = run_mixed(stress, args.threads, args.seconds)
+    ok = check_invariants(stress, start_order_count)
+    print(f"\nreads/s with {readers} readers: alone {read_only:.0f}, alongside writers {mixed:.0f}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Response compression and HTTP caching benchmark
+Requests the main page, the static scripts and the JSON endpoints a page
+load and admin inventory polling hit, from app.py with a synthetic
+inventory. Each is fetched three ways:
+- without Accept-Encoding (identity)
+- with gzip
+- as a conditional GET repeating the ETag from the gzip fetch
+
+For each, the script reports response size and server time, and the
+transfer time at --mbps. It exits non-zero if a body does not round-trip or
+a revalidation does not answer 304.
+
+Run: python benchmarks/http_cache_bench.py [--items 2000] [--mbps 5] [--repeat 20]
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_logging import configure_logging
+from synthetic_data import generate_inventory
+
+PATHS = ['/', '/static/app.js', '/static/admin.js', '/admin/api/inventory', '/api/expiring-soon?limit=200']
+
+
+def fetch(client, path, headers, repeat):
+    """(response, best server time in ms) over `repeat` requests"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return response, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--restaurants', type=int, default=30)
+    parser.add_argument('--mbps', type=float, default=5.0)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    configure_logging(level='ERROR', stream=io.StringIO())
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+
+    app.data_manager.clear_inventory()
+    app.data_manager._populate_restaurants(generate_inventory(args.restaurants, args.items, seed=7))
+    app.bhookh_service._init_demo_admin()
+    client = app.app.test_client()
+    response = client.post('/admin/api/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.get_json()['success'], 'demo admin login failed'
+
+    def wire_ms(size):
+        return size * 8 / (args.mbps * 1000)
+
+    ok = True
+    print(f"{args.items} items, {args.mbps} Mbit/s link, best of {args.repeat}\n")
+    print(f"{'path':30} {'mode':9} {'status':>6} {'bytes':>8} {'server ms':>10} {'wire ms':>8}")
+    for path in PATHS:
+        identity, identity_ms = fetch(client, path, {}, args.repeat)
+        compressed, compressed_ms = fetch(client, path, {'Accept-Encoding': 'gzip'}, args.repeat)
+        etag = compressed.headers.get('ETag')
+        revalidated, revalidated_ms = fetch(client, path, {'Accept-Encoding': 'gzip', 'If-None-Match': etag}, args.repeat)
+
+        body = compressed.data
+        if compressed.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        if body != identity.data or revalidated.status_code != 304:
+            ok = False
+            print(f"{path}: FAIL (round-trip {body == identity.data}, revalidation {revalidated.status_code})")
+
+        for mode, response, elapsed in (('identity', identity, identity_ms), ('gzip', compressed, compressed_ms),
+                                        ('304', revalidated, revalidated_ms)):
+            size = len(response.data)
+            print(f"{path:30} {mode:9} {response.status_code:>6} {size:>8} {elapsed:>10.2f} {wire_ms(size):>8.1f}")
+    stats = app.app.extensions['http_cache'].get_stats()
+    print(f"\ncompressed {stats['compressed']} responses to {stats['ratio']} of their size "
+          f"({stats['compressed_cache_hits']} from the compressed-body cache), {stats['not_modified']} answered 304")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+JSON response encoding benchmark
+Times encoding a /api/suggestions-shaped payload of many suggestions, each
+nesting a full listing, into response bytes with:
+- Flask's default provider (what jsonify() used before json_provider.py)
+- json_provider's stdlib encoder, without and with the listing cache (warm)
+- json_provider's orjson encoder, if orjson is installed
+
+It also checks that every encoder produces the same document, and exits
+non-zero if any does not.
+
+Run: python benchmarks/json_bench.py [--suggestions 1000] [--repeat 50]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from app_logging import configure_logging
+from config import Config
+from data_manager import DataManager
+from json_provider import FastJSONProvider, JSONCodec, resolve_backend
+from synthetic_data import generate_inventory
+
+
+def build_payload(data_manager, count):
+    """`count` suggestions shaped like app_enhanced's, over the first `count` listed items"""
+    listings = data_manager.get_all_available_items()[:count]
+    return [{
+        'item': item,
+        'score': 42,
+        'ai_reason': 'Matched to your preferences',
+        'discount_price': round(item['original_price'] * Config.DISCOUNT_RATE, 2)
+    } for item in listings]
+
+
+def time_ms(func, repeat):
+    func()  # warm up (and fill the listing cache)
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--suggestions', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    configure_logging(level='ERROR', stream=io.StringIO())
+    data_manager = DataManager()
+    data_manager._populate_restaurants(generate_inventory(30, max(args.suggestions, 100), seed=7))
+
+    data_manager.listing_sources = False
+    plain = build_payload(data_manager, args.suggestions)
+    data_manager.listing_sources = True
+    cacheable = build_payload(data_manager, args.suggestions)
+
+    app = Flask(__name__)
+    flask_default = app.json
+    candidates = [
+        ('flask default', lambda: flask_default.response(plain).get_data()),
+        ('stdlib', lambda codec=JSONCodec('stdlib', fragment_cache_size=0): codec.dumps(plain)),
+        ('stdlib + listing cache', lambda codec=JSONCodec('stdlib', fragment_cache_size=20000): codec.dumps(cacheable)),
+    ]
+    if resolve_backend('auto') == 'orjson':
+        codec = JSONCodec('orjson')
+        candidates.append(('orjson', lambda: codec.dumps(plain)))
+        provider = FastJSONProvider(app, codec)
+        candidates.append(('orjson via jsonify', lambda: provider.response(plain).get_data()))
+    else:
+        print('orjson not installed; skipping it\n')
+
+    expected = json.loads(flask_default.response(plain).get_data())
+    ok = True
+    with app.app_context():
+        print(f"{args.suggestions} suggestions, best of {args.repeat}\n")
+        print(f"{'encoder':24} {'ms':>8} {'speedup':>8} {'KB':>8}")
+        baseline = None
+        for label, encode in candidates:
+            elapsed = time_ms(encode, args.repeat)
+            baseline = baseline or elapsed
+            body = encode()
+            same = json.loads(body) == expected
+            ok = ok and same
+            print(f"{label:24} {elapsed:8.2f} {baseline / elapsed:7.1f}x {len(body) / 1024:8.0f}"
+                  f"{'' if same else '  DIFFERENT OUTPUT'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+End-to-end HTTP load test for app.py and app_enhanced.py
+Boots each app on a local threaded server against a synthetic inventory,
+replays a weighted mix of user and admin calls at rising concurrency and
+reports p50/p95/p99 latency and throughput. Results are saved as JSON.
+
+Run: python benchmarks/load_test.py --app both --items 10000 --restaurants 300 --users 500
+Compare: python benchmarks/load_test.py --compare old.json new.json
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from werkzeug.serving import make_server
+
+from app_logging import configure_logging
+from mock_llm_server import start_mock_server
+from synthetic_data import generate_inventory, generate_user_profile
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Relative weight of each operation in the replayed traffic
+USER_MIX = {
+    'register': 5,
+    'surprise_bag': 35,
+    'suggestions': 30,
+    'custom_order': 15,
+}
+ADMIN_MIX = {
+    'admin_inventory': 8,
+    'admin_add_item': 4,
+    'admin_update_quantity': 3,
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors, elapsed):
+    """Latency percentiles (ms) and throughput for one set of samples"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 2) if count else None,
+        'p95_ms': round(percentile(ordered, 95) * 1000, 2) if count else None,
+        'p99_ms': round(percentile(ordered, 99) * 1000, 2) if count else None,
+        'max_ms': round(ordered[-1] * 1000, 2) if count else None
+    }
+
+
+class AppUnderTest:
+    """One app module booted on a local threaded server with synthetic data"""
+
+    def __init__(self, module_name, inventory, llm_url):
+        self.module_name = module_name
+        self.module = importlib.import_module(module_name)
+
+        data_manager = self.module.data_manager
+        data_manager.clear_inventory()
+        data_manager._populate_restaurants(inventory)
+        if hasattr(self.module, 'claude_ai'):
+            self.module.claude_ai.api_url = llm_url
+        # Re-create the demo admin against the synthetic restaurants
+        service = self.module.bhookh_service
+        if hasattr(service, 'admins'):
+            service.admins.clear()
+            service._init_demo_admin()
+
+        self.item_ids = [item['item_id'] for item in inventory['food_items']]
+        self.restaurant_ids = [r['id'] for r in inventory['restaurants']]
+        self.has_admin = 'admin_api_login' in self.module.app.view_functions
+        self.server = make_server('127.0.0.1', 0, self.module.app, threaded=True)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+class LoadRunner:
+    """Replays the operation mix against an app at a given concurrency"""
+
+    def __init__(self, target, num_users, num_admins, seed):
+        self.target = target
+        self.rng = random.Random(seed)
+        self.mix = dict(USER_MIX)
+        if target.has_admin:
+            self.mix.update(ADMIN_MIX)
+        self.user_sessions = []
+        self.admin_sessions = []
+        self._registered = num_users
+        self._counter_lock = threading.Lock()
+        self._setup_users(num_users)
+        if target.has_admin:
+            self._setup_admins(num_admins)
+
+    def _setup_users(self, num_users):
+        for idx in range(num_users):
+            session = requests.Session()
+            session.post(f"{self.target.base_url}/api/register",
+                         json=generate_user_profile(idx, self.rng)).raise_for_status()
+            self.user_sessions.append(session)
+
+    def _setup_admins(self, num_admins):
+        for idx in range(num_admins):
+            session = requests.Session()
+            username = f"bench_admin_{idx}"
+            session.post(f"{self.target.base_url}/admin/api/register", json={
+                'restaurant_id': self.target.restaurant_ids[idx % len(self.target.restaurant_ids)],
+                'username': username,
+                'email': f"{username}@cornell.edu",
+                'password': 'bench-password'
+            })
+            session.post(f"{self.target.base_url}/admin/api/login",
+                         json={'username': username, 'password': 'bench-password'}).raise_for_status()
+            self.admin_sessions.append(session)
+
+    def run_level(self, concurrency, duration):
+        """Run the mix with `concurrency` clients for `duration` seconds"""
+        operations = list(self.mix)
+        weights = [self.mix[op] for op in operations]
+        samples = {op: [] for op in operations}
+        errors = {op: 0 for op in operations}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def worker(worker_idx):
+            rng = random.Random(worker_idx * 7919 + concurrency)
+            local = {op: [] for op in operations}
+            local_errors = {op: 0 for op in operations}
+            while time.perf_counter() < deadline:
+                op = rng.choices(operations, weights)[0]
+                start = time.perf_counter()
+                try:
+                    ok = getattr(self, f"_op_{op}")(rng)
+                except requests.RequestException:
+                    ok = False
+                local[op].append(time.perf_counter() - start)
+                if not ok:
+                    local_errors[op] += 1
+            with lock:
+                for op in operations:
+                    samples[op].extend(local[op])
+                    errors[op] += local_errors[op]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        all_latencies = [value for op in operations for value in samples[op]]
+        return {
+            'concurrency': concurrency,
+            'duration_s': round(elapsed, 2),
+            'overall': summarize(all_latencies, sum(errors.values()), elapsed),
+            'endpoints': {op: summarize(samples[op], errors[op], elapsed) for op in operations if samples[op]}
+        }
+
+    # ----- operations -----
+
+    def _op_register(self, rng):
+        with self._counter_lock:
+            self._registered += 1
+            idx = self._registered
+        session = requests.Session()
+        response = session.post(f"{self.target.base_url}/api/register",
+                                json=generate_user_profile(idx, rng))
+        if response.ok:
+            self.user_sessions.append(session)
+        return response.ok
+
+    def _op_surprise_bag(self, rng):
+        response = rng.choice(self.user_sessions).get(f"{self.target.base_url}/api/surprise-bag")
+        return response.ok
+
+    def _op_suggestions(self, rng):
+        response = rng.choice(self.user_sessions).post(
+            f"{self.target.base_url}/api/suggestions",
+            json={'mood': rng.choice(['happy', 'stressed', 'healthy', 'adventurous', 'tired', 'energetic'])}
+        )
+        return response.ok
+
+    def _op_custom_order(self, rng):
+        response = rng.choice(self.user_sessions).post(
+            f"{self.target.base_url}/api/custom-order",
+            json={'selected_items': rng.sample(self.target.item_ids, min(3, len(self.target.item_ids)))}
+        )
+        return response.ok
+
+    def _op_admin_inventory(self, rng):
+        response = rng.choice(self.admin_sessions).get(f"{self.target.base_url}/admin/api/inventory")
+        return response.ok
+
+    def _op_admin_add_item(self, rng):
+        response = rng.choice(self.admin_sessions).post(f"{self.target.base_url}/admin/api/add-item", json={
+            'name': 'Bench Leftover Tray',
+            'food_type': rng.choice(['american', 'healthy', 'italian', 'asian']),
+            'original_price': rng.randint(150, 350),
+            'quantity': rng.randint(1, 5),
+            'expiry_hours': rng.randint(1, 8)
+        })
+        return response.ok
+
+    def _op_admin_update_quantity(self, rng):
+        response = rng.choice(self.admin_sessions).post(
+            f"{self.target.base_url}/admin/api/update-quantity",
+            json={'item_id': rng.choice(self.target.item_ids), 'change': rng.choice([-1, 1])}
+        )
+        return response.ok
+
+
+def compare(old_path, new_path):
+    """Print p50/p95/p99 and throughput deltas between two saved runs"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    for app_name, new_app in new['apps'].items():
+        old_levels = {lvl['concurrency']: lvl for lvl in old['apps'].get(app_name, {}).get('levels', [])}
+        print(f"\n{app_name}")
+        print(f"  {'conc':>5} {'metric':>15} {'old':>10} {'new':>10} {'change':>8}")
+        for level in new_app['levels']:
+            before = old_levels.get(level['concurrency'])
+            if not before:
+                continue
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+                a, b = before['overall'][metric], level['overall'][metric]
+                change = f"{(b - a) / a * 100:+.1f}%" if a else 'n/a'
+                print(f"  {level['concurrency']:>5} {metric:>15} {a:>10} {b:>10} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end HTTP load test')
+    parser.add_argument('--app', choices=['app', 'app_enhanced', 'both'], default='both')
+    parser.add_argument('--items', type=int, default=1000, help='Synthetic food items (10 to 100000)')
+    parser.add_argument('--restaurants', type=int, default=30, help='Synthetic restaurants (30 to 3000)')
+    parser.add_argument('--users', type=int, default=200, help='Users registered before the run')
+    parser.add_argument('--admins', type=int, default=4)
+    parser.add_argument('--concurrency', default='1,4,16,64', help='Comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--llm-latency', default='lognormal:400:0.5', help='Mock LLM latency distribution')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/load_<timestamp>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two saved runs and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Per-request access logging would dominate the measurement
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    configure_logging(level='WARNING')
+
+    inventory = generate_inventory(args.restaurants, args.items, seed=args.seed)
+    llm_server, llm_url = start_mock_server(latency=args.llm_latency, error_rate=args.llm_error_rate,
+                                            seed=args.seed)
+    levels = [int(c) for c in args.concurrency.split(',')]
+    apps = ['app', 'app_enhanced'] if args.app == 'both' else [args.app]
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('compare', 'output')},
+        'apps': {}
+    }
+
+    for app_name in apps:
+        print(f"\n▶ {app_name}: {args.items} items, {args.restaurants} restaurants, {args.users} users")
+        target = AppUnderTest(app_name, inventory, llm_url)
+        runner = LoadRunner(target, args.users, args.admins, args.seed)
+        results = []
+        for concurrency in levels:
+            level = runner.run_level(concurrency, args.duration)
+            overall = level['overall']
+            print(f"  c={concurrency:<4} {overall['throughput_rps']:>8} req/s  "
+                  f"p50={overall['p50_ms']}ms p95={overall['p95_ms']}ms p99={overall['p99_ms']}ms "
+                  f"errors={overall['errors']}")
+            results.append(level)
+        target.shutdown()
+        report['apps'][app_name] = {'levels': results}
+
+    llm_server.shutdown()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"load_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Logging overhead benchmark
+Compares what a request thread pays for a synchronous print() against the
+queued structured logger when the output stream is slow, then measures the
+log volume and latency of the real suggestion path at each log level.
+
+Run: python benchmarks/logging_bench.py [--calls 2000] [--requests 300] [--write-delay-us 50]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_logging import configure_logging, flush_logging, get_logger
+from mock_llm_server import start_mock_server
+from synthetic_data import generate_inventory, generate_user_profile
+
+
+class SlowSink(io.TextIOBase):
+    """Text stream that counts output and stalls on every write like a congested pipe or terminal"""
+
+    def __init__(self, write_delay):
+        self.write_delay = write_delay
+        self.bytes = 0
+        self.lines = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if self.write_delay:
+            time.sleep(self.write_delay)
+        self.bytes += len(text.encode('utf-8'))
+        self.lines += text.count('\n')
+        return len(text)
+
+
+def per_call_us(func, calls):
+    start = time.perf_counter()
+    for idx in range(calls):
+        func(idx)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def bench_calls(calls, write_delay):
+    """Caller-side cost of one log line through each path"""
+    print(f"{'path':42} {'caller us/call':>15} {'lines out':>10}")
+    sink = SlowSink(write_delay)
+    with contextlib.redirect_stdout(sink):
+        cost = per_call_us(lambda idx: print(f"Filtered from 1000 to {idx} safe items for user"), calls)
+    print(f"{'print() to slow stdout':42} {cost:>15.2f} {sink.lines:>10}")
+
+    logger = get_logger('bench')
+    cases = [
+        ('logger.info, JSON via queue', 'INFO', 1, logger.info),
+        ('logger.debug, level INFO (disabled)', 'INFO', 1, logger.debug),
+        ('logger.debug, level DEBUG, 1-in-100', 'DEBUG', 100, logger.debug),
+        ('logger.debug, level DEBUG, unsampled', 'DEBUG', 1, logger.debug),
+    ]
+    for label, level, every, log in cases:
+        sink = SlowSink(write_delay)
+        configure_logging(level=level, fmt='json', stream=sink, debug_sample_every=every)
+        cost = per_call_us(lambda idx: log("Filtered safe items", extra={'available': 1000, 'safe': idx}), calls)
+        flush_logging()
+        print(f"{label:42} {cost:>15.2f} {sink.lines:>10}")
+
+
+def bench_requests(num_requests, write_delay):
+    """Log volume and latency of BhookhBusterService.get_ai_suggestions per log level"""
+    import app_enhanced
+
+    server, url = start_mock_server(latency='fixed:0')
+    app_enhanced.claude_ai.api_url = url
+    data_manager = app_enhanced.data_manager
+    data_manager.clear_inventory()
+    data_manager._populate_restaurants(generate_inventory(30, 1000, seed=7))
+    service = app_enhanced.bhookh_service
+
+    rng = random.Random(7)
+    user_ids = [service.register_user(**generate_user_profile(idx, rng)).user_id for idx in range(20)]
+
+    print(f"\n{'log config':30} {'bytes/req':>10} {'lines/req':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, level, every in [('INFO', 'INFO', 1), ('DEBUG 1-in-100', 'DEBUG', 100), ('DEBUG unsampled', 'DEBUG', 1)]:
+        sink = SlowSink(write_delay)
+        configure_logging(level=level, fmt='json', stream=sink, debug_sample_every=every)
+        latencies = []
+        for idx in range(num_requests):
+            start = time.perf_counter()
+            service.get_ai_suggestions(user_ids[idx % len(user_ids)], 'happy')
+            latencies.append(time.perf_counter() - start)
+        flush_logging()
+        latencies.sort()
+        print(f"{label:30} {sink.bytes / num_requests:>10.1f} {sink.lines / num_requests:>10.3f} "
+              f"{statistics.median(latencies) * 1000:>8.2f} "
+              f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>8.2f}")
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--write-delay-us', type=float, default=50,
+                        help='Simulated stall per write on the output stream')
+    args = parser.parse_args()
+
+    # Keep app start-up logs out of the measurement
+    configure_logging(level='WARNING', stream=io.StringIO())
+    write_delay = args.write_delay_us / 1e6
+    bench_calls(args.calls, write_delay)
+    bench_requests(args.requests, write_delay)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Micro-benchmarks for the core hot functions
+Times each function in isolation on seeded synthetic data and checks the
+results against stored baselines so regressions are caught before deploy.
+
+Run:    python benchmarks/microbench.py
+Update: python benchmarks/microbench.py --save-baseline
+Filter: python benchmarks/microbench.py -k filter_safe
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_logging import configure_logging
+from freshness import RequestClock
+from synthetic_data import generate_inventory, generate_user_profile
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'microbench.json')
+SEED = 1234
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark; the decorated function returns the callable to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _quiet_import(module_name):
+    """Import an app module without its start-up output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return __import__(module_name)
+
+
+def _build_data_manager(num_restaurants, num_items):
+    from data_manager import DataManager
+
+    data_manager = DataManager()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_manager._populate_restaurants(generate_inventory(num_restaurants, num_items, seed=SEED))
+    return data_manager
+
+
+def _bench_user(seed=SEED):
+    """A user with one restriction and one allergen so every filter branch runs"""
+    from models import User
+
+    profile = generate_user_profile(0, random.Random(seed))
+    profile.update(dietary_restrictions=['vegetarian'], allergens=['peanuts'],
+                   dietary_preferences=['healthy', 'asian'])
+    user = User(**profile)
+    user.add_interaction('italian', 4)
+    return user
+
+
+@benchmark('filter_safe_items_1k')
+def bench_filter_safe_items():
+    app_enhanced = _quiet_import('app_enhanced')
+    data_manager = _build_data_manager(30, 1000)
+    service = app_enhanced.BhookhBusterService(data_manager, app_enhanced.claude_ai)
+    items = data_manager.get_all_available_items()
+    user = _bench_user()
+    return lambda: service._filter_safe_items(items, user)
+
+
+@benchmark('calculate_item_score_1k_app')
+def bench_calculate_item_score_app():
+    app = _quiet_import('app')
+    data_manager = _build_data_manager(30, 1000)
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = app.BhookhBusterService(data_manager)
+    items = data_manager.get_all_available_items()
+    user = _bench_user()
+
+    def run():
+        clock = RequestClock()
+        return [service._calculate_item_score(item, user, 'happy', clock) for item in items]
+    return run
+
+
+@benchmark('calculate_item_score_1k_enhanced')
+def bench_calculate_item_score_enhanced():
+    app_enhanced = _quiet_import('app_enhanced')
+    data_manager = _build_data_manager(30, 1000)
+    service = app_enhanced.BhookhBusterService(data_manager, app_enhanced.claude_ai)
+    items = data_manager.get_all_available_items()
+    user = _bench_user()
+
+    def run():
+        clock = RequestClock()
+        return [service._calculate_item_score(item, user, 'happy', clock) for item in items]
+    return run
+
+
+@benchmark('restaurant_get_available_items_500')
+def bench_restaurant_get_available_items():
+    data_manager = _build_data_manager(1, 500)
+    restaurant = next(iter(data_manager.restaurants.values()))
+    return restaurant.get_available_items
+
+
+@benchmark('data_manager_get_all_available_items_10k')
+def bench_get_all_available_items():
+    data_manager = _build_data_manager(300, 10000)
+    return data_manager.get_all_available_items
+
+
+@benchmark('transform_for_bhookh_buster_300')
+def bench_transform_for_bhookh_buster():
+    from cornell_scraper_modular import CornellDiningScraper
+
+    scraper = CornellDiningScraper()
+    raw = {'data': {'eateries': [
+        {'name': f"{kind} {idx}", 'campusArea': {'descr': 'North Campus'}}
+        for idx, kind in enumerate(['Dining Room', 'Cafe', 'Grill', 'Market'] * 75)
+    ]}}
+
+    def run():
+        # Menu generation is random-based; reseed so every run does the same work
+        random.seed(SEED)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.transform_for_bhookh_buster(raw)
+    return run
+
+
+@benchmark('parse_claude_response_1k')
+def bench_parse_claude_response():
+    from claude_ai_service import ClaudeAIService
+
+    service = ClaudeAIService()
+    items = _build_data_manager(30, 1000).get_all_available_items()
+    rng = random.Random(SEED)
+    response = "```json\n" + json.dumps([
+        {'item_id': item['item_id'], 'score': rng.randint(10, 40), 'reason': 'Expiring soon and fits your mood'}
+        for item in rng.sample(items, 8)
+    ], indent=2) + "\n```"
+    return lambda: service._parse_claude_response(response, items)
+
+
+def measure(func, repeat):
+    """Best-of-`repeat` time per call in microseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for hot functions')
+    parser.add_argument('-k', dest='pattern', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--tolerance', type=float, default=0.30,
+                        help='Allowed slowdown vs. baseline before failing (0.30 = 30%%)')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    args = parser.parse_args()
+    configure_logging(level='WARNING')
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results_us', {})
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':45} {'time':>12} {'baseline':>12} {'change':>8}")
+    for name, setup in BENCHMARKS.items():
+        if args.pattern and args.pattern not in name:
+            continue
+        random.seed(SEED)
+        func = setup()
+        results[name] = round(measure(func, args.repeat), 2)
+
+        reference = baseline.get(name)
+        change = ''
+        if reference and not args.save_baseline:
+            # Re-measure apparent regressions to rule out noise from other processes
+            for _ in range(2):
+                if results[name] / reference - 1 <= args.tolerance:
+                    break
+                results[name] = min(results[name], round(measure(func, args.repeat), 2))
+        if reference:
+            ratio = results[name] / reference - 1
+            change = f"{ratio * 100:+.1f}%"
+            if ratio > args.tolerance:
+                regressions.append(name)
+                change += ' ✗'
+        print(f"{name:45} {results[name]:>10.1f}us {reference or '-':>10}{'us' if reference else '  '} {change:>8}")
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results_us': merged
+            }, f, indent=2, sort_keys=True)
+        print(f"\n✓ Baseline saved to {args.baseline}")
+        return
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✓ No regressions")
+
+
+if __name__ == '__main__':
+    main()
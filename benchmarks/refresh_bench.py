@@ -0,0 +1,113 @@
+"""
+/api/refresh-data burst benchmark
+Sends --requests refresh POSTs from --clients clients at once to
+app_enhanced, with the Cornell API fetch replaced by a sleep of
+--fetch-delay seconds returning a synthetic inventory, and reports:
+- synchronous: every request scraping and rebuilding in its own request
+  thread, as the endpoint did before refresh_jobs.py
+- jobs: the endpoint as it is, coalescing requests onto one in-flight job
+  and rate limiting new ones (202 or 429 at once)
+
+For each, the script reports how many scrapes ran, the request latency,
+and the wall time until every scrape finished. It exits non-zero if a job
+did not finish or the inventory is not the fetched one afterwards.
+
+Run: python benchmarks/refresh_bench.py [--clients 8] [--requests 64] [--fetch-delay 0.5]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_logging import configure_logging
+from synthetic_data import generate_inventory
+
+
+def run_burst(count, workers, send):
+    """(latencies in ms, responses) for `count` calls of send(i) from `workers` threads at once"""
+    barrier = threading.Barrier(workers)
+
+    def timed(i):
+        if i < workers:
+            barrier.wait()
+        start = time.perf_counter()
+        response = send(i)
+        return (time.perf_counter() - start) * 1000, response
+
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(timed, range(count)))
+    return [elapsed for elapsed, _ in results], [response for _, response in results]
+
+
+def report(label, scrapes, latencies, wall):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:12} {scrapes:>8} {statistics.median(latencies):>10.1f} {p95:>10.1f} {wall:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--fetch-delay', type=float, default=0.5)
+    parser.add_argument('--items', type=int, default=2000)
+    args = parser.parse_args()
+
+    configure_logging(level='ERROR', stream=io.StringIO())
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app_enhanced
+
+    data_manager = app_enhanced.data_manager
+    data = generate_inventory(30, args.items, seed=7)
+    scrapes = []
+
+    def fake_fetch():
+        time.sleep(args.fetch_delay)
+        scrapes.append(time.perf_counter())
+        return data
+
+    data_manager._fetch_fresh_data = fake_fetch
+    data_manager._populate_restaurants(data)
+    app_enhanced.startup.state = 'ready'  # the inventory is in; keep the loader from loading over it
+
+    print(f"{args.requests} refresh requests from {args.clients} clients, fetch takes {args.fetch_delay}s\n")
+    print(f"{'mode':12} {'scrapes':>8} {'p50 ms':>10} {'p95 ms':>10} {'wall s':>9}")
+
+    start = time.perf_counter()
+    latencies, _ = run_burst(args.requests, args.clients, lambda i: data_manager.refresh_data())
+    report('synchronous', len(scrapes), latencies, time.perf_counter() - start)
+
+    scrapes.clear()
+    clients = [app_enhanced.app.test_client() for _ in range(args.clients)]
+    local = threading.local()
+
+    def post(i):
+        if not hasattr(local, 'client'):
+            local.client = clients.pop()
+        return local.client.post('/api/refresh-data', environ_base={'REMOTE_ADDR': f'10.0.0.{i % args.clients}'})
+
+    start = time.perf_counter()
+    latencies, responses = run_burst(args.requests, args.clients, post)
+    jobs = {response.get_json()['job_id'] for response in responses if response.status_code == 202}
+    finished = all(app_enhanced.refresh_jobs.get(job_id).wait(60) for job_id in jobs)
+    report('jobs', len(scrapes), latencies, time.perf_counter() - start)
+
+    statuses = {}
+    for response in responses:
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    print(f"\nstatuses {statuses}, {len(jobs)} jobs; {app_enhanced.refresh_jobs.get_stats()}")
+    ok = finished and data_manager.snapshot.item_count == len(data['food_items'])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Startup benchmark for app.py and app_enhanced.py
+Boots each app in a fresh process and measures, from process launch:
+- import: how long `import app` takes (interpreter start excluded)
+- first answer: until /readyz answers at all, so the worker accepts traffic
+- ready: until /readyz answers 200, with the dining data loaded
+
+Each app boots two ways: background loading through create_app(), and
+eager loading, create_app(wait=True) before serving, as every import did
+before. --load-delay adds a sleep to the data load, standing in for the
+Cornell API fetch (10s timeouts) that runs when there is no saved data
+file. Reports medians over --runs boots.
+
+Run: python benchmarks/startup_bench.py [--runs 5] [--apps app,app_enhanced] [--load-delay 0]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMPORT_SNIPPET = (
+    "import contextlib, io, time\n"
+    "start = time.perf_counter()\n"
+    "with contextlib.redirect_stdout(io.StringIO()):\n"
+    "    import {module}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(module_name, port, eager, load_delay):
+    """Child process: boot one app and serve it until killed"""
+    import importlib
+    import logging
+
+    from werkzeug.serving import make_server
+
+    from app_logging import configure_logging
+
+    configure_logging(level='ERROR')
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    module = importlib.import_module(module_name)
+    if load_delay:
+        load = module.data_manager.load_dining_data
+
+        def slow_load():
+            time.sleep(load_delay)
+            return load()
+        module.data_manager.load_dining_data = slow_load
+    app = module.create_app(wait=eager)
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def probe(url):
+    """HTTP status of `url`, or None if nothing is listening yet"""
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return None
+
+
+def boot_once(module_name, eager, load_delay):
+    """(seconds to first answer, seconds to ready) for one boot"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/readyz"
+    args = [sys.executable, os.path.abspath(__file__), '--serve', module_name, '--port', str(port),
+            '--load-delay', str(load_delay)]
+    if eager:
+        args.append('--eager')
+    start = time.perf_counter()
+    process = subprocess.Popen(args, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first = None
+    try:
+        deadline = start + 120
+        while time.perf_counter() < deadline:
+            status = probe(url)
+            if status is not None and first is None:
+                first = time.perf_counter() - start
+            if status == 200:
+                return first, time.perf_counter() - start
+            time.sleep(0.005)
+        raise RuntimeError(f"{module_name} did not become ready")
+    finally:
+        process.kill()
+        process.wait()
+
+
+def import_once(module_name):
+    output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET.format(module=module_name)], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--apps', default='app,app_enhanced')
+    parser.add_argument('--load-delay', type=float, default=0.0)
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--eager', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.eager, args.load_delay)
+        return
+
+    print(f"median of {args.runs} boots, seconds from process launch, load delay {args.load_delay}s\n")
+    print(f"{'app':14} {'loading':11} {'import':>8} {'first answer':>13} {'ready':>8}")
+    for module_name in args.apps.split(','):
+        imported = statistics.median(import_once(module_name) for _ in range(args.runs))
+        for eager in (False, True):
+            boots = [boot_once(module_name, eager, args.load_delay) for _ in range(args.runs)]
+            first = statistics.median(boot[0] for boot in boots)
+            ready = statistics.median(boot[1] for boot in boots)
+            label = 'eager' if eager else 'background'
+            print(f"{module_name:14} {label:11} {imported:8.3f} {first:13.3f} {ready:8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Time-to-first-suggestion benchmark for streamed Claude recommendations
+Runs ClaudeAIService against the local mock LLM server and compares
+streamed vs. blocking suggestion latency. A stream whose first suggestion
+misses Config.AI_SUGGESTION_BUDGET_MS serves local scoring instead.
+
+Run: python benchmarks/stream_ttfs.py [--runs 10] [--token-delay-ms 15] [--latency fixed:100]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from claude_ai_service import ClaudeAIService
+from config import Config
+from mock_llm_server import start_mock_server
+from models import User
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--token-delay-ms', type=float, default=15)
+    parser.add_argument('--latency', default='fixed:100', help='Mock LLM time before the first token')
+    args = parser.parse_args()
+
+    expiry = (datetime.now() + timedelta(hours=3)).isoformat()
+    items = [
+        {'item_id': f'R001_F{idx:03d}', 'name': f'Item {idx}', 'food_type': 'healthy',
+         'original_price': 200, 'expiry': expiry, 'restaurant': 'Fake Hall',
+         'restaurant_location': 'North Campus'}
+        for idx in range(8)
+    ]
+    user = User('U_BENCH', 'Bench', 'North Campus', ['healthy'])
+
+    server, url = start_mock_server(latency=args.latency, token_delay_ms=args.token_delay_ms)
+    service = ClaudeAIService()
+    service.api_url = url
+    prompt = service._build_recommendation_prompt(
+        service._build_user_profile(user), service._prepare_items_for_claude(items, user), None, None
+    )
+
+    first, full_stream, blocking = [], [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        for idx, _suggestion in enumerate(service.stream_personalized_suggestions(user, items)):
+            if idx == 0:
+                first.append(time.perf_counter() - start)
+        full_stream.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        response = service._call_claude_api(prompt)
+        service._parse_claude_response(response, items)
+        blocking.append(time.perf_counter() - start)
+
+    # Streams that missed the budget are closed by their budget worker once its current read returns
+    service._budget_executor.shutdown(wait=True)
+    server.shutdown()
+
+    def ms(values):
+        return f"{statistics.median(values) * 1000:8.1f} ms"
+
+    print(f"Runs: {args.runs}, latency: {args.latency}, token delay: {args.token_delay_ms} ms")
+    print(f"  streamed, first suggestion : {ms(first)}")
+    print(f"  streamed, all suggestions  : {ms(full_stream)}")
+    print(f"  blocking, all suggestions  : {ms(blocking)}")
+    print(f"  service stream stats       : {service.get_stream_stats()}")
+    print(f"  over the first-suggestion budget ({Config.AI_SUGGESTION_BUDGET_MS} ms): "
+          f"{service.get_circuit_stats()['budget_exceeded']}")
+
+
+if __name__ == '__main__':
+    main()
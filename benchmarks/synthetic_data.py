@@ -0,0 +1,86 @@
+"""
+Synthetic inventory and user generators for benchmarks
+Produces data in the same shape as CornellDiningScraper.transform_for_bhookh_buster
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from config import Config
+
+MENU = [
+    ('Pasta Station Special', 'italian', 280),
+    ('Stir Fry Bowl', 'asian', 250),
+    ('Salad Bar Selection', 'healthy', 200),
+    ('Sandwich Station', 'american', 220),
+    ('Pizza Slice', 'italian', 180),
+    ('Veggie Burger', 'vegetarian', 190),
+    ('Chicken Wrap', 'american', 240),
+    ('Rice Bowl', 'asian', 230),
+    ('Pastry Selection', 'bakery', 120),
+    ('Mac and Cheese', 'comfort-food', 210),
+    ('Spicy Tofu Curry', 'spicy', 260),
+    ('Grilled Salmon Plate', 'high-protein', 340),
+    ('Fruit Cup', 'light-meals', 140),
+    ('Peanut Noodle Bowl', 'asian', 250),
+    ('Egg and Cheese Bagel', 'american', 170),
+    ('Shrimp Fried Rice', 'asian', 290),
+    ('Bacon Breakfast Sandwich', 'american', 210),
+    ('Vegan Buddha Bowl', 'vegan', 270),
+]
+
+CUISINES = ['Dining Hall', 'Cafe', 'American', 'Market']
+RESTRICTIONS = ['vegetarian', 'vegan', 'gluten-free', 'dairy-free', 'pescatarian', 'halal', 'kosher']
+ALLERGENS = ['peanuts', 'tree-nuts', 'milk', 'eggs', 'soy', 'wheat', 'fish', 'shellfish', 'sesame']
+
+
+def generate_inventory(num_restaurants=30, num_items=150, seed=42, now=None):
+    """Generate restaurants and food items with expiries spread over the next 10 hours"""
+    rng = random.Random(seed)
+    now = now or datetime.now()
+
+    restaurants = [
+        {
+            'id': f"R{idx + 1:03d}",
+            'name': f"Synthetic Hall {idx + 1}",
+            'location': rng.choice(Config.CORNELL_LOCATIONS),
+            'cuisine_type': rng.choice(CUISINES)
+        }
+        for idx in range(num_restaurants)
+    ]
+
+    food_items = []
+    for idx in range(num_items):
+        restaurant = restaurants[idx % num_restaurants]
+        name, food_type, price = rng.choice(MENU)
+        food_items.append({
+            'restaurant_id': restaurant['id'],
+            'item_id': f"{restaurant['id']}_F{idx // num_restaurants + 1:05d}",
+            'name': name,
+            'food_type': food_type,
+            'original_price': price + rng.randint(-20, 50),
+            'expiry': (now + timedelta(minutes=rng.randint(30, 600))).isoformat(),
+            'quantity': rng.randint(1, 5)
+        })
+
+    return {
+        'restaurants': restaurants,
+        'food_items': food_items,
+        'timestamp': now.isoformat()
+    }
+
+
+def generate_user_profile(idx, rng):
+    """Generate a registration payload with a realistic mix of restrictions and allergens"""
+    return {
+        'user_id': f"U_BENCH_{idx:06d}",
+        'name': f"Bench User {idx}",
+        'location': rng.choice(Config.CORNELL_LOCATIONS),
+        'dietary_preferences': rng.sample(Config.DIETARY_PREFERENCES, rng.randint(0, 2)),
+        # Most students have no restrictions; a few share common ones
+        'dietary_restrictions': rng.sample(RESTRICTIONS, 1) if rng.random() < 0.3 else [],
+        'allergens': rng.sample(ALLERGENS, 1) if rng.random() < 0.2 else [],
+        'food_categories': [],
+        'quick_preferences': [],
+        'dislikes': []
+    }
@@ -0,0 +1,165 @@
+"""
+Circuit breaker for outbound calls
+Tracks errors and slow calls over a rolling window and short-circuits when unhealthy
+"""
+
+import threading
+import time
+from collections import deque
+
+from config import Config
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker.
+
+    The circuit opens when, over the last `window_seconds`, at least `min_calls`
+    calls were made and either the error rate or the slow-call rate crosses its
+    threshold. After `open_seconds` a single trial call is let through
+    (half-open); its outcome decides whether the circuit closes again.
+
+    allow_request() hands each call a ticket to report its outcome with, so a
+    call started before the circuit opened cannot decide the trial, and one
+    started before it last closed does not count against the new window. A
+    call that ends without an outcome must release() its ticket; a trial that
+    reports nothing within `trial_timeout_seconds` is given up on regardless.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, window_seconds=None, min_calls=None, error_rate_threshold=None,
+                 slow_call_ms=None, slow_call_rate_threshold=None, open_seconds=None, trial_timeout_seconds=None):
+        self.name = name
+        self.window_seconds = window_seconds or Config.AI_BREAKER_WINDOW_SECONDS
+        self.min_calls = min_calls or Config.AI_BREAKER_MIN_CALLS
+        self.error_rate_threshold = error_rate_threshold or Config.AI_BREAKER_ERROR_RATE
+        self.slow_call_seconds = (slow_call_ms or Config.AI_BREAKER_SLOW_CALL_MS) / 1000.0
+        self.slow_call_rate_threshold = slow_call_rate_threshold or Config.AI_BREAKER_SLOW_CALL_RATE
+        self.open_seconds = open_seconds or Config.AI_BREAKER_OPEN_SECONDS
+        self.trial_timeout_seconds = trial_timeout_seconds or Config.AI_REQUEST_TIMEOUT_SECONDS
+
+        self._lock = threading.Lock()
+        self._calls = deque()  # (timestamp, failed, slow)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._issued = 0  # tickets handed out; a ticket is its call's sequence number
+        self._closed_since = 1  # first ticket of the current closed period
+        self._trial = None  # ticket of the half-open trial call in flight
+        self._trial_started = 0.0
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self):
+        """Current state, moving from open to half-open once the cool-down has passed"""
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def allow_request(self):
+        """Return a ticket for record_success/record_failure if a call may proceed, None if it should short-circuit"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if (state == self.HALF_OPEN and self._trial is not None
+                    and now - self._trial_started >= self.trial_timeout_seconds):
+                # The trial never reported back; let another call try
+                self._trial = None
+            if state == self.CLOSED or (state == self.HALF_OPEN and self._trial is None):
+                self._issued += 1
+                if state == self.HALF_OPEN:
+                    self._trial = self._issued
+                    self._trial_started = now
+                return self._issued
+            self._rejected += 1
+            return None
+
+    def record_success(self, ticket, latency):
+        """Record a completed call, by its allow_request() ticket, and its latency in seconds"""
+        self._record(ticket, failed=False, latency=latency)
+
+    def record_failure(self, ticket, latency):
+        """Record a failed call, by its allow_request() ticket, and its latency in seconds"""
+        self._record(ticket, failed=True, latency=latency)
+
+    def release(self, ticket):
+        """Give back a ticket whose call ended without an outcome (never made, or cancelled)"""
+        with self._lock:
+            if ticket == self._trial:
+                self._trial = None
+
+    def get_stats(self):
+        """Return the breaker state and rolling-window rates"""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            total = len(self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slow = sum(1 for _, _, is_slow in self._calls if is_slow)
+            return {
+                'name': self.name,
+                'state': self._current_state(now),
+                'window_calls': total,
+                'error_rate': round(failures / total, 3) if total else 0.0,
+                'slow_call_rate': round(slow / total, 3) if total else 0.0,
+                'rejected': self._rejected,
+                'times_opened': self._times_opened
+            }
+
+    def _record(self, ticket, failed, latency):
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            state = self._current_state(now)
+            if state == self.HALF_OPEN:
+                if ticket != self._trial:
+                    # A call from before the circuit opened; only the trial decides
+                    return
+                self._trial = None
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._state = self.CLOSED
+                    self._closed_since = self._issued + 1
+                    self._calls.clear()
+                return
+            if state == self.OPEN or ticket < self._closed_since:
+                # Started before the circuit opened (or before it last closed); that period is judged
+                return
+
+            self._calls.append((now, failed, slow))
+            self._prune(now)
+            if state == self.CLOSED and self._should_open():
+                self._open(now)
+
+    def _should_open(self):
+        total = len(self._calls)
+        if total < self.min_calls:
+            return False
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        slow = sum(1 for _, _, is_slow in self._calls if is_slow)
+        return (failures / total >= self.error_rate_threshold
+                or slow / total >= self.slow_call_rate_threshold)
+
+    def _open(self, now):
+        self._state = self.OPEN
+        self._opened_at = now
+        self._trial = None
+        self._times_opened += 1
+        self._calls.clear()
+
+    def _current_state(self, now):
+        if self._state == self.OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def _prune(self, now):
+        cutoff = now - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
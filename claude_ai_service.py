@@ -3,9 +3,36 @@ Claude AI Service for Bhookh Buster
 Provides intelligent food recommendations using Claude API
 """
 
+import asyncio
 import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 
+from ai_batcher import AIRequestBatcher
+from app_logging import get_logger
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from config import Config
+from freshness import URGENT, RequestClock
+from metrics import registry, timed, track
+from prompt_builder import encode_items_table, rank_items, select_within_budget
+from stream_parser import IncrementalJSONArrayParser
+
+logger = get_logger('claude_ai')
+
+# Returned by _parse_stream_line at the end of a streamed message
+_STREAM_END = object()
+
+MEAL_INSIGHTS_FALLBACK = {
+    "nutritional_overview": "Analysis unavailable",
+    "balance_score": 7,
+    "balance_assessment": "Your selection looks good!",
+    "suggestion": None
+}
+
 
 class ClaudeAIService:
     """
@@ -13,10 +40,29 @@ class ClaudeAIService:
     """
     
     def __init__(self):
-        self.api_url = "https://api.anthropic.com/v1/messages"
+        if Config.USE_MOCK_LLM:
+            self.api_url = f"http://{Config.MOCK_LLM_HOST}:{Config.MOCK_LLM_PORT}/v1/messages"
+        else:
+            self.api_url = Config.CLAUDE_API_URL
         self.model = "claude-sonnet-4-20250514"
+        self.batcher = AIRequestBatcher(self._call_claude_api) if Config.AI_BATCHING_ENABLED else None
+        self.breaker = CircuitBreaker('claude_api')
+        self._budget_executor = ThreadPoolExecutor(
+            max_workers=Config.AI_BUDGET_WORKERS,
+            thread_name_prefix='ai-budget'
+        )
+        # One slot per budget worker: when every worker is busy, local scoring is served instead of queueing
+        self._budget_slots = threading.BoundedSemaphore(Config.AI_BUDGET_WORKERS)
+        # Updated from request threads, budget workers and the event loop alike
+        self.budget_stats = {'ai_served': 0, 'budget_exceeded': 0, 'short_circuited': 0, 'workers_busy': 0}
+        self.stream_stats = {'streams': 0, 'total_ttfs_ms': 0.0, 'last_ttfs_ms': None, 'fallbacks': 0}
+        self._stats_lock = threading.Lock()
+        # asyncio side (app_asgi.py): one pooled httpx client, identical in-flight prompts share a call
+        self._async_client = None
+        self._async_inflight = {}
+        self._async_background = set()
     
-    def get_personalized_suggestions(self, user, available_items, mood=None, context=None):
+    def get_personalized_suggestions(self, user, available_items, mood=None, context=None, clock=None):
         """
         Get personalized food suggestions using Claude AI
         
@@ -25,32 +71,175 @@ class ClaudeAIService:
             available_items: List of available food items
             mood: User's current mood (optional)
             context: Additional context like time of day, weather (optional)
+            clock: RequestClock shared with the rest of the request (optional)
         
         Returns:
             List of suggested items with explanations
+        
+        Suggestions are returned within Config.AI_SUGGESTION_BUDGET_MS: the AI
+        result is used only if it arrives in time, otherwise local scoring is served.
+        When every budget worker is busy, local scoring is served at once.
         """
         
-        # Prepare user profile for Claude
-        user_profile = self._build_user_profile(user)
+        clock = clock or RequestClock()
         
-        # Prepare food items data
-        items_data = self._prepare_items_for_claude(available_items)
+        # Skip prompt building entirely while the AI endpoint is unhealthy
+        if self.breaker.state == CircuitBreaker.OPEN:
+            self._count(self.budget_stats, 'short_circuited')
+            return self._fallback_recommendations(available_items, user, clock)
         
-        # Build the prompt for Claude
-        prompt = self._build_recommendation_prompt(user_profile, items_data, mood, context)
+        if not self._take_budget_worker():
+            return self._fallback_recommendations(available_items, user, clock)
+        future = self._run_on_budget_worker(
+            self._fetch_ai_suggestions, user, available_items, mood, context, clock
+        )
         
         try:
-            # Make API call to Claude
-            response = self._call_claude_api(prompt)
-            
-            # Parse and return suggestions
-            suggestions = self._parse_claude_response(response, available_items)
+            suggestions = future.result(timeout=Config.AI_SUGGESTION_BUDGET_MS / 1000.0)
+            self._count(self.budget_stats, 'ai_served')
             return suggestions
-            
+        except FutureTimeoutError:
+            # A call not started yet is dropped; one already running finishes so the breaker sees its outcome
+            future.cancel()
+            self._count(self.budget_stats, 'budget_exceeded')
+            return self._fallback_recommendations(available_items, user, clock)
+        except CircuitOpenError:
+            self._count(self.budget_stats, 'short_circuited')
+            return self._fallback_recommendations(available_items, user, clock)
         except Exception as e:
-            print(f"Error getting Claude recommendations: {e}")
+            logger.warning("Error getting Claude recommendations", extra={'error': str(e)})
             # Fallback to basic recommendations
-            return self._fallback_recommendations(available_items, user)
+            return self._fallback_recommendations(available_items, user, clock)
+    
+    def _take_budget_worker(self):
+        """Reserve a budget worker; False (counted as workers_busy) when every one is taken"""
+        if self._budget_slots.acquire(blocking=False):
+            return True
+        self._count(self.budget_stats, 'workers_busy')
+        return False
+    
+    def _run_on_budget_worker(self, fn, *args):
+        """Run fn on the worker reserved by _take_budget_worker; the reservation ends with the call or its cancellation"""
+        future = self._budget_executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self._budget_slots.release())
+        return future
+    
+    def _fetch_ai_suggestions(self, user, available_items, mood, context, clock):
+        """Build the prompt, call Claude and parse the suggestions"""
+        
+        # Build the prompt for Claude
+        prompt = self._suggestion_prompt(user, available_items, mood, context, clock)
+        
+        # Make API call to Claude
+        response = self._request_completion('suggestions', prompt)
+        
+        # Parse and return suggestions
+        return self._parse_claude_response(response, available_items)
+    
+    def _suggestion_prompt(self, user, available_items, mood, context, clock):
+        """User profile and pre-ranked items rendered into the recommendation prompt"""
+        user_profile = self._build_user_profile(user)
+        items_data = self._prepare_items_for_claude(available_items, user, mood, clock)
+        return self._build_recommendation_prompt(user_profile, items_data, mood, context, clock)
+    
+    def stream_personalized_suggestions(self, user, available_items, mood=None, context=None, clock=None):
+        """
+        Stream personalized suggestions as Claude generates them
+        
+        Args:
+            user: User object with preferences and history
+            available_items: List of available food items
+            mood: User's current mood (optional)
+            context: Additional context like time of day, weather (optional)
+            clock: RequestClock shared with the rest of the request (optional)
+        
+        Yields:
+            Suggestion dicts, each as soon as its JSON object is complete
+        
+        The first suggestion must arrive within Config.AI_SUGGESTION_BUDGET_MS,
+        otherwise local scoring is streamed instead and the AI stream is no longer
+        read. The AI call runs on a budget worker; when every one is busy, local
+        scoring is streamed at once.
+        """
+        clock = clock or RequestClock()
+        if not self._take_budget_worker():
+            yield from self._fallback_recommendations(available_items, user, clock)
+            return
+        ticket = self.breaker.allow_request()
+        if ticket is None:
+            self._budget_slots.release()
+            self._count(self.budget_stats, 'short_circuited')
+            yield from self._fallback_recommendations(available_items, user, clock)
+            return
+        
+        try:
+            prompt = self._suggestion_prompt(user, available_items, mood, context, clock)
+        except BaseException:
+            self.breaker.release(ticket)
+            self._budget_slots.release()
+            raise
+        items_dict = {item['item_id']: item for item in available_items}
+        
+        start = time.monotonic()
+        received = queue.Queue()
+        stop = threading.Event()
+        future = self._run_on_budget_worker(self._pump_suggestion_stream, ticket, prompt, items_dict, received, stop, start)
+        deadline = start + Config.AI_SUGGESTION_BUDGET_MS / 1000.0
+        emitted = 0
+        try:
+            while True:
+                try:
+                    # Only the first suggestion is held to the budget
+                    received_item = received.get(timeout=max(0.0, deadline - time.monotonic()) if emitted == 0 else None)
+                except queue.Empty:
+                    # Over budget: the worker stops reading the AI stream, or never starts it
+                    self._count(self.budget_stats, 'budget_exceeded')
+                    stop.set()
+                    if future.cancel():
+                        self.breaker.release(ticket)
+                    break
+                if received_item is _STREAM_END or isinstance(received_item, Exception):
+                    break
+                if emitted == 0:
+                    self._record_time_to_first_suggestion(time.monotonic() - start)
+                emitted += 1
+                yield received_item
+        except GeneratorExit:
+            # Client went away mid-stream; the worker stops reading the AI stream
+            stop.set()
+            raise
+        
+        if emitted == 0:
+            self._count(self.stream_stats, 'fallbacks')
+            yield from self._fallback_recommendations(available_items, user, clock)
+    
+    def _pump_suggestion_stream(self, ticket, prompt, items_dict, received, stop, start):
+        """
+        Run a streaming Claude call, putting each suggestion on `received` as it
+        completes, then _STREAM_END (or the exception the call failed with)
+        """
+        parser = IncrementalJSONArrayParser()
+        stream = self._stream_claude_api(prompt)
+        try:
+            for text in stream:
+                for rec in parser.feed(text):
+                    suggestion = self._map_recommendation(rec, items_dict)
+                    if suggestion is not None:
+                        received.put(suggestion)
+                if stop.is_set():
+                    # Nobody is reading any more; report the call with the time it has taken so far
+                    break
+        except Exception as e:
+            self.breaker.record_failure(ticket, time.monotonic() - start)
+            logger.warning("Error streaming Claude recommendations", extra={'error': str(e)})
+            received.put(e)
+            return
+        finally:
+            stream.close()
+        
+        self.breaker.record_success(ticket, time.monotonic() - start)
+        registry.operation_latency.observe(time.monotonic() - start, ('llm_stream',))
+        received.put(_STREAM_END)
     
     def get_meal_insights(self, user, selected_items):
         """
@@ -64,7 +253,18 @@ class ClaudeAIService:
             Dictionary with insights and suggestions
         """
         
-        prompt = f"""Analyze this meal selection for a student at Cornell University:
+        prompt = self._meal_insights_prompt(user, selected_items)
+        
+        try:
+            response = self._request_completion('meal_insights', prompt)
+            insights = json.loads(response.strip())
+            return insights
+        except Exception as e:
+            logger.warning("Error getting meal insights", extra={'error': str(e)})
+            return dict(MEAL_INSIGHTS_FALLBACK)
+    
+    def _meal_insights_prompt(self, user, selected_items):
+        return f"""Analyze this meal selection for a student at Cornell University:
 
 User Profile:
 - Dietary preferences: {', '.join(user.dietary_preferences) if user.dietary_preferences else 'None specified'}
@@ -87,19 +287,6 @@ Respond in JSON format:
 }}
 
 IMPORTANT: Your response must be ONLY valid JSON. Do not include any text outside the JSON structure."""
-        
-        try:
-            response = self._call_claude_api(prompt)
-            insights = json.loads(response.strip())
-            return insights
-        except Exception as e:
-            print(f"Error getting meal insights: {e}")
-            return {
-                "nutritional_overview": "Analysis unavailable",
-                "balance_score": 7,
-                "balance_assessment": "Your selection looks good!",
-                "suggestion": None
-            }
     
     def generate_food_waste_impact(self, num_items_saved, total_cost_saved):
         """
@@ -113,7 +300,17 @@ IMPORTANT: Your response must be ONLY valid JSON. Do not include any text outsid
             Motivational message about impact
         """
         
-        prompt = f"""Generate a brief, encouraging message (2-3 sentences) about the positive impact of saving {num_items_saved} food items worth ${total_cost_saved:.2f} from going to waste at Cornell dining halls.
+        prompt = self._impact_prompt(num_items_saved, total_cost_saved)
+        
+        try:
+            response = self._request_completion('impact_message', prompt, max_tokens=150)
+            return response.strip()
+        except Exception as e:
+            logger.warning("Error generating impact message", extra={'error': str(e)})
+            return self._impact_fallback(num_items_saved)
+    
+    def _impact_prompt(self, num_items_saved, total_cost_saved):
+        return f"""Generate a brief, encouraging message (2-3 sentences) about the positive impact of saving {num_items_saved} food items worth ${total_cost_saved:.2f} from going to waste at Cornell dining halls.
 
 Make it:
 - Uplifting and motivational
@@ -122,13 +319,9 @@ Make it:
 - End with an emoji
 
 Keep it under 50 words. Respond with ONLY the message text, no quotes or extra formatting."""
-        
-        try:
-            response = self._call_claude_api(prompt, max_tokens=150)
-            return response.strip()
-        except Exception as e:
-            print(f"Error generating impact message: {e}")
-            return f"Amazing! You've saved {num_items_saved} meals from waste. Every meal saved makes a difference! 🌍"
+    
+    def _impact_fallback(self, num_items_saved):
+        return f"Amazing! You've saved {num_items_saved} meals from waste. Every meal saved makes a difference! 🌍"
     
     def _build_user_profile(self, user):
         """Build a structured user profile for Claude with all dietary information"""
@@ -145,14 +338,17 @@ Keep it under 50 words. Respond with ONLY the message text, no quotes or extra f
             "interaction_count": len(user.interaction_history)
         }
     
-    def _prepare_items_for_claude(self, available_items):
-        """Prepare food items data for Claude analysis"""
+    def _prepare_items_for_claude(self, available_items, user=None, mood=None, clock=None):
+        """
+        Prepare food items data for Claude analysis.
+        Candidates are pre-ranked with the local scorer and trimmed to the prompt token budget.
+        """
+        clock = clock or RequestClock()
+        candidates = rank_items(available_items, user, mood, clock) if user else available_items
         items_summary = []
         
-        for item in available_items[:20]:  # Limit to 20 items for context window
-            hours_until_expiry = (
-                datetime.fromisoformat(item['expiry']) - datetime.now()
-            ).total_seconds() / 3600
+        for item in candidates[:Config.AI_PROMPT_MAX_ITEMS]:
+            hours_until_expiry = clock.hours_left(item)
             
             items_summary.append({
                 "id": item['item_id'],
@@ -162,15 +358,15 @@ Keep it under 50 words. Respond with ONLY the message text, no quotes or extra f
                 "location": item.get('restaurant_location', 'Unknown'),
                 "price_cents": item['original_price'],
                 "hours_until_expiry": round(hours_until_expiry, 1),
-                "urgent": hours_until_expiry < 4
+                "urgent": clock.bucket(item) == URGENT
             })
         
-        return items_summary
+        return select_within_budget(items_summary)
     
-    def _build_recommendation_prompt(self, user_profile, items_data, mood, context):
+    def _build_recommendation_prompt(self, user_profile, items_data, mood, context, clock=None):
         """Build the prompt for Claude API with strict dietary filtering"""
         
-        time_of_day = datetime.now().hour
+        time_of_day = clock.hour if clock else datetime.now().hour
         meal_time = "breakfast" if time_of_day < 11 else "lunch" if time_of_day < 16 else "dinner"
         
         # Build dietary restrictions message
@@ -207,14 +403,14 @@ User Profile:
 - Current mood: {mood if mood else 'Not specified'}
 - Meal time: {meal_time}
 
-Available Food Items (ALL PRE-FILTERED FOR SAFETY):
-{json.dumps(items_data, indent=2)}
+Available Food Items (ALL PRE-FILTERED FOR SAFETY, ranked best first; rest = restaurant code):
+{encode_items_table(items_data)}
 
 Task: Recommend the TOP 8 items that best match this user's preferences, mood, and the current time. 
 
 Prioritization Criteria:
 1. Items matching preferred food categories ({', '.join(user_profile.get('food_categories', [])) if user_profile.get('food_categories') else 'any'})
-2. Items expiring soon (urgent = true) to reduce waste
+2. Items expiring soon (urgent = 1) to reduce waste
 3. Items that fit the current meal time ({meal_time})
 4. Variety in food types
 5. Mood appropriateness
@@ -233,6 +429,62 @@ CRITICAL: Respond with ONLY the JSON array. Do not include any text before or af
         
         return prompt
     
+    def get_batching_stats(self):
+        """Get micro-batching efficiency metrics"""
+        if self.batcher is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.batcher.get_stats()}
+    
+    def get_stream_stats(self):
+        """Get streaming time-to-first-suggestion metrics"""
+        with self._stats_lock:
+            stats = dict(self.stream_stats)
+        streams = stats['streams']
+        stats['avg_ttfs_ms'] = round(stats.pop('total_ttfs_ms') / streams, 2) if streams else None
+        return stats
+    
+    def _record_time_to_first_suggestion(self, elapsed):
+        """Record how long the first streamed suggestion took to arrive"""
+        ttfs_ms = round(elapsed * 1000, 2)
+        with self._stats_lock:
+            self.stream_stats['streams'] += 1
+            self.stream_stats['total_ttfs_ms'] += ttfs_ms
+            self.stream_stats['last_ttfs_ms'] = ttfs_ms
+    
+    def _count(self, stats, key):
+        """Increment a budget_stats or stream_stats counter"""
+        with self._stats_lock:
+            stats[key] += 1
+    
+    def get_circuit_stats(self):
+        """Get circuit breaker state and latency budget outcomes"""
+        with self._stats_lock:
+            budget_stats = dict(self.budget_stats)
+        return {**self.breaker.get_stats(), **budget_stats}
+    
+    def _request_completion(self, kind, prompt, max_tokens=2000):
+        """
+        Send a prompt through the micro-batcher, or directly when batching is disabled.
+        Raises CircuitOpenError without calling out while the circuit is open.
+        """
+        ticket = self.breaker.allow_request()
+        if ticket is None:
+            raise CircuitOpenError(f"{self.breaker.name} circuit is open")
+        
+        start = time.monotonic()
+        try:
+            if self.batcher is None:
+                response = self._call_claude_api(prompt, max_tokens=max_tokens)
+            else:
+                response = self.batcher.submit(kind, prompt, max_tokens=max_tokens)
+        except Exception:
+            self.breaker.record_failure(ticket, time.monotonic() - start)
+            raise
+        
+        self.breaker.record_success(ticket, time.monotonic() - start)
+        return response
+    
+    @timed('llm_call')
     def _call_claude_api(self, prompt, max_tokens=2000):
         """
         Make API call to Claude
@@ -254,7 +506,7 @@ CRITICAL: Respond with ONLY the JSON array. Do not include any text before or af
                 "Content-Type": "application/json"
             },
             json=payload,
-            timeout=30
+            timeout=Config.AI_REQUEST_TIMEOUT_SECONDS
         )
         
         if response.status_code == 200:
@@ -263,6 +515,71 @@ CRITICAL: Respond with ONLY the JSON array. Do not include any text before or af
         else:
             raise Exception(f"Claude API error: {response.status_code} - {response.text}")
     
+    def _stream_claude_api(self, prompt, max_tokens=2000):
+        """
+        Make a streaming API call to Claude
+        Yields text deltas from the server-sent event stream as they arrive
+        """
+        import requests
+        
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "stream": True,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+        
+        with requests.post(
+            self.api_url,
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream"
+            },
+            json=payload,
+            timeout=Config.AI_REQUEST_TIMEOUT_SECONDS,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"Claude API error: {response.status_code} - {response.text}")
+            
+            for line in response.iter_lines(decode_unicode=True):
+                text = self._parse_stream_line(line)
+                if text is _STREAM_END:
+                    return
+                if text is not None:
+                    yield text
+    
+    def _parse_stream_line(self, line):
+        """Text delta carried by one server-sent event line, None if it carries none, _STREAM_END at message_stop"""
+        if not line or not line.startswith('data:'):
+            return None
+        event = json.loads(line[5:].strip())
+        if event.get('type') == 'content_block_delta':
+            delta = event.get('delta', {})
+            if delta.get('type') == 'text_delta':
+                return delta.get('text', '')
+        elif event.get('type') == 'error':
+            raise Exception(f"Claude API stream error: {event.get('error')}")
+        elif event.get('type') == 'message_stop':
+            return _STREAM_END
+        return None
+    
+    def _map_recommendation(self, rec, items_dict):
+        """Map one recommendation from Claude to a suggestion for an available item"""
+        if not isinstance(rec, dict):
+            return None
+        item = items_dict.get(rec.get('item_id'))
+        if item is None:
+            return None
+        return {
+            'item': item,
+            'score': rec.get('score', 0),
+            'ai_reason': rec.get('reason', ''),
+            'discount_price': round(item['original_price'] * 0.3, 2)
+        }
+    
     def _parse_claude_response(self, response, available_items):
         """Parse Claude's JSON response and map to actual items"""
         try:
@@ -281,26 +598,21 @@ CRITICAL: Respond with ONLY the JSON array. Do not include any text before or af
             # Map recommendations to actual items
             suggestions = []
             for rec in recommendations:
-                item_id = rec['item_id']
-                if item_id in items_dict:
-                    item = items_dict[item_id]
-                    suggestions.append({
-                        'item': item,
-                        'score': rec['score'],
-                        'ai_reason': rec.get('reason', ''),
-                        'discount_price': round(item['original_price'] * 0.3, 2)
-                    })
+                suggestion = self._map_recommendation(rec, items_dict)
+                if suggestion is not None:
+                    suggestions.append(suggestion)
             
             return suggestions
             
         except json.JSONDecodeError as e:
-            print(f"Error parsing Claude response: {e}")
-            print(f"Response was: {response}")
+            logger.warning("Error parsing Claude response", extra={'error': str(e), 'response': response[:500]})
             return []
     
-    def _fallback_recommendations(self, available_items, user):
+    @timed('fallback_scoring')
+    def _fallback_recommendations(self, available_items, user, clock=None):
         """Fallback recommendations if Claude API fails"""
         # Simple scoring based on dietary preferences and expiry
+        clock = clock or RequestClock()
         scored = []
         
         for item in available_items[:12]:
@@ -311,14 +623,7 @@ CRITICAL: Respond with ONLY the JSON array. Do not include any text before or af
                 score += 10
             
             # Urgency
-            hours_until_expiry = (
-                datetime.fromisoformat(item['expiry']) - datetime.now()
-            ).total_seconds() / 3600
-            
-            if hours_until_expiry < 4:
-                score += 15
-            elif hours_until_expiry < 8:
-                score += 10
+            score += clock.urgency_score(item)
             
             scored.append({
                 'item': item,
@@ -328,4 +633,253 @@ CRITICAL: Respond with ONLY the JSON array. Do not include any text before or af
             })
         
         scored.sort(key=lambda x: x['score'], reverse=True)
-        return scored[:8]
\ No newline at end of file
+        return scored[:8]
+    
+    # ============= ASYNCIO VARIANTS (app_asgi.py) =============
+    
+    async def get_personalized_suggestions_async(self, user, available_items, mood=None, context=None, clock=None):
+        """
+        get_personalized_suggestions for an event loop: the same latency budget and
+        fallbacks, but a pending AI call holds no thread while it waits
+        """
+        clock = clock or RequestClock()
+        
+        if self.breaker.state == CircuitBreaker.OPEN:
+            self._count(self.budget_stats, 'short_circuited')
+            return self._fallback_recommendations(available_items, user, clock)
+        
+        task = self._spawn(self._fetch_ai_suggestions_async(user, available_items, mood, context, clock))
+        
+        try:
+            # shield: the call keeps running past the budget so the breaker still sees its outcome
+            suggestions = await asyncio.wait_for(asyncio.shield(task), Config.AI_SUGGESTION_BUDGET_MS / 1000.0)
+            self._count(self.budget_stats, 'ai_served')
+            return suggestions
+        except asyncio.TimeoutError:
+            self._count(self.budget_stats, 'budget_exceeded')
+            return self._fallback_recommendations(available_items, user, clock)
+        except CircuitOpenError:
+            self._count(self.budget_stats, 'short_circuited')
+            return self._fallback_recommendations(available_items, user, clock)
+        except Exception as e:
+            logger.warning("Error getting Claude recommendations", extra={'error': str(e)})
+            return self._fallback_recommendations(available_items, user, clock)
+    
+    async def _fetch_ai_suggestions_async(self, user, available_items, mood, context, clock):
+        prompt = self._suggestion_prompt(user, available_items, mood, context, clock)
+        response = await self._request_completion_async('suggestions', prompt)
+        return self._parse_claude_response(response, available_items)
+    
+    async def stream_personalized_suggestions_async(self, user, available_items, mood=None, context=None, clock=None):
+        """
+        Async generator form of stream_personalized_suggestions, with the same
+        budget on the first suggestion; the AI call runs as a background task
+        """
+        clock = clock or RequestClock()
+        ticket = self.breaker.allow_request()
+        if ticket is None:
+            self._count(self.budget_stats, 'short_circuited')
+            for suggestion in self._fallback_recommendations(available_items, user, clock):
+                yield suggestion
+            return
+        
+        try:
+            prompt = self._suggestion_prompt(user, available_items, mood, context, clock)
+        except BaseException:
+            self.breaker.release(ticket)
+            raise
+        items_dict = {item['item_id']: item for item in available_items}
+        
+        start = time.monotonic()
+        received = asyncio.Queue()
+        stop = asyncio.Event()
+        self._spawn(self._pump_suggestion_stream_async(ticket, prompt, items_dict, received, stop, start))
+        deadline = start + Config.AI_SUGGESTION_BUDGET_MS / 1000.0
+        emitted = 0
+        try:
+            while True:
+                try:
+                    # Only the first suggestion is held to the budget
+                    if emitted == 0 and received.empty():
+                        received_item = await asyncio.wait_for(received.get(), max(0.0, deadline - time.monotonic()))
+                    else:
+                        received_item = await received.get()
+                except asyncio.TimeoutError:
+                    # Over budget: the task stops reading the AI stream
+                    self._count(self.budget_stats, 'budget_exceeded')
+                    stop.set()
+                    break
+                if received_item is _STREAM_END or isinstance(received_item, Exception):
+                    break
+                if emitted == 0:
+                    self._record_time_to_first_suggestion(time.monotonic() - start)
+                emitted += 1
+                yield received_item
+        except (GeneratorExit, asyncio.CancelledError):
+            # Client went away mid-stream; the task stops reading the AI stream
+            stop.set()
+            raise
+        
+        if emitted == 0:
+            self._count(self.stream_stats, 'fallbacks')
+            for suggestion in self._fallback_recommendations(available_items, user, clock):
+                yield suggestion
+    
+    async def _pump_suggestion_stream_async(self, ticket, prompt, items_dict, received, stop, start):
+        """_pump_suggestion_stream on the event loop"""
+        parser = IncrementalJSONArrayParser()
+        stream = self._stream_claude_api_async(prompt)
+        try:
+            async for text in stream:
+                for rec in parser.feed(text):
+                    suggestion = self._map_recommendation(rec, items_dict)
+                    if suggestion is not None:
+                        received.put_nowait(suggestion)
+                if stop.is_set():
+                    # Nobody is reading any more; report the call with the time it has taken so far
+                    break
+        except asyncio.CancelledError:
+            self.breaker.release(ticket)
+            raise
+        except Exception as e:
+            self.breaker.record_failure(ticket, time.monotonic() - start)
+            logger.warning("Error streaming Claude recommendations", extra={'error': str(e)})
+            received.put_nowait(e)
+            return
+        finally:
+            await stream.aclose()
+        
+        self.breaker.record_success(ticket, time.monotonic() - start)
+        registry.operation_latency.observe(time.monotonic() - start, ('llm_stream',))
+        received.put_nowait(_STREAM_END)
+    
+    async def get_meal_insights_async(self, user, selected_items):
+        try:
+            response = await self._request_completion_async('meal_insights', self._meal_insights_prompt(user, selected_items))
+            return json.loads(response.strip())
+        except Exception as e:
+            logger.warning("Error getting meal insights", extra={'error': str(e)})
+            return dict(MEAL_INSIGHTS_FALLBACK)
+    
+    async def generate_food_waste_impact_async(self, num_items_saved, total_cost_saved):
+        try:
+            response = await self._request_completion_async(
+                'impact_message', self._impact_prompt(num_items_saved, total_cost_saved), max_tokens=150
+            )
+            return response.strip()
+        except Exception as e:
+            logger.warning("Error generating impact message", extra={'error': str(e)})
+            return self._impact_fallback(num_items_saved)
+    
+    async def _request_completion_async(self, kind, prompt, max_tokens=2000):
+        """
+        _request_completion for an event loop. Instead of the thread-based micro-batcher,
+        concurrent requests for an identical prompt await one shared call.
+        """
+        ticket = self.breaker.allow_request()
+        if ticket is None:
+            raise CircuitOpenError(f"{self.breaker.name} circuit is open")
+        
+        key = (kind, prompt, max_tokens)
+        task = self._async_inflight.get(key)
+        if task is None:
+            task = self._spawn(self._call_claude_api_async(prompt, max_tokens=max_tokens))
+            self._async_inflight[key] = task
+            task.add_done_callback(lambda _: self._async_inflight.pop(key, None))
+        
+        start = time.monotonic()
+        try:
+            response = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Only this waiter was cancelled; it has no outcome to report
+            self.breaker.release(ticket)
+            raise
+        except Exception:
+            self.breaker.record_failure(ticket, time.monotonic() - start)
+            raise
+        
+        self.breaker.record_success(ticket, time.monotonic() - start)
+        return response
+    
+    async def _call_claude_api_async(self, prompt, max_tokens=2000):
+        """Make API call to Claude with the pooled async client"""
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+        
+        with track('llm_call'):
+            response = await self._get_async_client().post(
+                self.api_url,
+                headers={"Content-Type": "application/json"},
+                json=payload
+            )
+            if response.status_code == 200:
+                return response.json()['content'][0]['text']
+            raise Exception(f"Claude API error: {response.status_code} - {response.text}")
+    
+    async def _stream_claude_api_async(self, prompt, max_tokens=2000):
+        """Yield text deltas from a streaming Claude call as they arrive"""
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "stream": True,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+        
+        async with self._get_async_client().stream(
+            'POST',
+            self.api_url,
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream"
+            },
+            json=payload
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(f"Claude API error: {response.status_code} - {response.text}")
+            
+            async for line in response.aiter_lines():
+                text = self._parse_stream_line(line)
+                if text is _STREAM_END:
+                    return
+                if text is not None:
+                    yield text
+    
+    def _get_async_client(self):
+        """The shared httpx.AsyncClient, created on first use inside the running loop"""
+        if self._async_client is None:
+            import httpx
+            
+            self._async_client = httpx.AsyncClient(
+                timeout=Config.AI_REQUEST_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=Config.AI_ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.AI_ASYNC_MAX_CONNECTIONS
+                )
+            )
+        return self._async_client
+    
+    async def aclose(self):
+        """Close the async client (on ASGI shutdown)"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+    
+    def _spawn(self, coro):
+        """Run `coro` as a task that is kept alive and whose errors are always retrieved"""
+        task = asyncio.ensure_future(coro)
+        self._async_background.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+    
+    def _task_done(self, task):
+        self._async_background.discard(task)
+        if not task.cancelled():
+            task.exception()
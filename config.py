@@ -22,13 +22,28 @@ class Config:
         "https://now.dining.cornell.edu/api/1.0/dining/eateries.json",
     ]
     
+    # Claude API endpoint (set USE_MOCK_LLM=1 to use the local mock_llm_server.py)
+    CLAUDE_API_URL = os.environ.get('CLAUDE_API_URL', 'https://api.anthropic.com/v1/messages')
+    USE_MOCK_LLM = os.environ.get('USE_MOCK_LLM', '').lower() in ('1', 'true', 'yes')
+    MOCK_LLM_HOST = os.environ.get('MOCK_LLM_HOST', '127.0.0.1')
+    MOCK_LLM_PORT = int(os.environ.get('MOCK_LLM_PORT', 8089))
+    
     # Business logic settings
     DISCOUNT_RATE = 0.3  # 70% off (pay 30%)
     SURPRISE_BAG_MIN_ITEMS = 3
     SURPRISE_BAG_MAX_ITEMS = 5
+    # Bias surprise-bag draws toward items closer to expiry (weights per urgency bucket)
+    SURPRISE_BAG_URGENCY_WEIGHTED = False
+    SURPRISE_BAG_URGENCY_WEIGHTS = {'urgent': 3, 'soon': 2, 'later': 1}
     MAX_SUGGESTIONS = 12
     NEARBY_RADIUS_KM = 5
     
+    # Safe-item cache shared by allergen/restriction signature (app_enhanced) and the
+    # inventory change log it catches up from
+    SAFE_SET_CACHE_MAX_PROFILES = 2000
+    SAFE_SET_CACHE_IDLE_SECONDS = 1800
+    INVENTORY_CHANGE_LOG_SIZE = 2000
+    
     # Scoring weights
     PREFERENCE_SCORE_WEIGHT = 2
     DIETARY_MATCH_SCORE = 10
@@ -37,6 +52,71 @@ class Config:
     NORMAL_EXPIRY_HOURS = 8
     NORMAL_EXPIRY_SCORE = 10
     
+    # AI request batching
+    AI_BATCHING_ENABLED = True
+    AI_BATCH_MAX_WAIT_MS = 25
+    AI_BATCH_MAX_SIZE = 8
+    AI_BATCH_WORKERS = 4
+    AI_BATCH_MAX_COMBINED_TOKENS = 4000
+    AI_BATCH_COMBINE_KINDS = ['meal_insights', 'impact_message']
+    
+    # AI latency budget and circuit breaker
+    AI_REQUEST_TIMEOUT_SECONDS = 30
+    AI_SUGGESTION_BUDGET_MS = 800
+    AI_BUDGET_WORKERS = 16
+    AI_ASYNC_MAX_CONNECTIONS = 200  # pooled connections to the LLM from app_asgi.py
+    AI_BREAKER_WINDOW_SECONDS = 60
+    AI_BREAKER_MIN_CALLS = 5
+    AI_BREAKER_ERROR_RATE = 0.5
+    AI_BREAKER_SLOW_CALL_MS = 5000
+    AI_BREAKER_SLOW_CALL_RATE = 0.5
+    AI_BREAKER_OPEN_SECONDS = 30
+    
+    # AI prompt compaction
+    AI_PROMPT_MAX_ITEMS = 40
+    AI_PROMPT_TOKEN_BUDGET = 1200
+    
+    # Logging (LOG_FORMAT is 'json' or 'text'; keep 1 in N per-request DEBUG lines)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+    LOG_DEBUG_SAMPLE_EVERY = int(os.environ.get('LOG_DEBUG_SAMPLE_EVERY', 100))
+    
+    # Request profiler (opt-in; profiles every Nth request and requests carrying the header)
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes')
+    PROFILER_SAMPLE_EVERY = int(os.environ.get('PROFILER_SAMPLE_EVERY', 0))
+    PROFILER_HEADER = 'X-Debug-Profile'
+    PROFILER_TOKEN = os.environ.get('PROFILER_TOKEN', '')
+    PROFILER_INTERVAL_MS = 1
+    PROFILER_MAX_PROFILES = 50
+    PROFILER_DIR = os.environ.get('PROFILER_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+    
+    # JSON responses (json_provider.py): JSON_BACKEND is 'auto' (orjson when installed), 'orjson' or 'stdlib'.
+    # A nonzero cache size makes the stdlib encoder reuse encoded listings, at some cost to every listing built
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto').lower()
+    JSON_FRAGMENT_CACHE_SIZE = int(os.environ.get('JSON_FRAGMENT_CACHE_SIZE', 0))
+    
+    # Response compression and HTTP caching (http_cache.py); compressed static bodies are cached up to the byte cap
+    COMPRESS_MIN_BYTES = 1024
+    COMPRESS_GZIP_LEVEL = 5
+    COMPRESS_BROTLI_QUALITY = 4
+    COMPRESS_CACHE_MAX_BYTES = 8 * 1024 * 1024
+    STATIC_MAX_AGE_SECONDS = 3600
+    
+    # /api/refresh-data (refresh_jobs.py): token buckets per client and shared by all clients, and
+    # how many finished jobs keep their status
+    REFRESH_CLIENT_PER_MINUTE = 2
+    REFRESH_CLIENT_BURST = 2
+    REFRESH_GLOBAL_PER_MINUTE = 6
+    REFRESH_GLOBAL_BURST = 3
+    REFRESH_MAX_TRACKED_CLIENTS = 10000
+    REFRESH_JOB_HISTORY = 50
+    
+    # Health probes (health.py): dining data captured longer ago than this is reported stale
+    DATA_STALE_SECONDS = int(os.environ.get('DATA_STALE_SECONDS', 24 * 3600))
+    
+    # Waste analytics
+    WASTE_RECENT_EVENTS = 100
+    
     # User settings
     CORNELL_LOCATIONS = [
         'North Campus',
@@ -3,13 +3,18 @@ Cornell Dining Hall Data Scraper
 Fetches dining hall data from Cornell's API and transforms it for Bhookh Buster
 """
 
+import asyncio
 import requests
 import json
 import random
 from datetime import datetime, timedelta
 from config import Config
+from app_logging import get_logger, start_logging
+from metrics import timed, track
 import os
 
+logger = get_logger('scraper')
+
 
 class CornellDiningScraper:
     """Scraper for Cornell dining hall data"""
@@ -20,37 +25,54 @@ class CornellDiningScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
     
+    @timed('scrape_fetch')
     def fetch_dining_data(self):
         """Fetch data from Cornell dining API"""
-        print("🌐 Fetching Cornell dining data from API...")
-        
         for api_url in self.api_urls:
             try:
                 response = requests.get(api_url, headers=self.headers, timeout=10)
                 if response.status_code == 200:
-                    print(f"✓ Successfully fetched data from {api_url}")
+                    logger.info("Fetched Cornell dining data", extra={'url': api_url})
                     return response.json()
             except requests.RequestException as e:
-                print(f"✗ Error fetching from {api_url}: {e}")
+                logger.warning("Error fetching dining data", extra={'url': api_url, 'error': str(e)})
                 continue
         
-        print("⚠️  Could not fetch data from any API endpoint")
+        logger.warning("Could not fetch data from any API endpoint", extra={'urls': self.api_urls})
+        return None
+    
+    async def fetch_dining_data_async(self):
+        """fetch_dining_data without blocking the event loop (needs httpx)"""
+        import httpx
+        
+        with track('scrape_fetch'):
+            async with httpx.AsyncClient(headers=self.headers, timeout=10) as client:
+                for api_url in self.api_urls:
+                    try:
+                        response = await client.get(api_url)
+                        if response.status_code == 200:
+                            logger.info("Fetched Cornell dining data", extra={'url': api_url})
+                            return response.json()
+                    except httpx.HTTPError as e:
+                        logger.warning("Error fetching dining data", extra={'url': api_url, 'error': str(e)})
+                        continue
+        
+        logger.warning("Could not fetch data from any API endpoint", extra={'urls': self.api_urls})
         return None
     
+    @timed('scrape_transform')
     def transform_for_bhookh_buster(self, raw_data):
         """Transform Cornell API data to Bhookh Buster format"""
         if not raw_data:
             return None
         
-        print("🔄 Transforming data to Bhookh Buster format...")
-        
         # Handle different data structures
         if isinstance(raw_data, dict) and 'data' in raw_data:
             eateries = raw_data['data'].get('eateries', [])
         elif isinstance(raw_data, list):
             eateries = raw_data
         else:
-            print("⚠️  Unknown data format")
+            logger.warning("Unknown data format", extra={'type': type(raw_data).__name__})
             return None
         
         restaurants = []
@@ -68,8 +90,10 @@ class CornellDiningScraper:
             )
             food_items.extend(menu_items)
         
-        print(f"✓ Processed {len(restaurants)} dining halls")
-        print(f"✓ Generated {len(food_items)} menu items")
+        logger.debug("Transformed dining data", extra={
+            'restaurants': len(restaurants),
+            'food_items': len(food_items)
+        })
         
         return {
             'restaurants': restaurants,
@@ -177,7 +201,7 @@ class CornellDiningScraper:
     def save_data(self, data, filename=None):
         """Save transformed data to JSON file"""
         if not data:
-            print("⚠️  No data to save")
+            logger.warning("No data to save")
             return False
         
         # Create data directory if it doesn't exist
@@ -192,51 +216,52 @@ class CornellDiningScraper:
         try:
             with open(filepath, 'w') as f:
                 json.dump(data, f, indent=2)
-            print(f"✓ Data saved to {filepath}")
+            logger.info("Data saved", extra={'path': filepath})
             return True
         except Exception as e:
-            print(f"✗ Error saving data: {e}")
+            logger.error("Error saving data", extra={'path': filepath, 'error': str(e)})
             return False
     
     def run(self):
         """Main scraper workflow"""
-        print("\n" + "="*60)
-        print("Cornell Dining Data Scraper")
-        print("="*60 + "\n")
-        
         # Fetch data
         raw_data = self.fetch_dining_data()
-        
+        return self._process(raw_data)
+    
+    async def run_async(self):
+        """Scraper workflow with a non-blocking fetch; transforming and saving run on a worker thread"""
+        raw_data = await self.fetch_dining_data_async()
+        return await asyncio.to_thread(self._process, raw_data)
+    
+    def _process(self, raw_data):
+        """Transform and save fetched data"""
         if not raw_data:
-            print("\n⚠️  Could not fetch dining data from API")
-            print("The app will use demo data as fallback\n")
+            logger.warning("Could not fetch dining data from API; the app will use demo data as fallback")
             return None
         
         # Transform data
         transformed_data = self.transform_for_bhookh_buster(raw_data)
         
         if not transformed_data:
-            print("\n⚠️  Could not transform data")
+            logger.warning("Could not transform data")
             return None
         
         # Save data
         self.save_data(transformed_data)
         
-        # Print summary
-        print("\n" + "="*60)
-        print("Summary:")
-        print(f"  Dining Halls: {len(transformed_data['restaurants'])}")
-        print(f"  Food Items: {len(transformed_data['food_items'])}")
-        print("\nSample Dining Halls:")
-        for rest in transformed_data['restaurants'][:5]:
-            print(f"  • {rest['name']} ({rest['location']}) - {rest['cuisine_type']}")
-        print("="*60 + "\n")
+        logger.info("Scrape complete", extra={
+            'restaurants': len(transformed_data['restaurants']),
+            'food_items': len(transformed_data['food_items']),
+            'sample': [f"{rest['name']} ({rest['location']}) - {rest['cuisine_type']}"
+                       for rest in transformed_data['restaurants'][:5]]
+        })
         
         return transformed_data
 
 
 def main():
     """Run the scraper"""
+    start_logging()
     scraper = CornellDiningScraper()
     scraper.run()
 
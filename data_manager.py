@@ -3,102 +3,266 @@ Data Manager for Bhookh Buster
 Handles loading and managing dining hall and food data
 """
 
+import asyncio
+import itertools
 import json
 import os
 import random
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from models import Restaurant
+from models import Listing, Restaurant
 from config import Config
-from cornell_scraper_modular import CornellDiningScraper
+from app_logging import get_logger
+from expiry_scheduler import ExpiryScheduler
+from food_type_index import FoodTypeIndex
+from inventory_snapshot import InventorySnapshot
+from json_provider import caches_listings
+from item_table import ItemTable
+from freshness import URGENT, URGENCY_BUCKETS, RequestClock, expiry_timestamp
+from metrics import registry, timed
+from urgency_index import UrgencyIndex
+from waste_tracker import WasteTracker
+
+logger = get_logger('data_manager')
 
 
 class DataManager:
     """Manages data loading and initialization"""
     
     def __init__(self):
-        self.restaurants = {}
         self.data_filepath = os.path.join(Config.DATA_DIR, Config.DINING_DATA_FILE)
+        self.expiry_scheduler = ExpiryScheduler()
+        self.waste_tracker = WasteTracker()
+        # Bumped on every inventory change; the log lets caches catch up by replaying recent changes,
+        # and the slot table lets them store item sets as bitsets
+        self.inventory_version = 0
+        self.item_table = ItemTable()
+        self._changes = deque(maxlen=Config.INVENTORY_CHANGE_LOG_SIZE)
+        # Writers serialize on the lock, update the indexes and publish a new snapshot carrying
+        # views of them; readers just read the attribute
+        self._urgency_index = UrgencyIndex()
+        self._food_type_index = FoodTypeIndex()
+        self.snapshot = InventorySnapshot()
+        self._version_lock = threading.Lock()
+        # Listings remember the item version they copy only when the JSON encoder reuses it
+        self.listing_sources = caches_listings()
+        # Where the inventory came from ('file', 'api' or 'demo') and when; read by the health probes
+        self.data_source = None
+        self.data_loaded_at = None
+        # Items in the loaded data that had already expired (e.g. an old saved file); never listed
+        self.expired_at_load = 0
+        self.data_captured_at = None
+    
+    @property
+    def restaurants(self):
+        """restaurant_id -> Restaurant, from the current snapshot"""
+        return self.snapshot.restaurants
+    
+    @property
+    def urgency_index(self):
+        return self.snapshot.urgency_index
+    
+    @property
+    def food_type_index(self):
+        return self.snapshot.food_type_index
+    
+    def start_expiry_scheduler(self):
+        """Evict expired items in the background instead of only on the next read"""
+        self.expiry_scheduler.start()
+    
+    def _publish_inventory(self, restaurants):
+        """
+        Replace the whole inventory with `restaurants` (restaurant_id -> Restaurant,
+        items already added). Its slot table, indexes and expiry schedule are built
+        first, off to the side, and published together in one critical section, so
+        readers see either the old inventory or the new one, never a partial one.
+        """
+        item_table = ItemTable()
+        urgency_index = UrgencyIndex()
+        food_type_index = FoodTypeIndex()
+        inventories = {}
+        scheduled = []
+        for restaurant_id, restaurant in restaurants.items():
+            items = inventories[restaurant_id] = restaurant.surplus_inventory
+            item_table.add_many(restaurant, items)
+            food_type_index.add_many(restaurant, items)
+            for item in items:
+                urgency_index.add(restaurant, item)
+                scheduled.append((restaurant, item))
+            # Nothing can reach the restaurant before it is published, so no change goes unseen
+            restaurant.add_listener(self._on_inventory_event)
+        
+        with self._version_lock:
+            # A gap in the log sends every cache back to a full rebuild
+            self.inventory_version += 1
+            self._changes.clear()
+            self.item_table = item_table
+            self._urgency_index = urgency_index
+            self._food_type_index = food_type_index
+            self.snapshot = InventorySnapshot(
+                self.inventory_version, restaurants, inventories, item_table.snapshot(), len(item_table),
+                urgency_index.snapshot(), food_type_index.snapshot()
+            )
+            self.expiry_scheduler.reset(scheduled)
+    
+    def _on_inventory_event(self, event, restaurant, items):
+        """Keep the snapshot, expiry schedule, indexes and waste analytics in step with inventory changes"""
+        with self._version_lock:
+            snapshot = self.snapshot
+            if snapshot.restaurants.get(restaurant.restaurant_id) is not restaurant:
+                # Replaced by a reload; its leftover items must not reach the new inventory
+                return
+            urgency_index = self._urgency_index
+            food_type_index = self._food_type_index
+            logged = items
+            if event == 'added':
+                slots = self.item_table.add_many(restaurant, items)
+                food_type_index.add_many(restaurant, items)
+                for item in items:
+                    urgency_index.add(restaurant, item)
+            elif event == 'replaced':
+                slots = self.item_table.replace_many(restaurant, items)
+                logged = [new for _, new in items]
+                for old, new in items:
+                    urgency_index.replace(old, restaurant, new)
+                    food_type_index.replace(old, restaurant, new)
+            else:
+                slots = self.item_table.remove_many(items)
+                for item in items:
+                    urgency_index.remove(item)
+                    food_type_index.remove(item)
+            for item, slot in zip(logged, slots):
+                self.inventory_version += 1
+                self._changes.append((self.inventory_version, event, slot, item))
+            # One publish per change, however many items it touched
+            table = self.item_table.snapshot()
+            indexes = (urgency_index.snapshot(), food_type_index.snapshot())
+            if event == 'added':
+                snapshot = snapshot.with_added(self.inventory_version, restaurant, items, table, indexes)
+            elif event == 'replaced':
+                snapshot = snapshot.with_replaced(self.inventory_version, restaurant, items, table, indexes)
+            else:
+                snapshot = snapshot.with_removed(self.inventory_version, restaurant, items, table, indexes)
+            self.snapshot = snapshot
+        # A schedule entry that outlives a reload is harmless: evicting it fires an event ignored above
+        if event == 'replaced':
+            for _, new in items:
+                self.expiry_scheduler.schedule(restaurant, new)
+            return
+        for item in items:
+            if event == 'added':
+                self.expiry_scheduler.schedule(restaurant, item)
+            elif event == 'expired':
+                self.waste_tracker.record_expired(restaurant, item)
+                registry.items_expired.inc((restaurant.restaurant_id,))
     
     def load_dining_data(self):
         """Load dining data from file or fetch fresh data"""
         
         # Try to load from saved file first
         if os.path.exists(self.data_filepath):
-            print(f"📂 Loading saved Cornell dining data from {self.data_filepath}...")
+            logger.info("Loading saved Cornell dining data", extra={'path': self.data_filepath})
             data = self._load_from_file()
             if data:
                 self._populate_restaurants(data)
+                self._record_source('file', data)
                 return True
         
         # If file doesn't exist, try to fetch fresh data
-        print("🌐 No saved data found. Fetching fresh Cornell dining data...")
+        logger.info("No saved data found, fetching fresh Cornell dining data")
         data = self._fetch_fresh_data()
         
         if data:
             self._populate_restaurants(data)
+            self._record_source('api', data)
             return True
         
         # If both fail, use demo data
-        print("⚠️  Could not load Cornell data. Using demo data as fallback...")
+        logger.warning("Could not load Cornell data, using demo data as fallback")
         self._load_demo_data()
+        self._record_source('demo')
         return False
     
+    def _record_source(self, source, data=None):
+        """Note where the inventory came from and when its data was captured (the scrape time, if recorded)"""
+        now = time.time()
+        captured = now
+        if data and data.get('timestamp'):
+            try:
+                captured = datetime.fromisoformat(data['timestamp']).timestamp()
+            except (TypeError, ValueError):
+                pass
+        self.data_source = source
+        self.data_loaded_at = now
+        self.data_captured_at = captured
+    
     def _load_from_file(self):
         """Load data from JSON file"""
         try:
             with open(self.data_filepath, 'r') as f:
                 data = json.load(f)
-            print(f"✓ Loaded {len(data.get('restaurants', []))} dining halls from file")
+            logger.info("Loaded dining halls from file", extra={'restaurants': len(data.get('restaurants', []))})
             return data
         except Exception as e:
-            print(f"✗ Error loading from file: {e}")
+            logger.error("Error loading from file", extra={'path': self.data_filepath, 'error': str(e)})
             return None
     
     def _fetch_fresh_data(self):
         """Fetch fresh data using scraper"""
+        # Imported here: it pulls in requests, which startup rarely needs
+        from cornell_scraper_modular import CornellDiningScraper
         scraper = CornellDiningScraper()
         return scraper.run()
     
     def _populate_restaurants(self, data):
-        """Populate restaurant objects from data"""
-        print(f"🏗️  Building restaurant objects...")
-        
+        """Replace the inventory with restaurant objects built from data"""
         # Create restaurant objects
+        restaurants = {}
         for rest_data in data['restaurants']:
-            rest = Restaurant(
+            restaurants[rest_data['id']] = Restaurant(
                 rest_data['id'],
                 rest_data['name'],
                 rest_data['location'],
                 rest_data['cuisine_type']
             )
-            self.restaurants[rest_data['id']] = rest
         
-        # Load food items into restaurants
+        # Load food items into restaurants, one inventory copy per restaurant.
+        # Items already past their expiry were never on sale, so they are not listed or counted as waste
+        now = time.time()
+        expired = 0
+        items_by_restaurant = {}
         for item in data['food_items']:
             restaurant_id = item['restaurant_id']
-            if restaurant_id in self.restaurants:
-                self.restaurants[restaurant_id].add_surplus_food(item)
+            if restaurant_id not in restaurants:
+                continue
+            if expiry_timestamp(item) <= now:
+                expired += 1
+                continue
+            items_by_restaurant.setdefault(restaurant_id, []).append(item)
+        for restaurant_id, items in items_by_restaurant.items():
+            restaurants[restaurant_id].add_surplus_foods(items)
         
-        print(f"✓ Loaded {len(self.restaurants)} dining halls")
-        print(f"✓ Loaded {len(data['food_items'])} food items")
-        
-        # Print sample
-        sample_names = [r.name for r in list(self.restaurants.values())[:3]]
-        print(f"✓ Sample: {', '.join(sample_names)}")
+        self._publish_inventory(restaurants)
+        self.expired_at_load = expired
+        if expired:
+            logger.warning("Skipped items that had already expired", extra={'expired': expired})
+        logger.info("Loaded dining data", extra={
+            'restaurants': len(restaurants),
+            'food_items': len(data['food_items']) - expired,
+            'sample': [r.name for r in list(restaurants.values())[:3]]
+        })
     
     def _load_demo_data(self):
         """Load demo/fallback data"""
-        print("Loading demo data...")
-        
         demo_restaurants = [
             ('R001', 'Campus Cafe', 'North Campus', 'Cafe'),
             ('R002', 'Main Dining Hall', 'Central Campus', 'Dining Hall'),
             ('R003', 'West Campus Market', 'West Campus', 'Market'),
         ]
         
-        for rid, name, loc, cuisine in demo_restaurants:
-            rest = Restaurant(rid, name, loc, cuisine)
-            self.restaurants[rid] = rest
+        restaurants = {rid: Restaurant(rid, name, loc, cuisine) for rid, name, loc, cuisine in demo_restaurants}
         
         # Add demo food items
         expiry_soon = datetime.now() + timedelta(hours=3)
@@ -114,7 +278,7 @@ class DataManager:
         ]
         
         for rid, fid, name, ftype, price, expiry, qty in demo_foods:
-            self.restaurants[rid].add_surplus_food({
+            restaurants[rid].add_surplus_food({
                 'item_id': fid,
                 'name': name,
                 'food_type': ftype,
@@ -123,7 +287,9 @@ class DataManager:
                 'quantity': qty
             })
         
-        print(f"✓ Loaded {len(self.restaurants)} demo restaurants")
+        self._publish_inventory(restaurants)
+        self.expired_at_load = 0
+        logger.info("Loaded demo data", extra={'restaurants': len(restaurants)})
     
     def get_all_restaurants(self):
         """Get all restaurant objects"""
@@ -133,32 +299,190 @@ class DataManager:
         """Get a specific restaurant by ID"""
         return self.restaurants.get(restaurant_id)
     
-    def get_all_available_items(self, user_location=None):
+    # Read paths never evict: the expiry scheduler's thread does, and until it gets to an item
+    # that has just expired, readers skip it by comparing its 'expiry_ts' with their `now`
+    
+    @timed('inventory_read')
+    def get_all_available_items(self, user_location=None, now=None):
         """Get all available (non-expired) items, optionally filtered by location"""
-        available_items = []
+        now = time.time() if now is None else now
+        snapshot = self.snapshot
+        restaurants = snapshot.restaurants
+        # Location filtering (simplified - always show all for Cornell)
+        return [self._listing(restaurants[restaurant_id], item)
+                for restaurant_id, items in snapshot.inventories.items()
+                for item in items if item['expiry_ts'] > now]
+    
+    @timed('inventory_read')
+    def get_items_by_urgency(self, now=None):
+        """
+        Available items grouped by urgency bucket (URGENT, SOON, LATER), most urgent first.
+        Buckets are maintained as items are added, sold and promoted, so the only per-item work is the expiry check.
+        """
+        now = time.time() if now is None else now
+        snapshot = self._promoted_snapshot(now)
+        restaurants = list(snapshot.restaurants.values())
+        return {
+            bucket: [self._listing(restaurant, item)
+                     for restaurant, item in snapshot.urgency_index.entries(bucket, restaurants)
+                     if item['expiry_ts'] > now]
+            for bucket in URGENCY_BUCKETS
+        }
+    
+    def get_expiring_soon(self, limit=None, restaurant_id=None, now=None):
+        """Items in the URGENT bucket, soonest expiry first"""
+        now = time.time() if now is None else now
+        snapshot = self._promoted_snapshot(now)
+        if restaurant_id:
+            restaurant = snapshot.restaurants.get(restaurant_id)
+            restaurants = [restaurant] if restaurant else []
+        else:
+            restaurants = list(snapshot.restaurants.values())
+        entries = [entry for entry in snapshot.urgency_index.entries(URGENT, restaurants) if entry[1]['expiry_ts'] > now]
+        entries.sort(key=lambda entry: expiry_timestamp(entry[1]))
+        if limit:
+            entries = entries[:limit]
+        return [self._listing(restaurant, item) for restaurant, item in entries]
+    
+    def get_food_types(self):
+        """Distinct food types among listed items"""
+        return self.food_type_index.food_types()
+    
+    def get_items_by_food_type(self, food_types, now=None):
+        """Available items whose food_type is one of `food_types`"""
+        now = time.time() if now is None else now
+        return [self._listing(restaurant, item)
+                for restaurant, item in self.food_type_index.entries(food_types) if item['expiry_ts'] > now]
+    
+    def get_items_matching_preferences(self, preferences, now=None):
+        """Available items whose food_type contains any preference (substring match, as in the recommendation scorer)"""
+        now = time.time() if now is None else now
+        food_type_index = self.food_type_index
+        return [self._listing(restaurant, item)
+                for restaurant, item in food_type_index.entries(food_type_index.types_matching(preferences))
+                if item['expiry_ts'] > now]
+    
+    @timed('bag_sample')
+    def sample_available_items(self, k, food_types=None, accept=None, urgency_weights=None, rng=None, now=None):
+        """
+        Up to `k` distinct available items drawn uniformly from `food_types`
+        (all types if None) that pass `accept`, without listing the candidates.
+        `urgency_weights` ({bucket: weight}) biases draws toward items closer
+        to expiry. Falls back to a scan only when `accept` rejects nearly
+        everything it is shown.
+        """
+        rng = rng or random
+        clock = RequestClock(now)
+        if accept is None:
+            accept = clock.is_live
+        else:
+            accept = lambda item, check=accept: clock.is_live(item) and check(item)
         
-        for restaurant in self.restaurants.values():
-            # Location filtering (simplified - always show all for Cornell)
-            for item in restaurant.get_available_items():
-                available_items.append({
-                    **item,
-                    'restaurant': restaurant.name,
-                    'restaurant_location': restaurant.location
-                })
+        weight = max_weight = None
+        if urgency_weights:
+            max_weight = max(urgency_weights.values())
+            weight = lambda item: urgency_weights.get(clock.bucket(item), 0)
         
-        return available_items
+        food_type_index = self.food_type_index
+        picked, exhausted = food_type_index.sample(
+            k, food_types, accept=accept, weight=weight, max_weight=max_weight or 1.0, rng=rng
+        )
+        if exhausted:
+            # Few candidates pass `accept`: list them once and sample uniformly
+            if food_types is None:
+                food_types = food_type_index.food_types()
+            entries = [entry for entry in food_type_index.entries(food_types) if accept(entry[1])]
+            picked = rng.sample(entries, min(k, len(entries)))
+        
+        return [self._listing(restaurant, item) for restaurant, item in picked]
+    
+    def get_food_types_matching(self, preferences):
+        """Listed food types containing any preference as a substring"""
+        return self.food_type_index.types_matching(preferences)
+    
+    def count_available_items(self, food_types=None):
+        """Number of listed items, optionally restricted to `food_types`"""
+        if food_types is None:
+            return self.snapshot.item_count
+        return self.food_type_index.count(food_types)
+    
+    def inventory_snapshot(self):
+        """(version, slot table) from one published snapshot, so slots are read as of that version"""
+        snapshot = self.snapshot
+        return snapshot.version, snapshot.slots
+    
+    def changes_since(self, version, until=None):
+        """
+        (event, slot, item) for every inventory change after `version` (up to `until`),
+        oldest first, or None if some of them have already dropped out of the change log.
+        For 'replaced', item is the changed copy now in the slot.
+        """
+        with self._version_lock:
+            until = self.inventory_version if until is None else until
+            if version == until:
+                return []
+            if not self._changes or self._changes[0][0] > version + 1:
+                return None
+            start = version + 1 - self._changes[0][0]
+            return [(event, slot, item)
+                    for _, event, slot, item in itertools.islice(self._changes, start, start + until - version)]
+    
+    def get_urgency_counts(self):
+        """Number of available items in each urgency bucket"""
+        snapshot = self._promoted_snapshot(time.time())
+        return snapshot.urgency_index.counts(list(snapshot.restaurants.values()))
+    
+    def _promoted_snapshot(self, now):
+        """
+        The current snapshot, with its urgency buckets up to date at `now`.
+        Only when a bucket boundary has passed since the last publish are the
+        due promotions applied, under the lock, and a new snapshot published.
+        """
+        snapshot = self.snapshot
+        if now < snapshot.urgency_index.promote_at:
+            return snapshot
+        with self._version_lock:
+            snapshot = self.snapshot
+            if now >= snapshot.urgency_index.promote_at:
+                self._urgency_index.promote(now)
+                snapshot = self.snapshot = snapshot.with_urgency_index(self._urgency_index.snapshot())
+            return snapshot
+    
+    def build_listings(self, entries):
+        """Listings (item fields plus restaurant name and location) for (restaurant, item) pairs"""
+        return [self._listing(restaurant, item) for restaurant, item in entries]
+    
+    def _listing(self, restaurant, item):
+        if self.listing_sources:
+            return Listing.of(restaurant, item)
+        return {
+            **item,
+            'restaurant': restaurant.name,
+            'restaurant_location': restaurant.location
+        }
+    
+    def clear_inventory(self):
+        """Drop every restaurant along with the expiry schedule and indexes built from them"""
+        self._publish_inventory({})
     
     def refresh_data(self):
         """Refresh data by fetching from API"""
-        print("🔄 Refreshing dining data...")
-        data = self._fetch_fresh_data()
-        
+        logger.info("Refreshing dining data")
+        return self._apply_refresh(self._fetch_fresh_data())
+    
+    async def refresh_data_async(self):
+        """refresh_data without blocking the event loop, for the ASGI app: building the inventory runs on a worker thread"""
+        from cornell_scraper_modular import CornellDiningScraper
+        logger.info("Refreshing dining data")
+        data = await CornellDiningScraper().run_async()
+        return await asyncio.to_thread(self._apply_refresh, data)
+    
+    def _apply_refresh(self, data):
         if data:
-            # Clear existing data
-            self.restaurants.clear()
-            # Load new data
+            # Built off to the side; requests keep the old inventory until the new one is published
             self._populate_restaurants(data)
+            self._record_source('api', data)
             return True
         
-        print("⚠️  Could not refresh data")
+        logger.warning("Could not refresh data")
         return False
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Expiry scheduler for surplus inventory
+Keeps a min-heap of item expiry times and evicts items from their restaurant
+as soon as they expire, from a background thread (or when run_pending() is
+called), so inventory lists stop holding items soon after they expire;
+readers skip any they catch in between.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from app_logging import get_logger
+from freshness import expiry_timestamp
+
+logger = get_logger('expiry')
+
+# Upper bound on one wait, so wall-clock jumps are noticed reasonably soon
+MAX_WAIT_SECONDS = 60
+# Pause after a failed sweep before trying again, so a sweep that keeps failing does not spin
+RETRY_SECONDS = 5
+
+
+class ExpiryScheduler:
+    """
+    Min-heap of (expiry, restaurant, item) entries.
+
+    Entries are never removed when an item is deleted or replaced; they are
+    skipped when popped because Restaurant.expire_items() only acts on items
+    the restaurant still holds.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.stats = {'scheduled': 0, 'expired': 0, 'stale_skipped': 0}
+
+    def schedule(self, restaurant, item):
+        """Track an item so it is evicted from `restaurant` when it expires"""
+        entry = (expiry_timestamp(item), next(self._seq), restaurant, item)
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            self.stats['scheduled'] += 1
+            if self._heap[0] is entry:
+                # New earliest deadline; wake the thread so it does not oversleep
+                self._cond.notify()
+
+    def next_expiry(self):
+        """Epoch seconds of the earliest tracked expiry, or None"""
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self, now=None):
+        """Evict every item whose expiry is at or before `now`; returns the evicted items"""
+        now = time.time() if now is None else now
+        due = []
+        # The heap is only looked at under the lock: another sweep may be popping it
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap))
+        if not due:
+            return []
+
+        # One eviction per restaurant, however many of its items fell due together
+        by_restaurant = {}
+        for _, _, restaurant, item in due:
+            by_restaurant.setdefault(restaurant, []).append(item)
+        expired = []
+        for restaurant, items in by_restaurant.items():
+            expired.extend(restaurant.expire_items(items))
+        with self._cond:
+            self.stats['expired'] += len(expired)
+            self.stats['stale_skipped'] += len(due) - len(expired)
+        return expired
+
+    def reset(self, entries=()):
+        """Track exactly these (restaurant, item) pairs, forgetting every other (when the inventory is replaced)"""
+        heap = [(expiry_timestamp(item), next(self._seq), restaurant, item) for restaurant, item in entries]
+        heapq.heapify(heap)
+        with self._cond:
+            self._heap = heap
+            self.stats['scheduled'] += len(heap)
+            self._cond.notify()
+
+    def start(self):
+        """Run evictions from a daemon thread at each expiry time"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='expiry-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        retry_at = 0
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.time()
+                wait = MAX_WAIT_SECONDS
+                if self._heap:
+                    wait = min(wait, self._heap[0][0] - now)
+                # Newly scheduled items wake the thread, but do not cut a retry pause short
+                wait = max(wait, retry_at - now)
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Expiry sweep failed", extra={'retry_seconds': RETRY_SECONDS})
+                retry_at = time.time() + RETRY_SECONDS
+
+    def get_stats(self):
+        with self._cond:
+            return {**self.stats, 'pending': len(self._heap),
+                    'next_expiry': self._heap[0][0] if self._heap else None,
+                    'running': self._thread is not None}
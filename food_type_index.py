@@ -0,0 +1,212 @@
+"""
+Inverted index from food type to surplus items
+Maintained from restaurant inventory events so preference filtering and mood
+candidate lookups are unions over a handful of food types instead of scans
+over every item. Each bucket is an indexed set (a slot sequence plus
+positions) so random draws across buckets are O(1) and never copy the
+candidates.
+
+DataManager updates the index as it publishes each inventory change and puts
+a FoodTypeView of it in the new snapshot. Buckets keep their entries in the
+item slot table's copy-on-write chunks, so a view shares every unchanged
+chunk with the index and with other views, and readers never lock.
+"""
+
+import bisect
+import random
+
+from item_table import CHUNK_BITS, CHUNK_SIZE, SlotTable, copy_on_write
+
+
+class _Bucket:
+    """(restaurant, item) pairs in copy-on-write chunks, with id(item) -> position for O(1) swap-removal"""
+
+    __slots__ = ('chunks', 'size', 'positions')
+
+    def __init__(self):
+        self.chunks = ()
+        self.size = 0
+        self.positions = {}
+
+    def __len__(self):
+        return self.size
+
+    def add_many(self, restaurant, items):
+        assignments = []
+        for item in items:
+            position = self.positions.get(id(item))
+            if position is None:
+                position = self.positions[id(item)] = self.size
+                self.size += 1
+            assignments.append((position, (restaurant, item)))
+        self.chunks = copy_on_write(self.chunks, assignments)
+
+    def replace(self, old, restaurant, new):
+        """Put `new` at `old`'s position; False if `old` is not in the bucket"""
+        position = self.positions.pop(id(old), None)
+        if position is None:
+            return False
+        self.positions[id(new)] = position
+        self.chunks = copy_on_write(self.chunks, ((position, (restaurant, new)),))
+        return True
+
+    def discard(self, item):
+        position = self.positions.pop(id(item), None)
+        if position is None:
+            return
+        self.size -= 1
+        last = self.size
+        assignments = [(last, None)]
+        if position < last:
+            moved = self.chunks[last >> CHUNK_BITS][last & (CHUNK_SIZE - 1)]
+            self.positions[id(moved[1])] = position
+            assignments.append((position, moved))
+        self.chunks = copy_on_write(self.chunks, assignments)
+
+    def snapshot(self):
+        return SlotTable(self.chunks, self.size)
+
+
+class FoodTypeIndex:
+    """food_type -> bucket of (restaurant, item) for every listed item; not thread-safe, DataManager serializes writers"""
+
+    def __init__(self):
+        self._by_type = {}
+        self._view = FoodTypeView()
+        self._changed = set()  # food types whose buckets changed since the last snapshot
+
+    def add(self, restaurant, item):
+        self.add_many(restaurant, (item,))
+
+    def add_many(self, restaurant, items):
+        """add() for several items of one restaurant, copying each touched chunk once"""
+        by_type = {}
+        for item in items:
+            by_type.setdefault(item['food_type'], []).append(item)
+        for food_type, members in by_type.items():
+            bucket = self._by_type.get(food_type)
+            if bucket is None:
+                bucket = self._by_type[food_type] = _Bucket()
+            bucket.add_many(restaurant, members)
+            self._changed.add(food_type)
+
+    def remove(self, item):
+        food_type = item['food_type']
+        bucket = self._by_type.get(food_type)
+        if bucket is not None:
+            bucket.discard(item)
+            self._changed.add(food_type)
+            if not bucket:
+                del self._by_type[food_type]
+
+    def replace(self, old, restaurant, new):
+        """Swap a changed copy of a listed item in for the original"""
+        bucket = self._by_type.get(old['food_type'])
+        if old['food_type'] == new['food_type'] and bucket is not None and bucket.replace(old, restaurant, new):
+            self._changed.add(new['food_type'])
+            return
+        self.remove(old)
+        self.add(restaurant, new)
+
+    def snapshot(self):
+        """FoodTypeView of the index as it is now; later changes do not affect it"""
+        if self._changed:
+            buckets = dict(self._view.buckets)
+            for food_type in self._changed:
+                bucket = self._by_type.get(food_type)
+                if bucket is None:
+                    buckets.pop(food_type, None)
+                else:
+                    buckets[food_type] = bucket.snapshot()
+            self._changed.clear()
+            self._view = FoodTypeView(buckets)
+        return self._view
+
+    def clear(self):
+        self._by_type.clear()
+        self._view = FoodTypeView()
+        self._changed.clear()
+
+
+class FoodTypeView:
+    """Immutable food_type -> SlotTable of (restaurant, item), as published in an inventory snapshot"""
+
+    __slots__ = ('buckets',)
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets or {}
+
+    def food_types(self):
+        return list(self.buckets)
+
+    def types_matching(self, terms):
+        """
+        Food types containing any of `terms` as a substring, the same rule as
+        `any(pref in item['food_type'] for pref in prefs)`, checked once per type
+        """
+        return [food_type for food_type in self.buckets if any(term in food_type for term in terms)]
+
+    def entries(self, food_types):
+        """(restaurant, item) pairs for the union of `food_types`"""
+        result = []
+        for food_type in set(food_types):
+            bucket = self.buckets.get(food_type)
+            if bucket:
+                result.extend(bucket)
+        return result
+
+    def count(self, food_types=None):
+        if food_types is None:
+            return sum(len(bucket) for bucket in self.buckets.values())
+        return sum(len(self.buckets.get(food_type, ())) for food_type in set(food_types))
+
+    def sample(self, k, food_types=None, accept=None, weight=None, max_weight=1.0,
+               rng=None, max_attempts=None):
+        """
+        Draw up to `k` distinct (restaurant, item) pairs from the union of
+        `food_types` (all types if None) without building the union.
+
+        Each attempt picks a position in [0, total) and bisects the cumulative
+        bucket sizes, so every listed item is equally likely; duplicates, items
+        failing `accept`, and (when `weight` is given) a weight-proportional
+        share of the rest are rejected and redrawn. Work is O(k / acceptance
+        rate), independent of inventory size.
+
+        Returns (picked, exhausted): `exhausted` is True when `max_attempts`
+        ran out before `k` items were accepted, so the caller can fall back to
+        a full scan (e.g. when only a handful of items pass `accept`).
+        """
+        rng = rng or random
+        if max_attempts is None:
+            max_attempts = 20 * k + 50
+
+        if food_types is None:
+            buckets = list(self.buckets.values())
+        else:
+            buckets = [self.buckets[food_type] for food_type in set(food_types) if food_type in self.buckets]
+        ends = []
+        total = 0
+        for bucket in buckets:
+            total += len(bucket)
+            ends.append(total)
+
+        picked = []
+        seen = set()
+        attempts = 0
+        k = min(k, total)
+        while len(picked) < k and attempts < max_attempts:
+            attempts += 1
+            position = rng.randrange(total)
+            index = bisect.bisect_right(ends, position)
+            offset = position - (ends[index - 1] if index else 0)
+            entry = buckets[index][offset]
+            item = entry[1]
+            if id(item) in seen:
+                continue
+            if weight is not None and rng.random() * max_weight >= weight(item):
+                continue
+            seen.add(id(item))
+            if accept is not None and not accept(item):
+                continue
+            picked.append(entry)
+        return picked, len(picked) < k
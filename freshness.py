@@ -0,0 +1,76 @@
+"""
+Expiry timestamps and the per-request clock
+Items carry their expiry as epoch seconds ('expiry_ts', stamped once at ingest)
+so read paths compare floats instead of re-parsing ISO strings, and a single
+RequestClock is threaded through each request so every item is judged
+against the same "now".
+"""
+
+import time
+from datetime import datetime
+
+from config import Config
+
+# Urgency buckets, most urgent first
+URGENT = 'urgent'
+SOON = 'soon'
+LATER = 'later'
+URGENCY_BUCKETS = (URGENT, SOON, LATER)
+
+# The expiry term of the recommendation score for each bucket
+URGENCY_SCORES = {
+    URGENT: Config.URGENT_EXPIRY_SCORE,
+    SOON: Config.NORMAL_EXPIRY_SCORE,
+    LATER: 0
+}
+
+
+def stamp_expiry(item):
+    """Parse an item's ISO expiry once and store it as 'expiry_ts'"""
+    item['expiry_ts'] = datetime.fromisoformat(item['expiry']).timestamp()
+    return item['expiry_ts']
+
+
+def expiry_timestamp(item):
+    """Epoch seconds at which an item expires, parsing only if it was never stamped"""
+    ts = item.get('expiry_ts')
+    if ts is None:
+        ts = datetime.fromisoformat(item['expiry']).timestamp()
+    return ts
+
+
+class RequestClock:
+    """
+    One "now" for a whole request, with the urgency cut-offs derived from it
+    so bucketing an item is a float comparison.
+    """
+
+    __slots__ = ('now', 'urgent_before', 'soon_before')
+
+    def __init__(self, now=None):
+        self.now = time.time() if now is None else now
+        self.urgent_before = self.now + Config.URGENT_EXPIRY_HOURS * 3600
+        self.soon_before = self.now + Config.NORMAL_EXPIRY_HOURS * 3600
+
+    @property
+    def hour(self):
+        return datetime.fromtimestamp(self.now).hour
+
+    def hours_left(self, item):
+        return (expiry_timestamp(item) - self.now) / 3600
+
+    def is_live(self, item):
+        return expiry_timestamp(item) > self.now
+
+    def bucket(self, item):
+        """URGENT (< URGENT_EXPIRY_HOURS left), SOON (< NORMAL_EXPIRY_HOURS) or LATER"""
+        ts = expiry_timestamp(item)
+        if ts < self.urgent_before:
+            return URGENT
+        if ts < self.soon_before:
+            return SOON
+        return LATER
+
+    def urgency_score(self, item):
+        """The expiry term of the recommendation score"""
+        return URGENCY_SCORES[self.bucket(item)]
@@ -0,0 +1,99 @@
+"""
+Liveness and readiness probes
+/healthz says whether the process is alive; /readyz whether it should get
+traffic, and with what: the load state, where the dining data came from
+(saved file, Cornell API or the demo fallback) and how old it is, the
+published inventory snapshot's version, age and counts, and the AI circuit
+breaker's state. Every figure is kept current as the inventory changes, so
+a probe is a handful of attribute reads and can be polled every second.
+
+Data that is demo, stale or empty, and an open AI circuit, are listed under
+'degraded' but do not fail readiness: a worker serving them still answers
+requests, and every worker would be in the same state.
+
+init_app() serves both probes from a Flask app; the ASGI app calls a
+HealthReporter directly.
+"""
+
+import time
+
+from circuit_breaker import CircuitBreaker
+from config import Config
+
+
+class HealthReporter:
+    """Probe bodies for a StartupLoader's app, with its AI circuit breaker if it has one"""
+
+    def __init__(self, loader, breaker=None):
+        self.loader = loader
+        self.data_manager = loader.data_manager
+        self.breaker = breaker
+        self.started_at = time.time()
+
+    def liveness(self):
+        """(body, status): 200 while the process is up, 503 once loading its data has failed"""
+        alive = self.loader.state != 'failed'
+        return {
+            'alive': alive,
+            'state': self.loader.state,
+            'uptime_seconds': round(time.time() - self.started_at, 1)
+        }, 200 if alive else 503
+
+    def readiness(self):
+        """(body, status): 200 once dining data is loaded, 503 before"""
+        now = time.time()
+        data_manager = self.data_manager
+        snapshot = data_manager.snapshot
+        source = data_manager.data_source
+        captured_at = data_manager.data_captured_at
+        data_age = round(now - captured_at, 1) if captured_at is not None else None
+        stale = data_age is not None and data_age > Config.DATA_STALE_SECONDS
+        circuit = self.breaker.state if self.breaker is not None else None
+
+        degraded = []
+        if source == 'demo':
+            degraded.append('demo_data')
+        if stale:
+            degraded.append('stale_data')
+        if self.loader.ready and not snapshot.item_count:
+            degraded.append('no_items')
+        if circuit == CircuitBreaker.OPEN:
+            degraded.append('ai_circuit_open')
+
+        body = {
+            **self.loader.get_status(),
+            'degraded': degraded,
+            'data': {
+                'source': source,
+                'age_seconds': data_age,
+                'stale': stale,
+                'expired_at_load': data_manager.expired_at_load
+            },
+            'inventory': {
+                'version': snapshot.version,
+                'snapshot_age_seconds': round(now - snapshot.published_at, 1),
+                'restaurants': len(snapshot.restaurants),
+                'items': snapshot.item_count
+            },
+            'ai_circuit': circuit
+        }
+        return body, 200 if self.loader.ready else 503
+
+
+def init_app(app, reporter):
+    """Serve `reporter`'s probes from a Flask app at /healthz and /readyz"""
+    from flask import jsonify
+
+    @app.route('/healthz')
+    def healthz():
+        """Liveness probe: 200 unless startup failed"""
+        body, status = reporter.liveness()
+        return jsonify(body), status
+
+    @app.route('/readyz')
+    def readyz():
+        """Readiness probe: 200 once dining data is loaded, 503 before"""
+        body, status = reporter.readiness()
+        return jsonify(body), status
+
+    return reporter
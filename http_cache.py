@@ -0,0 +1,261 @@
+"""
+Response compression and HTTP caching
+Gives GET responses a strong ETag, answers conditional GETs (If-None-Match)
+with 304, and compresses bodies of at least COMPRESS_MIN_BYTES with brotli
+(when installed) or gzip, whichever the client accepts. Compressed bodies of
+static assets and the main page are kept by ETag, so each version of them is
+compressed once. Static assets are marked cacheable for
+STATIC_MAX_AGE_SECONDS; other responses must revalidate. Streamed responses
+(server-sent events) pass through untouched.
+
+init_app() hooks this into a Flask app; ASGIHTTPCache wraps an ASGI app.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config import Config
+
+COMPRESSIBLE_TYPES = frozenset([
+    'application/javascript', 'application/json', 'image/svg+xml',
+    'text/css', 'text/html', 'text/javascript', 'text/plain'
+])
+
+
+def _brotli():
+    """The brotli (or brotlicffi) module, or None if neither is installed"""
+    try:
+        import brotli
+    except ImportError:
+        try:
+            import brotlicffi as brotli
+        except ImportError:
+            return None
+    return brotli
+
+
+def choose_encoding(accept_encoding, offered):
+    """First of the `offered` codings the Accept-Encoding header allows, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    for coding in offered:
+        if weights.get(coding, weights.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 asks)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+def is_static_path(path):
+    return path.startswith('/static/')
+
+
+class HTTPCache:
+    """Framework-neutral ETag, 304 and compression logic, with a bounded cache of compressed bodies"""
+
+    def __init__(self, min_bytes=None, cache_max_bytes=None):
+        self.min_bytes = Config.COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+        self.cache_max_bytes = Config.COMPRESS_CACHE_MAX_BYTES if cache_max_bytes is None else cache_max_bytes
+        self._brotli = _brotli()
+        self.offered = ('br', 'gzip') if self._brotli else ('gzip',)
+        # (etag, coding) -> compressed body, least recently used first
+        self._compressed = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'not_modified': 0,
+            'compressed': 0,
+            'compressed_cache_hits': 0,
+            'bytes_in': 0,
+            'bytes_out': 0
+        }
+
+    def process(self, method, path, status, content_type, body, if_none_match, accept_encoding):
+        """
+        (status, body, headers to set) for a response about to be sent; a
+        Vary header is to be merged with any existing one. Only 200
+        responses are touched; a 304 comes back with an empty body.
+        """
+        if status != 200:
+            return status, body, {}
+        headers = {}
+        media_type = (content_type or '').split(';', 1)[0].strip().lower()
+        coding = None
+        if media_type in COMPRESSIBLE_TYPES and len(body) >= self.min_bytes:
+            headers['Vary'] = 'Accept-Encoding'
+            coding = choose_encoding(accept_encoding, self.offered)
+
+        static = is_static_path(path)
+        if static:
+            headers['Cache-Control'] = f'public, max-age={Config.STATIC_MAX_AGE_SECONDS}'
+        digest = None
+        if method in ('GET', 'HEAD'):
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            # Each coding is its own representation, so it gets its own strong tag
+            etag = f'"{digest}-{coding}"' if coding else f'"{digest}"'
+            headers['ETag'] = etag
+            if not static:
+                headers['Cache-Control'] = 'no-cache'
+            if etag_matches(if_none_match, etag):
+                with self._lock:
+                    self.stats['not_modified'] += 1
+                return 304, b'', headers
+
+        if coding:
+            cache_key = (digest, coding) if digest and (static or path == '/') else None
+            compressed = self._compress(body, coding, cache_key)
+            headers['Content-Encoding'] = coding
+            with self._lock:
+                self.stats['compressed'] += 1
+                self.stats['bytes_in'] += len(body)
+                self.stats['bytes_out'] += len(compressed)
+            body = compressed
+        return status, body, headers
+
+    def _compress(self, body, coding, cache_key):
+        if cache_key is not None:
+            with self._lock:
+                cached = self._compressed.get(cache_key)
+                if cached is not None:
+                    self._compressed.move_to_end(cache_key)
+                    self.stats['compressed_cache_hits'] += 1
+                    return cached
+        # Cached bodies are compressed once, so they get the slow, thorough settings
+        thorough = cache_key is not None
+        if coding == 'br':
+            compressed = self._brotli.compress(body, quality=11 if thorough else Config.COMPRESS_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=9 if thorough else Config.COMPRESS_GZIP_LEVEL, mtime=0)
+        if thorough and len(compressed) <= self.cache_max_bytes:
+            with self._lock:
+                if cache_key not in self._compressed:
+                    self._compressed[cache_key] = compressed
+                    self._cached_bytes += len(compressed)
+                while self._cached_bytes > self.cache_max_bytes:
+                    _, evicted = self._compressed.popitem(last=False)
+                    self._cached_bytes -= len(evicted)
+        return compressed
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['compressed_cache_entries'] = len(self._compressed)
+            stats['compressed_cache_bytes'] = self._cached_bytes
+        stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None
+        stats['encodings'] = list(self.offered)
+        return stats
+
+
+def init_app(app, cache=None):
+    """Apply an HTTPCache to every response of a Flask app"""
+    from flask import request
+
+    cache = cache or HTTPCache()
+    app.extensions['http_cache'] = cache
+
+    @app.after_request
+    def _cache_and_compress(response):
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+        if response.direct_passthrough:
+            # A static file: read it so it can be hashed and compressed
+            response.direct_passthrough = False
+        elif response.is_streamed:
+            return response
+        status, body, headers = cache.process(
+            request.method, request.path, response.status_code, response.content_type,
+            response.get_data(), request.headers.get('If-None-Match'), request.headers.get('Accept-Encoding')
+        )
+        response.status_code = status
+        response.set_data(body)
+        if 'Content-Encoding' in headers:
+            response.headers.pop('Accept-Ranges', None)
+        for name, value in headers.items():
+            if name == 'Vary':
+                response.vary.add(value)
+            else:
+                response.headers[name] = value
+        return response
+
+    return cache
+
+
+class ASGIHTTPCache:
+    """ASGI middleware applying an HTTPCache to single-body responses; streamed ones pass through"""
+
+    def __init__(self, app, cache=None):
+        self.app = app
+        self.cache = cache or HTTPCache()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        held = None
+
+        async def send_wrapper(message):
+            nonlocal held
+            if message['type'] == 'http.response.start':
+                content_type = _header(message['headers'], b'content-type')
+                if (message['status'] != 200 or content_type.startswith('text/event-stream')
+                        or _header(message['headers'], b'content-encoding')):
+                    await send(message)
+                else:
+                    held = message
+                return
+            if held is None or message['type'] != 'http.response.body':
+                await send(message)
+                return
+            start, held = held, None
+            if message.get('more_body'):
+                # Sent in pieces: forward as it comes
+                await send(start)
+                await send(message)
+                return
+            request_headers = scope['headers']
+            status, body, headers = self.cache.process(
+                scope['method'], scope['path'], start['status'], _header(start['headers'], b'content-type'),
+                message.get('body', b''), _header(request_headers, b'if-none-match'),
+                _header(request_headers, b'accept-encoding')
+            )
+            if 'Vary' in headers:
+                vary = _header(start['headers'], b'vary')
+                headers['Vary'] = f"{vary}, {headers['Vary']}" if vary else headers['Vary']
+            replaced = {name.lower().encode('latin-1') for name in headers} | {b'content-length'}
+            if 'Content-Encoding' in headers:
+                replaced.add(b'accept-ranges')
+            raw_headers = [(name, value) for name, value in start['headers'] if name.lower() not in replaced]
+            raw_headers += [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+            if status != 304:
+                raw_headers.append((b'content-length', str(len(body)).encode('latin-1')))
+            await send({**start, 'status': status, 'headers': raw_headers})
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _header(raw_headers, name):
+    for key, value in raw_headers:
+        if key.lower() == name:
+            return value.decode('latin-1')
+    return ''
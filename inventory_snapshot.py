@@ -0,0 +1,99 @@
+"""
+Immutable inventory snapshots
+DataManager publishes a new snapshot after every inventory change. Readers
+take the current one with a single attribute read and see every restaurant's
+items, and the item slot table, as of one inventory version, without
+locking. A snapshot is built from the previous one, sharing every
+restaurant's item tuple except the one that changed, and carries views of
+the urgency and food type indexes taken in the same publish. Loading or
+refreshing the data builds a whole new inventory, indexes included, and
+publishes it as one snapshot.
+"""
+
+import time
+from types import MappingProxyType
+
+from food_type_index import FoodTypeView
+from item_table import SlotTable
+from urgency_index import UrgencyView
+
+
+def _read_only(mapping):
+    # Unchanged mappings are shared from the previous snapshot as they are, never re-wrapped
+    if isinstance(mapping, MappingProxyType):
+        return mapping
+    return MappingProxyType(mapping or {})
+
+
+class InventorySnapshot:
+    """
+    One published view of the inventory. Never mutated after construction;
+    its mappings are read-only proxies.
+
+    version: DataManager.inventory_version it reflects
+    restaurants: restaurant_id -> Restaurant
+    inventories: restaurant_id -> tuple of the items it holds
+    slots: item_table.SlotTable of every listed (restaurant, item)
+    item_count: number of listed items
+    urgency_index, food_type_index: UrgencyView and FoodTypeView of the
+        indexes over these items
+    published_at: wall-clock time it was built, for health reporting
+    """
+
+    __slots__ = ('version', 'restaurants', 'inventories', 'slots', 'item_count', 'urgency_index',
+                 'food_type_index', 'published_at')
+
+    def __init__(self, version=0, restaurants=None, inventories=None, slots=None, item_count=0,
+                 urgency_index=None, food_type_index=None):
+        self.version = version
+        self.restaurants = _read_only(restaurants)
+        self.inventories = _read_only(inventories)
+        self.slots = slots if slots is not None else SlotTable()
+        self.item_count = item_count
+        self.urgency_index = urgency_index if urgency_index is not None else UrgencyView()
+        self.food_type_index = food_type_index if food_type_index is not None else FoodTypeView()
+        self.published_at = time.time()
+
+    def with_added(self, version, restaurant, added, slots, indexes):
+        """
+        The next snapshot, after the `added` tuple of items was listed at
+        `restaurant`. `slots` and `indexes` ((urgency_index, food_type_index))
+        are views taken after the change.
+        """
+        restaurant_id = restaurant.restaurant_id
+        items = self.inventories.get(restaurant_id, ()) + added
+        return self._next(version, restaurant_id, items, slots, self.item_count + len(added), indexes)
+
+    def with_removed(self, version, restaurant, removed, slots, indexes):
+        """The next snapshot, after the `removed` items left `restaurant` (sold, deleted or expired)"""
+        restaurant_id = restaurant.restaurant_id
+        held = self.inventories.get(restaurant_id, ())
+        gone = {id(item) for item in removed}
+        items = tuple(item for item in held if id(item) not in gone)
+        return self._next(version, restaurant_id, items, slots, self.item_count - len(held) + len(items), indexes)
+
+    def with_replaced(self, version, restaurant, pairs, slots, indexes):
+        """The next snapshot, after changed copies took the place of items at `restaurant` (old, new pairs)"""
+        restaurant_id = restaurant.restaurant_id
+        swaps = {id(old): new for old, new in pairs}
+        items = tuple(swaps.get(id(item), item) for item in self.inventories.get(restaurant_id, ()))
+        return self._next(version, restaurant_id, items, slots, self.item_count, indexes)
+
+    def with_urgency_index(self, urgency_index):
+        """The same inventory, with items promoted to more urgent buckets as time passed"""
+        return InventorySnapshot(
+            self.version, self.restaurants, self.inventories, self.slots, self.item_count,
+            urgency_index, self.food_type_index
+        )
+
+    def _next(self, version, restaurant_id, items, slots, item_count, indexes):
+        return InventorySnapshot(
+            version, self.restaurants, {**self.inventories, restaurant_id: items}, slots, item_count, *indexes
+        )
+
+    def entries(self):
+        """(restaurant, item) for every listed item, restaurant by restaurant"""
+        restaurants = self.restaurants
+        return [(restaurants[restaurant_id], item)
+                for restaurant_id, items in self.inventories.items()
+                for item in items]
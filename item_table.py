@@ -0,0 +1,128 @@
+"""
+Slot table for listed surplus items
+Gives every listed item a small integer slot that stays fixed while it is
+listed, so sets of items can be stored as bitsets over the table. Slots of
+removed items are reused by later additions.
+
+Slots are stored in fixed-size tuple chunks that are copied on write, so a
+snapshot of the table is O(1) and shares every unchanged chunk with the
+table and with other snapshots.
+"""
+
+from itertools import chain, islice
+
+CHUNK_BITS = 8
+CHUNK_SIZE = 1 << CHUNK_BITS
+_EMPTY_CHUNK = (None,) * CHUNK_SIZE
+
+
+class SlotTable:
+    """Immutable slot -> (restaurant, item) sequence, None for free slots"""
+
+    __slots__ = ('_chunks', '_size')
+
+    def __init__(self, chunks=(), size=0):
+        self._chunks = chunks
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, slot):
+        if not 0 <= slot < self._size:
+            raise IndexError(slot)
+        return self._chunks[slot >> CHUNK_BITS][slot & (CHUNK_SIZE - 1)]
+
+    def __iter__(self):
+        return islice(chain.from_iterable(self._chunks), self._size)
+
+
+class ItemTable:
+    """slot -> (restaurant, item) for every listed item; not thread-safe, DataManager serializes writers"""
+
+    def __init__(self):
+        self._chunks = ()
+        self._size = 0  # slots ever handed out, free or not
+        self._slots = {}  # id(item) -> slot
+        self._free = []
+
+    def __len__(self):
+        return len(self._slots)
+
+    def add(self, restaurant, item):
+        """Assign `item` a slot (its existing one if already listed) and return it"""
+        return self.add_many(restaurant, (item,))[0]
+
+    def add_many(self, restaurant, items):
+        """add() for several items of one restaurant, copying each touched chunk once; returns their slots"""
+        slots = []
+        for item in items:
+            slot = self._slots.get(id(item))
+            if slot is None:
+                slot = self._slots[id(item)] = self._allocate()
+            slots.append(slot)
+        self._chunks = copy_on_write(self._chunks, ((slot, (restaurant, item)) for slot, item in zip(slots, items)))
+        return slots
+
+    def replace_many(self, restaurant, pairs):
+        """Move each (old, new) pair's slot from the old item to the new one; returns the slots"""
+        slots = []
+        for old, new in pairs:
+            slot = self._slots.pop(id(old), None)
+            if slot is None:
+                slot = self._allocate()
+            self._slots[id(new)] = slot
+            slots.append(slot)
+        self._chunks = copy_on_write(self._chunks, ((slot, (restaurant, new)) for slot, (_, new) in zip(slots, pairs)))
+        return slots
+
+    def remove(self, item):
+        """Free the item's slot and return it, or None if the item was not listed"""
+        return self.remove_many((item,))[0]
+
+    def remove_many(self, items):
+        """remove() for several items; returns their former slots (None for items not listed)"""
+        slots = [self._slots.pop(id(item), None) for item in items]
+        freed = [slot for slot in slots if slot is not None]
+        self._chunks = copy_on_write(self._chunks, ((slot, None) for slot in freed))
+        self._free.extend(freed)
+        return slots
+
+    def slot_of(self, item):
+        return self._slots.get(id(item))
+
+    def snapshot(self):
+        """Immutable view of the slots as they are now; later changes do not affect it"""
+        return SlotTable(self._chunks, self._size)
+
+    def clear(self):
+        self._chunks = ()
+        self._size = 0
+        self._slots.clear()
+        self._free.clear()
+
+    def _allocate(self):
+        if self._free:
+            return self._free.pop()
+        self._size += 1
+        return self._size - 1
+
+
+def copy_on_write(chunks, assignments):
+    """
+    `chunks` with (slot, value) pairs written into fresh copies of the chunks
+    they touch, growing it as needed; `chunks` itself is left unchanged
+    """
+    chunks = list(chunks)
+    touched = {}
+    for slot, value in assignments:
+        index = slot >> CHUNK_BITS
+        chunk = touched.get(index)
+        if chunk is None:
+            while index >= len(chunks):
+                chunks.append(_EMPTY_CHUNK)
+            chunk = touched[index] = list(chunks[index])
+        chunk[slot & (CHUNK_SIZE - 1)] = value
+    for index, chunk in touched.items():
+        chunks[index] = tuple(chunk)
+    return tuple(chunks)
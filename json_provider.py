@@ -0,0 +1,182 @@
+"""
+Fast JSON encoding for API responses
+Encodes with orjson when it is installed and with the stdlib json module
+otherwise. With JSON_FRAGMENT_CACHE_SIZE set, the stdlib encoder also
+caches each listing's JSON by item version and splices the cached bytes
+into responses that carry the listing. That pays off for responses made of
+many listings, but every listing built then carries its source, which
+slows paths that build many and send few (like /api/suggestions), so it is
+off by default. orjson encodes a whole payload faster than splicing would,
+so it never caches.
+
+Output is compact UTF-8 and keeps key order (Flask's default provider sorts
+keys). Types JSON cannot represent go through Flask's default hook, so
+dates, UUIDs, dataclasses and Decimals encode as they did before.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+from flask.json.provider import DefaultJSONProvider
+
+from config import Config
+from models import Listing
+
+# Stands in for each cached listing in the payload the stdlib encoder sees
+_MARKER = '\x00listing\x00'
+_ENCODED_MARKER = b'"\\u0000listing\\u0000"'
+
+
+def resolve_backend(backend=None):
+    """'orjson' or 'stdlib' for a JSON_BACKEND setting of 'auto', 'orjson' or 'stdlib'"""
+    backend = (backend or Config.JSON_BACKEND).lower()
+    if backend == 'stdlib':
+        return 'stdlib'
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        if backend == 'orjson':
+            raise
+        return 'stdlib'
+    return 'orjson'
+
+
+def caches_listings(backend=None):
+    """Whether listings' JSON is cached, which only the stdlib encoder gains from"""
+    return Config.JSON_FRAGMENT_CACHE_SIZE > 0 and resolve_backend(backend) == 'stdlib'
+
+
+class FragmentCache:
+    """Bounded LRU of encoded listings keyed by (item, version); thread-safe"""
+
+    def __init__(self, encode, max_entries):
+        self._encode = encode
+        self.max_entries = max_entries
+        # (id(item), version) -> (item, bytes); holding the item keeps its id from being reused
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, listing):
+        """The listing's JSON, encoded now only if its item version has none cached"""
+        restaurant, item, version = listing.source
+        key = (id(item), version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        encoded = self._encode(listing)
+        with self._lock:
+            self._entries[key] = (item, encoded)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+def _skeleton(obj, listings):
+    """Copy of the containers in `obj` with each cacheable listing replaced by the marker"""
+    kind = type(obj)
+    if kind is Listing:
+        if getattr(obj, 'source', None) is None:
+            return obj
+        listings.append(obj)
+        return _MARKER
+    if kind is dict:
+        return {key: _skeleton(value, listings) for key, value in obj.items()}
+    if kind is list or kind is tuple:
+        return [_skeleton(value, listings) for value in obj]
+    return obj
+
+
+class JSONCodec:
+    """dumps (to bytes) and loads for API payloads, over the backend resolve_backend() picks"""
+
+    def __init__(self, backend=None, default=DefaultJSONProvider.default, fragment_cache_size=None):
+        self.backend = resolve_backend(backend)
+        self._default = default
+        self.fragments = None
+        if self.backend == 'orjson':
+            import orjson
+            self._orjson = orjson
+            # Datetimes go to the default hook so they keep Flask's HTTP-date format
+            self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        else:
+            size = Config.JSON_FRAGMENT_CACHE_SIZE if fragment_cache_size is None else fragment_cache_size
+            if size > 0:
+                self.fragments = FragmentCache(self._dumps_stdlib, size)
+
+    def dumps(self, obj):
+        if self.backend == 'orjson':
+            return self._orjson.dumps(obj, default=self._default, option=self._options)
+        if self.fragments is None:
+            return self._dumps_stdlib(obj)
+        return self._dumps_spliced(obj)
+
+    def loads(self, data):
+        if self.backend == 'orjson':
+            return self._orjson.loads(data)
+        return json.loads(data)
+
+    def _dumps_stdlib(self, obj):
+        return json.dumps(obj, default=self._default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def _dumps_spliced(self, obj):
+        listings = []
+        skeleton = _skeleton(obj, listings)
+        if not listings:
+            return self._dumps_stdlib(obj)
+        pieces = self._dumps_stdlib(skeleton).split(_ENCODED_MARKER)
+        if len(pieces) != len(listings) + 1:
+            # Some string in the payload equals the marker
+            return self._dumps_stdlib(obj)
+        parts = [None] * (2 * len(listings) + 1)
+        parts[::2] = pieces
+        parts[1::2] = [self.fragments.get(listing) for listing in listings]
+        return b''.join(parts)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider over a JSONCodec; jsonify() responses are built straight from its bytes"""
+
+    def __init__(self, app, codec=None):
+        super().__init__(app)
+        self.codec = codec or JSONCodec(default=self.default)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.codec.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self.codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.codec.dumps(obj), mimetype=self.mimetype)
+
+
+def init_app(app, codec=None):
+    """Make a Flask app's jsonify(), request.get_json() and app.json use the fast codec"""
+    app.json = FastJSONProvider(app, codec)
+    return app.json
@@ -0,0 +1,299 @@
+"""
+Request instrumentation and Prometheus-style metrics for Bhookh Buster
+Records latency histograms, counters and in-flight gauges with per-thread
+shards so hot paths never contend on a shared lock.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Latency buckets in seconds (upper bounds); +Inf is implicit
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Shards registered before finished threads' shards are first folded away between scrapes
+RETIRE_MIN_SHARDS = 64
+
+
+class _Sharded:
+    """
+    Per-thread storage shared by counters and histograms.
+
+    Each thread writes only to its own shard, so updates need no lock; the
+    rare reader (the /metrics scrape) sums across shards. Shards of finished
+    threads are folded into a retired total when metrics are scraped, and
+    between scrapes whenever the shard list has doubled, so thread-per-request
+    servers do not grow it without bound and a new thread does not scan it.
+    """
+
+    def __init__(self, factory, merge):
+        self._factory = factory
+        self._merge = merge
+        self._local = threading.local()
+        self._retired = factory()
+        self._shards = []  # (thread, shard)
+        self._retire_at = RETIRE_MIN_SHARDS  # shard count that triggers retirement before the next scrape
+        self._register_lock = threading.Lock()
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._factory()
+            self._local.shard = shard
+            with self._register_lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) >= self._retire_at:
+                    self._retire_finished()
+        return shard
+
+    def shards(self):
+        with self._register_lock:
+            self._retire_finished()
+            return [self._retired] + [shard for _, shard in self._shards]
+
+    def _retire_finished(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+        self._retire_at = 2 * len(live) + RETIRE_MIN_SHARDS
+
+
+def _merge_totals(into, shard):
+    for labels, value in list(shard.items()):
+        into[labels] = into.get(labels, 0) + value
+
+
+def _merge_series(into, shard):
+    for labels, series in list(shard.items()):
+        total = into.get(labels)
+        if total is None:
+            into[labels] = list(series)
+        else:
+            for idx, value in enumerate(series):
+                total[idx] += value
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._data = _Sharded(dict, _merge_totals)
+
+    def inc(self, labels=(), amount=1):
+        shard = self._data.shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self):
+        totals = {}
+        for shard in self._data.shards():
+            _merge_totals(totals, shard)
+        return totals
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge:
+    """Up/down gauge (e.g. requests in flight) keyed by label values"""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._data = _Sharded(dict, _merge_totals)
+
+    def inc(self, labels=(), amount=1):
+        shard = self._data.shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def collect(self):
+        totals = {}
+        for shard in self._data.shards():
+            _merge_totals(totals, shard)
+        return totals
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Latency histogram with pre-allocated bucket arrays per label set"""
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._data = _Sharded(dict, _merge_series)
+
+    def observe(self, value, labels=()):
+        shard = self._data.shard()
+        series = shard.get(labels)
+        if series is None:
+            # [bucket counts..., +Inf count, sum]
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self):
+        totals = {}
+        for shard in self._data.shards():
+            _merge_series(totals, shard)
+        return totals
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket"
+                             f"{_format_labels(self.label_names + ('le',), labels + (le,))} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class MetricsRegistry:
+    """Holds the app's metrics and renders them in Prometheus text format"""
+
+    def __init__(self):
+        self.http_requests = Counter(
+            'bhookh_http_requests_total', 'HTTP requests by route, method and status',
+            ('route', 'method', 'status'))
+        self.http_latency = Histogram(
+            'bhookh_http_request_duration_seconds', 'HTTP request latency by route',
+            ('route', 'method'))
+        self.http_in_flight = Gauge(
+            'bhookh_http_requests_in_flight', 'HTTP requests currently being served', ('route',))
+        self.operation_latency = Histogram(
+            'bhookh_operation_duration_seconds', 'Latency of internal service operations', ('operation',))
+        self.operation_errors = Counter(
+            'bhookh_operation_errors_total', 'Internal service operations that raised', ('operation',))
+        self.items_expired = Counter(
+            'bhookh_items_expired_total', 'Surplus items evicted unsold at expiry', ('restaurant',))
+        self.safe_set_lookups = Counter(
+            'bhookh_safe_set_lookups_total', 'Safe item set lookups by how they were served',
+            ('result',))
+        self.started_at = time.time()
+
+    def all_metrics(self):
+        return [self.http_requests, self.http_latency, self.http_in_flight,
+                self.operation_latency, self.operation_errors, self.items_expired,
+                self.safe_set_lookups]
+
+    def expose(self):
+        lines = [
+            '# HELP bhookh_process_uptime_seconds Seconds since the metrics registry was created',
+            '# TYPE bhookh_process_uptime_seconds gauge',
+            f"bhookh_process_uptime_seconds {time.time() - self.started_at:.3f}"
+        ]
+        for metric in self.all_metrics():
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry used by the apps and services
+registry = MetricsRegistry()
+
+
+@contextmanager
+def track(operation):
+    """Time a block of work as an internal operation"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        registry.operation_errors.inc((operation,))
+        raise
+    finally:
+        registry.operation_latency.observe(time.perf_counter() - start, (operation,))
+
+
+def timed(operation):
+    """Decorator form of track() for service methods"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_app(app, endpoint='/metrics'):
+    """Instrument every route of a Flask app and expose the registry at `endpoint`"""
+    from flask import Response, before_render_template, g, request, template_rendered
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        g._metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        registry.http_in_flight.inc((g._metrics_route,))
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            route = g.pop('_metrics_route')
+            registry.http_in_flight.dec((route,))
+            registry.http_latency.observe(time.perf_counter() - start, (route, request.method))
+            registry.http_requests.inc((route, request.method, str(response.status_code)))
+        return response
+
+    @app.teardown_request
+    def _record_failure(exc):
+        # after_request is skipped when a view raises
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            route = g.pop('_metrics_route')
+            registry.http_in_flight.dec((route,))
+            registry.http_latency.observe(time.perf_counter() - start, (route, request.method))
+            registry.http_requests.inc((route, request.method, '500'))
+
+    def _start_render(sender, template, context, **extra):
+        g._metrics_render_start = time.perf_counter()
+
+    def _finish_render(sender, template, context, **extra):
+        start = g.pop('_metrics_render_start', None)
+        if start is not None:
+            registry.operation_latency.observe(time.perf_counter() - start, ('template_render',))
+
+    before_render_template.connect(_start_render, app, weak=False)
+    template_rendered.connect(_finish_render, app, weak=False)
+
+    def metrics_endpoint():
+        return Response(registry.expose(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule(endpoint, 'metrics', metrics_endpoint)
+    return registry
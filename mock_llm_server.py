@@ -0,0 +1,253 @@
+"""
+Local deterministic stand-in for the Claude messages API
+Speaks the same /v1/messages request/response shape (including streaming) so
+ClaudeAIService and the apps can be load-tested without the real endpoint.
+
+Run: python mock_llm_server.py --port 8089 --latency lognormal:400:0.5 --error-rate 0.02
+Then start the app with USE_MOCK_LLM=1
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+
+_ITEM_ROW = re.compile(r"^([A-Za-z0-9_\-]+)\|", re.MULTILINE)
+_REQUEST_SECTION = re.compile(r"^### Request \d+\n", re.MULTILINE)
+
+REASONS = [
+    "Expiring soon, so grabbing it now keeps it out of the bin",
+    "A good match for your mood and the time of day",
+    "Fits your preferred food categories",
+    "Adds variety to your meal",
+    "Close to your campus location"
+]
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a spec string:
+      fixed:MS | uniform:MIN_MS:MAX_MS | lognormal:MEDIAN_MS:SIGMA
+    """
+
+    def __init__(self, spec='fixed:0', seed=0):
+        self.spec = spec
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        if self.kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """Draw one latency in seconds"""
+        with self._lock:
+            if self.kind == 'fixed':
+                ms = self.params[0]
+            elif self.kind == 'uniform':
+                ms = self._rng.uniform(self.params[0], self.params[1])
+            else:
+                ms = self._rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        return ms / 1000.0
+
+
+class MockLLMBehaviour:
+    """Settings shared by all handler threads of one mock server"""
+
+    def __init__(self, latency='fixed:0', error_rate=0.0, token_delay_ms=0.0, chunk_chars=8, seed=0):
+        self.latency = LatencyModel(latency, seed)
+        self.error_rate = error_rate
+        self.token_delay = token_delay_ms / 1000.0
+        self.chunk_chars = chunk_chars
+        self._rng = random.Random(seed + 1)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'streamed': 0, 'errors': 0}
+
+    def should_fail(self):
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+
+def generate_reply(prompt):
+    """Produce a deterministic reply for a prompt, shaped like the real app prompts"""
+    rng = random.Random(int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16], 16))
+
+    if prompt.startswith('You will receive') and '### Request' in prompt:
+        # Grouped prompt from the micro-batcher
+        body = prompt.split('\n\nRespond with ONLY a JSON array')[0]
+        sections = _REQUEST_SECTION.split(body)[1:]
+        return json.dumps([generate_reply(section.strip()) for section in sections])
+
+    if 'Recommend the TOP' in prompt:
+        item_ids = [m for m in _ITEM_ROW.findall(prompt) if m != 'id']
+        return json.dumps([
+            {
+                'item_id': item_id,
+                'score': max(0, 40 - idx * 3 - rng.randint(0, 2)),
+                'reason': rng.choice(REASONS)
+            }
+            for idx, item_id in enumerate(item_ids[:8])
+        ], indent=2)
+
+    if 'Analyze this meal selection' in prompt:
+        return json.dumps({
+            'nutritional_overview': 'A balanced mix of carbohydrates and protein with some vegetables.',
+            'balance_score': rng.randint(6, 9),
+            'balance_assessment': 'Well-rounded for a campus meal.',
+            'suggestion': rng.choice([None, 'Add a piece of fruit for extra fibre.'])
+        }, indent=2)
+
+    if 'encouraging message' in prompt:
+        return ("You just kept good food out of the landfill, where wasted food releases methane. "
+                "Small choices add up across campus! 🌱")
+
+    return 'OK'
+
+
+def _make_handler(behaviour):
+    class MockLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/v1/messages':
+                self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}})
+                return
+
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                prompt = payload['messages'][-1]['content']
+            except (ValueError, KeyError, IndexError):
+                self._send_json(400, {'type': 'error', 'error': {'type': 'invalid_request_error',
+                                                                  'message': 'Malformed messages payload'}})
+                return
+
+            behaviour.count('requests')
+            time.sleep(behaviour.latency.sample())
+
+            if behaviour.should_fail():
+                behaviour.count('errors')
+                self._send_json(529, {'type': 'error', 'error': {'type': 'overloaded_error',
+                                                                  'message': 'Overloaded'}})
+                return
+
+            reply = generate_reply(prompt)
+            model = payload.get('model', 'mock-model')
+            if payload.get('stream'):
+                behaviour.count('streamed')
+                self._stream(reply, model)
+            else:
+                # Generation time is the same whether or not the client streams
+                if behaviour.token_delay:
+                    time.sleep(behaviour.token_delay * math.ceil(len(reply) / behaviour.chunk_chars))
+                self._send_json(200, {
+                    'id': f"msg_mock_{hashlib.md5(prompt.encode('utf-8')).hexdigest()[:12]}",
+                    'type': 'message',
+                    'role': 'assistant',
+                    'model': model,
+                    'content': [{'type': 'text', 'text': reply}],
+                    'stop_reason': 'end_turn',
+                    'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(reply) // 4}
+                })
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send_json(200, behaviour.stats)
+            else:
+                self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}})
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, reply, model):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+
+            self._event('message_start', {'type': 'message_start', 'message': {
+                'type': 'message', 'role': 'assistant', 'model': model, 'content': []}})
+            self._event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                                'content_block': {'type': 'text', 'text': ''}})
+            for start in range(0, len(reply), behaviour.chunk_chars):
+                if behaviour.token_delay:
+                    time.sleep(behaviour.token_delay)
+                self._event('content_block_delta', {'type': 'content_block_delta', 'index': 0, 'delta': {
+                    'type': 'text_delta', 'text': reply[start:start + behaviour.chunk_chars]}})
+            self._event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+            self._event('message_stop', {'type': 'message_stop'})
+
+        def _event(self, name, data):
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+    return MockLLMHandler
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Thread-per-connection server with a listen backlog deep enough for hundreds of concurrent callers"""
+    request_queue_size = 1024
+    daemon_threads = True
+
+def start_mock_server(host='127.0.0.1', port=0, **behaviour_options):
+    """
+    Start a mock server on a background thread
+
+    Returns:
+        (server, url) where url is the /v1/messages endpoint to use as api_url
+    """
+    behaviour = MockLLMBehaviour(**behaviour_options)
+    server = MockLLMServer((host, port), _make_handler(behaviour))
+    server.behaviour = behaviour
+    threading.Thread(target=server.serve_forever, name='mock-llm', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1/messages"
+
+
+def main():
+    """Run the mock server in the foreground"""
+    parser = argparse.ArgumentParser(description='Local deterministic Claude API stand-in')
+    parser.add_argument('--host', default=Config.MOCK_LLM_HOST)
+    parser.add_argument('--port', type=int, default=Config.MOCK_LLM_PORT)
+    parser.add_argument('--latency', default='fixed:0',
+                        help='fixed:MS | uniform:MIN_MS:MAX_MS | lognormal:MEDIAN_MS:SIGMA')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--token-delay-ms', type=float, default=0.0,
+                        help='Delay between streamed chunks')
+    parser.add_argument('--chunk-chars', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    behaviour = MockLLMBehaviour(args.latency, args.error_rate, args.token_delay_ms, args.chunk_chars, args.seed)
+    server = MockLLMServer((args.host, args.port), _make_handler(behaviour))
+    print(f"🤖 Mock LLM server on http://{args.host}:{args.port}/v1/messages "
+          f"(latency={args.latency}, error_rate={args.error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
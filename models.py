@@ -2,8 +2,18 @@
 Data models for Bhookh Buster application
 """
 
+import hashlib
+import hmac
+import itertools
+import threading
+import time
 from datetime import datetime
 
+from freshness import stamp_expiry
+
+# Item versions are unique process-wide, so an item that leaves and rejoins an inventory never reuses one
+_item_versions = itertools.count(1)
+
 class User:
     """User model for tracking preferences and interactions"""
     
@@ -28,18 +38,19 @@ class User:
         
         self.interaction_history = []
         self.preferences_score = {}
+        self._lock = threading.Lock()
         
     def add_interaction(self, food_type, rating):
         """Record user interaction with a food item"""
-        self.interaction_history.append({
-            'food_type': food_type,
-            'rating': rating,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        if food_type not in self.preferences_score:
-            self.preferences_score[food_type] = 0
-        self.preferences_score[food_type] += rating
+        with self._lock:
+            self.interaction_history.append({
+                'food_type': food_type,
+                'rating': rating,
+                'timestamp': datetime.now().isoformat()
+            })
+            
+            # Concurrent ratings would otherwise lose increments
+            self.preferences_score[food_type] = self.preferences_score.get(food_type, 0) + rating
     
     def get_preference_score(self, food_type):
         """Get user's preference score for a food type"""
@@ -69,33 +80,170 @@ class User:
 
 
 class Restaurant:
-    """Restaurant/Dining hall model"""
+    """
+    Restaurant/Dining hall model
+
+    Inventory is copy-on-write: writers take the restaurant's lock and replace
+    `surplus_inventory` with a new tuple, so readers use the current tuple
+    without locking and it never changes under them. Held items are never
+    changed in place either: an update swaps in a changed copy.
+    """
     
     def __init__(self, restaurant_id, name, location, cuisine_type):
         self.restaurant_id = restaurant_id
         self.name = name
         self.location = location
         self.cuisine_type = cuisine_type
-        self.surplus_inventory = []
+        self.surplus_inventory = ()
+        # Only changed under the write lock; single lookups need no lock
+        self._items_by_id = {}
+        # item_id -> number of held items hidden behind the one _items_by_id returns (duplicate IDs in the data)
+        self._shadowed = {}
+        # id(item) -> version, renewed whenever the held item changes
+        self._item_versions = {}
+        self._write_lock = threading.Lock()
+        self._item_seq = 0
+        # Callbacks invoked as listener(event, restaurant, items) for 'added', 'removed', 'expired' and
+        # 'replaced'; items is a tuple (several items for a bulk add), of (old, new) pairs for 'replaced'
+        self._listeners = []
+        
+    def add_listener(self, listener):
+        """Subscribe to inventory change events"""
+        self._listeners.append(listener)
+    
+    def _notify(self, event, items):
+        for listener in self._listeners:
+            listener(event, self, items)
         
     def add_surplus_food(self, food_item):
         """Add a surplus food item to inventory"""
-        self.surplus_inventory.append(food_item)
+        self.add_surplus_foods([food_item])
+    
+    def add_surplus_foods(self, food_items):
+        """Add several surplus food items with a single inventory copy"""
+        for food_item in food_items:
+            # Parse the expiry once here so read paths only compare floats
+            if 'expiry_ts' not in food_item:
+                stamp_expiry(food_item)
+        food_items = tuple(food_items)
+        with self._write_lock:
+            self.surplus_inventory += food_items
+            for food_item in food_items:
+                item_id = food_item['item_id']
+                if self._items_by_id.setdefault(item_id, food_item) is not food_item:
+                    self._shadowed[item_id] = self._shadowed.get(item_id, 0) + 1
+                self._item_versions[id(food_item)] = next(_item_versions)
+            # Listeners are called under the lock so they see this restaurant's changes in order
+            self._notify('added', food_items)
         
     def get_available_items(self):
         """Get all non-expired items"""
-        now = datetime.now()
-        return [
-            item for item in self.surplus_inventory 
-            if datetime.fromisoformat(item['expiry']) > now
-        ]
+        now = time.time()
+        return [item for item in self.surplus_inventory if item['expiry_ts'] > now]
+    
+    def get_inventory_copy(self):
+        """Copies of every held item, for callers that hand items outside the process"""
+        return [dict(item) for item in self.surplus_inventory]
     
     def get_item_by_id(self, item_id):
         """Get a specific item by ID"""
-        for item in self.surplus_inventory:
-            if item['item_id'] == item_id:
-                return item
-        return None
+        return self._items_by_id.get(item_id)
+    
+    def item_version(self, item):
+        """Version of a held item, which changes whenever the item does; None if the item is not held"""
+        return self._item_versions.get(id(item))
+    
+    def new_item_id(self):
+        """Reserve an item ID that no held item uses; concurrent callers never get the same one"""
+        with self._write_lock:
+            self._item_seq = max(self._item_seq, len(self.surplus_inventory))
+            while True:
+                self._item_seq += 1
+                item_id = f"{self.restaurant_id}_F{self._item_seq:03d}"
+                if item_id not in self._items_by_id:
+                    return item_id
+    
+    def update_item_quantity(self, item_id, quantity):
+        """Set the quantity of an item, returning False if it does not exist"""
+        with self._write_lock:
+            item = self._items_by_id.get(item_id)
+            if not item:
+                return False
+            self._replace(item, quantity=quantity)
+            return True
+    
+    def adjust_item_quantity(self, item_id, change):
+        """Add `change` to an item's quantity (not below 0); returns the new quantity, or None if it does not exist"""
+        with self._write_lock:
+            item = self._items_by_id.get(item_id)
+            if not item:
+                return None
+            return self._replace(item, quantity=max(0, item['quantity'] + change))['quantity']
+    
+    def _replace(self, item, **changes):
+        # Called with the write lock held. Published snapshots share the held item, so it is
+        # copied with the changes and the copy takes its place, as a new version
+        updated = {**item, **changes}
+        self.surplus_inventory = tuple(updated if held is item else held for held in self.surplus_inventory)
+        self._items_by_id[item['item_id']] = updated
+        del self._item_versions[id(item)]
+        self._item_versions[id(updated)] = next(_item_versions)
+        self._notify('replaced', ((item, updated),))
+        return updated
+    
+    def remove_item(self, item_id):
+        """Remove an item from inventory, returning False if it does not exist"""
+        with self._write_lock:
+            item = self._items_by_id.get(item_id)
+            if not item or not self._detach_many((item,)):
+                return False
+            self._notify('removed', (item,))
+            return True
+    
+    def expire_item(self, item):
+        """Evict an item whose expiry has passed, returning False if it is no longer held"""
+        return bool(self.expire_items((item,)))
+    
+    def expire_items(self, items):
+        """Evict items whose expiry has passed with a single inventory copy; returns those that were still held"""
+        with self._write_lock:
+            expired = self._detach_many(items)
+            if expired:
+                self._notify('expired', expired)
+            return expired
+    
+    def _detach_many(self, items):
+        # Called with the write lock held; returns the items that were held, in one new inventory tuple
+        held = tuple(item for item in items if id(item) in self._item_versions)
+        if not held:
+            return held
+        gone = {id(item) for item in held}
+        self.surplus_inventory = tuple(item for item in self.surplus_inventory if id(item) not in gone)
+        orphaned = []
+        for item in held:
+            del self._item_versions[id(item)]
+            item_id = item['item_id']
+            if self._items_by_id.get(item_id) is item:
+                del self._items_by_id[item_id]
+                if item_id in self._shadowed:
+                    orphaned.append(item_id)
+            elif item_id in self._shadowed:
+                self._release_shadow(item_id)
+        # Items can share an ID; keep the next held one with a removed item's ID reachable
+        for item_id in orphaned:
+            for other in self.surplus_inventory:
+                if other['item_id'] == item_id:
+                    self._items_by_id[item_id] = other
+                    self._release_shadow(item_id)
+                    break
+        return held
+    
+    def _release_shadow(self, item_id):
+        remaining = self._shadowed[item_id] - 1
+        if remaining:
+            self._shadowed[item_id] = remaining
+        else:
+            del self._shadowed[item_id]
     
     def to_dict(self):
         """Convert restaurant to dictionary"""
@@ -109,6 +257,71 @@ class Restaurant:
         }
 
 
+class Listing(dict):
+    """
+    A held item as clients see it: the item's fields plus its restaurant's
+    name and location, built by Listing.of(). `source` is the
+    (restaurant, item, version) it was copied from, so its JSON can be reused
+    until the item changes; changing the listing itself clears it.
+    """
+    
+    __slots__ = ('source',)
+    
+    @classmethod
+    def of(cls, restaurant, item):
+        # Held items are never changed in place (updates swap in a copy with a new version),
+        # so the version always describes what is copied
+        version = restaurant.item_version(item)
+        listing = cls(item, restaurant=restaurant.name, restaurant_location=restaurant.location)
+        listing.source = (restaurant, item, version) if version is not None else None
+        return listing
+
+
+def _clears_source(name):
+    method = getattr(dict, name)
+    
+    def wrapper(self, *args, **kwargs):
+        self.source = None
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ('__setitem__', '__delitem__', '__ior__', 'clear', 'pop', 'popitem', 'setdefault', 'update'):
+    setattr(Listing, _name, _clears_source(_name))
+
+
+class DiningHallAdmin:
+    """Dining hall staff account that manages one restaurant's surplus inventory"""
+    
+    def __init__(self, admin_id, restaurant_id, username, password_hash, email=None):
+        self.admin_id = admin_id
+        self.restaurant_id = restaurant_id
+        self.username = username
+        self.password_hash = password_hash
+        self.email = email
+        self.created_at = datetime.now().isoformat()
+    
+    @staticmethod
+    def hash_password(password):
+        """Hash a password with SHA-256"""
+        return hashlib.sha256(password.encode('utf-8')).hexdigest()
+    
+    def verify_password(self, password):
+        """Check a password against the stored hash"""
+        return hmac.compare_digest(self.password_hash, self.hash_password(password))
+    
+    def to_dict(self):
+        """Convert admin to dictionary (without the password hash)"""
+        return {
+            'admin_id': self.admin_id,
+            'restaurant_id': self.restaurant_id,
+            'username': self.username,
+            'email': self.email,
+            'created_at': self.created_at
+        }
+
+
 class Order:
     """Order model for tracking food orders"""
     
@@ -0,0 +1,218 @@
+"""
+Opt-in request profiler for Bhookh Buster
+Profiles one request in N, or any request carrying the debug header, by
+sampling the serving thread's stack from a background thread. Each profile
+is written as a collapsed-stack file (one "frame;frame;frame count" line per
+stack) that flamegraph.pl, speedscope or inferno can render directly.
+"""
+
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from app_logging import get_logger
+from config import Config
+
+logger = get_logger('profiler')
+
+_SLUG = re.compile(r'[^A-Za-z0-9]+')
+PROFILE_SUFFIX = '.folded'
+
+
+def _same_token(presented, expected):
+    return hmac.compare_digest(presented.encode('utf-8'), expected.encode('utf-8'))
+
+
+def _collapse(frame):
+    """Root-to-leaf stack of `frame` as one collapsed-stack key"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                     .replace(';', ':'))
+        frame = frame.f_back
+    names.reverse()
+    return ';'.join(names)
+
+
+class StackSampler:
+    """
+    Background thread that samples the stacks of the threads being profiled.
+    Only sleeps on an event while nothing is being profiled.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._targets = {}  # thread id -> Counter of collapsed stacks
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        counts = Counter()
+        with self._lock:
+            self._targets[thread_id] = counts
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return counts
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._targets.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._targets:
+                    frames = sys._current_frames()
+                    for thread_id, counts in self._targets.items():
+                        frame = frames.get(thread_id)
+                        if frame is not None:
+                            counts[_collapse(frame)] += 1
+                    del frames
+                    idle = False
+                else:
+                    idle = True
+            if idle:
+                self._wake.wait()
+                self._wake.clear()
+            else:
+                time.sleep(self.interval)
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their collapsed stacks"""
+
+    def __init__(self, output_dir=None, sample_every=None, header=None, token=None,
+                 interval_ms=None, max_profiles=None):
+        self.output_dir = output_dir or Config.PROFILER_DIR
+        self.sample_every = Config.PROFILER_SAMPLE_EVERY if sample_every is None else sample_every
+        self.header = header or Config.PROFILER_HEADER
+        self.token = Config.PROFILER_TOKEN if token is None else token
+        self.max_profiles = max_profiles or Config.PROFILER_MAX_PROFILES
+        self.sampler = StackSampler((interval_ms or Config.PROFILER_INTERVAL_MS) / 1000.0)
+        self._counter = itertools.count(1)
+        self._write_lock = threading.Lock()
+
+    def should_profile(self, headers):
+        """True for requests carrying the debug header (and token, if set) or every Nth request"""
+        value = headers.get(self.header)
+        if value is not None and (not self.token or _same_token(value, self.token)):
+            return True
+        return bool(self.sample_every) and next(self._counter) % self.sample_every == 0
+
+    def is_authorized(self, presented_token):
+        return bool(self.token) and presented_token is not None and _same_token(presented_token, self.token)
+
+    def begin(self):
+        return self.sampler.start(threading.get_ident()), time.perf_counter()
+
+    def finish(self, handle, method, route):
+        """Stop sampling the current thread and write its profile; returns the file name"""
+        counts = self.sampler.stop(threading.get_ident())
+        duration_ms = (time.perf_counter() - handle[1]) * 1000
+        if not counts:
+            # Requests shorter than the interpreter's switch interval can finish before the first sample
+            logger.debug("Request finished before the first profile sample",
+                         extra={'route': route, 'duration_ms': round(duration_ms, 2)})
+            return None
+
+        slug = _SLUG.sub('-', route).strip('-') or 'root'
+        name = f"{int(time.time() * 1000)}_{method}_{slug}_{duration_ms:.0f}ms{PROFILE_SUFFIX}"
+        with self._write_lock:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, name), 'w') as f:
+                for stack, count in counts.most_common():
+                    f.write(f"{stack} {count}\n")
+            self._prune()
+        logger.info("Request profile written", extra={
+            'profile': name, 'route': route, 'method': method,
+            'duration_ms': round(duration_ms, 2), 'samples': sum(counts.values())
+        })
+        return name
+
+    def list_profiles(self):
+        """Stored profiles, newest first"""
+        if not os.path.isdir(self.output_dir):
+            return []
+        profiles = []
+        for name in os.listdir(self.output_dir):
+            if not name.endswith(PROFILE_SUFFIX):
+                continue
+            stat = os.stat(os.path.join(self.output_dir, name))
+            profiles.append({'name': name, 'size_bytes': stat.st_size, 'created': stat.st_mtime})
+        return sorted(profiles, key=lambda p: p['name'], reverse=True)
+
+    def _prune(self):
+        for stale in self.list_profiles()[self.max_profiles:]:
+            try:
+                os.remove(os.path.join(self.output_dir, stale['name']))
+            except OSError:
+                pass
+
+
+def init_app(app, profiler=None):
+    """
+    Add profiling hooks and the admin profile endpoints to a Flask app.
+    Does nothing unless Config.PROFILER_ENABLED is set. Streamed responses
+    are profiled up to the point the view returns.
+    """
+    if not Config.PROFILER_ENABLED:
+        return None
+
+    from flask import g, jsonify, request, send_from_directory, session
+
+    profiler = profiler or RequestProfiler()
+
+    @app.before_request
+    def _start_profile():
+        if request.endpoint in ('list_profiles', 'download_profile'):
+            return
+        if profiler.should_profile(request.headers):
+            g._profile = profiler.begin()
+
+    def _finish_profile():
+        handle = g.pop('_profile', None)
+        if handle is None:
+            return None
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        return profiler.finish(handle, request.method, route)
+
+    @app.after_request
+    def _write_profile(response):
+        name = _finish_profile()
+        if name:
+            response.headers['X-Profile-Id'] = name
+        return response
+
+    @app.teardown_request
+    def _write_failed_profile(exc):
+        # after_request is skipped when a view raises
+        _finish_profile()
+
+    def _authorized():
+        return 'admin_username' in session or profiler.is_authorized(
+            request.headers.get('X-Profile-Token') or request.args.get('token'))
+
+    def list_profiles():
+        if not _authorized():
+            return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+        return jsonify({'success': True, 'profiles': profiler.list_profiles()})
+
+    def download_profile(name):
+        if not _authorized():
+            return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+        if not name.endswith(PROFILE_SUFFIX):
+            return jsonify({'success': False, 'error': 'Profile not found'}), 404
+        return send_from_directory(profiler.output_dir, name, mimetype='text/plain', as_attachment=True)
+
+    app.add_url_rule('/admin/api/profiles', 'list_profiles', list_profiles)
+    app.add_url_rule('/admin/api/profiles/<name>', 'download_profile', download_profile)
+    return profiler
@@ -0,0 +1,109 @@
+"""
+Prompt compaction helpers for Claude recommendations
+Pre-ranks candidate items locally and packs them into a compact table under a token budget
+"""
+
+import re
+
+from config import Config
+from freshness import RequestClock
+
+# Rough BPE behaviour: words split into ~4 character pieces, punctuation is its own token
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+ITEM_TABLE_COLUMNS = ('id', 'name', 'type', 'rest', 'price_cents', 'hrs_left', 'urgent')
+
+
+def estimate_tokens(text):
+    """Estimate the number of tokens in text without calling a remote tokenizer"""
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        tokens += (len(piece) + 3) // 4 if piece[0].isalnum() or piece[0] == '_' else 1
+    return tokens
+
+
+def score_item_locally(item, user, mood=None, clock=None):
+    """Score an item with the same signals the local recommender uses"""
+    clock = clock or RequestClock()
+    food_type = item['food_type']
+    score = 0
+
+    # Preference score based on past interactions
+    score += user.preferences_score.get(food_type, 0) * Config.PREFERENCE_SCORE_WEIGHT
+
+    # Dietary preference and food category match
+    if food_type in user.dietary_preferences:
+        score += Config.DIETARY_MATCH_SCORE
+    if food_type in getattr(user, 'food_categories', []):
+        score += Config.DIETARY_MATCH_SCORE
+
+    # Mood-based scoring
+    if mood:
+        score += Config.MOOD_FOOD_MAP.get(mood.lower(), {}).get(food_type, 0)
+
+    # Urgency based on expiry time
+    score += clock.urgency_score(item)
+
+    return score
+
+
+def rank_items(items, user, mood=None, clock=None):
+    """Return items ordered by local score, best first"""
+    clock = clock or RequestClock()
+    return sorted(items, key=lambda item: score_item_locally(item, user, mood, clock), reverse=True)
+
+
+def _cell(value):
+    """Render a table cell, keeping the column separator out of free text"""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return str(value).replace('|', '/').replace('\n', ' ')
+
+
+def encode_items_table(items_data):
+    """
+    Encode item summaries as a pipe-separated table.
+
+    Restaurants are listed once in a legend and referenced by a short code,
+    since many items share the same dining hall.
+    """
+    restaurant_codes = {}
+    rows = []
+    for item in items_data:
+        key = (item['restaurant'], item['location'])
+        if key not in restaurant_codes:
+            restaurant_codes[key] = f"r{len(restaurant_codes) + 1}"
+        rows.append('|'.join(_cell(v) for v in (
+            item['id'], item['name'], item['type'], restaurant_codes[key],
+            item['price_cents'], item['hours_until_expiry'], item['urgent']
+        )))
+
+    legend = '; '.join(
+        f"{code}={_cell(name)} ({_cell(location)})"
+        for (name, location), code in restaurant_codes.items()
+    )
+    return f"Restaurants: {legend}\n" + '|'.join(ITEM_TABLE_COLUMNS) + '\n' + '\n'.join(rows)
+
+
+def select_within_budget(items_data, token_budget=None, max_items=None):
+    """Keep items in rank order until the encoded table would exceed the token budget"""
+    token_budget = token_budget or Config.AI_PROMPT_TOKEN_BUDGET
+    max_items = max_items or Config.AI_PROMPT_MAX_ITEMS
+
+    used = estimate_tokens('|'.join(ITEM_TABLE_COLUMNS))
+    seen_restaurants = set()
+    selected = []
+    for item in items_data[:max_items]:
+        cost = estimate_tokens('|'.join(_cell(v) for v in (
+            item['id'], item['name'], item['type'], 'r00',
+            item['price_cents'], item['hours_until_expiry'], item['urgent']
+        )))
+        key = (item['restaurant'], item['location'])
+        if key not in seen_restaurants:
+            cost += estimate_tokens(f"r00={item['restaurant']} ({item['location']}); ")
+        if used + cost > token_budget and selected:
+            break
+        used += cost
+        seen_restaurants.add(key)
+        selected.append(item)
+    return selected
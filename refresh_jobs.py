@@ -0,0 +1,244 @@
+"""
+Background, coalesced and rate-limited dining data refreshes
+POST /api/refresh-data used to scrape the Cornell API and rebuild the
+inventory inside the request, once per POST. A RefreshCoordinator runs the
+refresh as a job instead and answers at once with its ID: while a job is
+queued or running, every further request is attached to it (single-flight)
+rather than starting another. Starting a new job takes a token from the
+caller's bucket and from a global one, so repeated clicks or a script get
+429 with a Retry-After instead of a scrape each. Finished jobs are kept,
+up to REFRESH_JOB_HISTORY, for their status endpoint.
+
+RefreshCoordinator runs jobs on a thread; AsyncRefreshCoordinator runs them
+as tasks on the ASGI event loop.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from app_logging import get_logger
+from config import Config
+
+logger = get_logger('refresh')
+
+
+class RateLimited(Exception):
+    """Raised when a refresh would exceed the per-client or global rate"""
+
+    def __init__(self, retry_after, scope):
+        super().__init__(f"refresh rate limit ({scope}) exceeded; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.scope = scope
+
+
+class TokenBucket:
+    """Holds up to `capacity` tokens, refilled at `rate` per second; not thread-safe on its own"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is now)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RefreshRateLimiter:
+    """
+    A token bucket per client plus one shared by all of them. A request
+    takes from both or from neither, so a client turned away by the global
+    bucket keeps its own tokens. The least recently seen clients' buckets
+    are dropped past `max_clients`; a dropped client starts over with a
+    full bucket.
+    """
+
+    def __init__(self, client_per_minute=None, client_burst=None, global_per_minute=None, global_burst=None,
+                 max_clients=None):
+        self.client_rate = (client_per_minute or Config.REFRESH_CLIENT_PER_MINUTE) / 60.0
+        self.client_burst = client_burst or Config.REFRESH_CLIENT_BURST
+        self.max_clients = max_clients or Config.REFRESH_MAX_TRACKED_CLIENTS
+        self._global = TokenBucket((global_per_minute or Config.REFRESH_GLOBAL_PER_MINUTE) / 60.0,
+                                   global_burst or Config.REFRESH_GLOBAL_BURST, time.monotonic())
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'allowed': 0, 'limited_client': 0, 'limited_global': 0}
+
+    def acquire(self, client):
+        """Take a token for `client`, or raise RateLimited"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._clients.get(client)
+            if bucket is None:
+                bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst, now)
+                if len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(client)
+            client_wait = bucket.wait_time(now)
+            if client_wait:
+                self.stats['limited_client'] += 1
+                raise RateLimited(client_wait, 'client')
+            global_wait = self._global.wait_time(now)
+            if global_wait:
+                self.stats['limited_global'] += 1
+                raise RateLimited(global_wait, 'global')
+            bucket.take()
+            self._global.take()
+            self.stats['allowed'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, 'tracked_clients': len(self._clients)}
+
+
+class RefreshJob:
+    """One refresh run and the requests attached to it"""
+
+    def __init__(self):
+        self.job_id = uuid.uuid4().hex
+        self.state = 'queued'  # queued -> running -> succeeded | failed
+        self.requested_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.duration_seconds = None
+        self.error = None
+        self.attached = 1
+        self.done = threading.Event()
+        self._started = None
+
+    @property
+    def finished(self):
+        return self.done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes (or `timeout` seconds pass); True if it finished"""
+        return self.done.wait(timeout)
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'state': self.state,
+            'requests': self.attached,
+            'requested_at': self.requested_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_seconds': self.duration_seconds,
+            'error': self.error
+        }
+
+
+class RefreshCoordinator:
+    """Runs at most one refresh of a DataManager at a time, on a background thread"""
+
+    def __init__(self, data_manager, limiter=None, history=None):
+        self.data_manager = data_manager
+        self.limiter = limiter or RefreshRateLimiter()
+        self.history = history or Config.REFRESH_JOB_HISTORY
+        self._jobs = OrderedDict()  # job_id -> RefreshJob, oldest first
+        self._current = None
+        self._lock = threading.Lock()
+        self.stats = {'started': 0, 'coalesced': 0, 'succeeded': 0, 'failed': 0}
+
+    def submit(self, client):
+        """
+        (job, coalesced): the in-flight job with this request attached, or a
+        newly started one. Raises RateLimited if a new job would exceed
+        `client`'s or the global rate.
+        """
+        with self._lock:
+            job = self._current
+            if job is not None:
+                job.attached += 1
+                self.stats['coalesced'] += 1
+                return job, True
+            self.limiter.acquire(client)
+            job = self._current = RefreshJob()
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            self.stats['started'] += 1
+        logger.info("Refresh job queued", extra={'job_id': job.job_id, 'client': client})
+        self._start(job)
+        return job, False
+
+    def get(self, job_id):
+        """The job with this ID, or None if it is unknown or no longer kept"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _start(self, job):
+        threading.Thread(target=self._run, args=(job,), name=f'refresh-{job.job_id[:8]}', daemon=True).start()
+
+    def _run(self, job):
+        self._begin(job)
+        try:
+            success = self.data_manager.refresh_data()
+        except Exception as e:
+            logger.exception("Refresh job failed", extra={'job_id': job.job_id})
+            self._finish(job, False, str(e))
+            return
+        self._finish(job, success)
+
+    def _begin(self, job):
+        job.state = 'running'
+        job.started_at = datetime.now()
+        job._started = time.perf_counter()
+
+    def _finish(self, job, success, error=None):
+        job.duration_seconds = round(time.perf_counter() - job._started, 3)
+        job.finished_at = datetime.now()
+        job.error = error if error else (None if success else 'Could not fetch dining data')
+        with self._lock:
+            job.state = 'succeeded' if success else 'failed'
+            self.stats['succeeded' if success else 'failed'] += 1
+            if self._current is job:
+                self._current = None
+        job.done.set()
+        logger.info("Refresh job finished", extra={'job_id': job.job_id, 'state': job.state,
+                                                   'duration_seconds': job.duration_seconds,
+                                                   'requests': job.attached})
+
+    def get_stats(self):
+        with self._lock:
+            current = self._current.job_id if self._current else None
+            stats = {**self.stats, 'current_job': current, 'jobs_kept': len(self._jobs)}
+        stats['rate_limit'] = self.limiter.get_stats()
+        return stats
+
+
+class AsyncRefreshCoordinator(RefreshCoordinator):
+    """RefreshCoordinator whose jobs are tasks on the running event loop, fetching with refresh_data_async"""
+
+    def __init__(self, data_manager, limiter=None, history=None):
+        super().__init__(data_manager, limiter, history)
+        self._tasks = set()  # the loop only holds weak references to tasks
+
+    def _start(self, job):
+        task = asyncio.get_running_loop().create_task(self._run_async(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_async(self, job):
+        self._begin(job)
+        try:
+            success = await self.data_manager.refresh_data_async()
+        except Exception as e:
+            logger.exception("Refresh job failed", extra={'job_id': job.job_id})
+            self._finish(job, False, str(e))
+            return
+        self._finish(job, success)
@@ -0,0 +1,163 @@
+"""
+Dietary-safe item sets shared by profile signature
+The allergen / restriction check only reads a user's normalized allergens and
+dietary restrictions, so users with the same combination (often just
+"vegetarian", or nothing at all) share one cached result. Each signature
+holds a bitset over DataManager's item slot table, computed at an inventory
+version; when inventory moves on, only the items added or removed since that
+version are re-checked, using DataManager's change log.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from itertools import compress
+
+from config import Config
+from metrics import registry
+
+# format(bits, 'b') digits -> 0/1 bytes, so itertools.compress can walk a bitset
+_BIT_BYTES = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def profile_hash(user):
+    """Signature of the profile fields the safety check reads (allergens and dietary restrictions)"""
+    allergens = sorted({allergen.lower() for allergen in user.allergens})
+    restrictions = sorted({restriction.lower() for restriction in user.dietary_restrictions})
+    key = '|'.join(allergens) + '#' + '|'.join(restrictions)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def bits_from_slots(slots, size):
+    """Bitset (int) with the given slot numbers set"""
+    digits = bytearray(b'0') * size
+    for slot in slots:
+        digits[size - 1 - slot] = 0x31
+    return int(digits, 2) if size else 0
+
+
+def select_slots(table, bits):
+    """Entries of `table` whose slot bit is set"""
+    mask = format(bits, 'b')[::-1].encode('ascii').translate(_BIT_BYTES)
+    return list(compress(table, mask))
+
+
+class _Signature:
+    __slots__ = ('version', 'bits', 'last_used', 'lock')
+
+    def __init__(self):
+        self.version = None
+        self.bits = 0
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+
+
+class SafeSetCache:
+    """
+    LRU of profile signature -> safe bitset, bounded by `max_profiles` and
+    dropping signatures unused for longer than `idle_seconds`.
+
+    `is_safe(item, user)` is the check being memoized; it must depend on
+    nothing but the fields profile_hash() covers.
+    """
+
+    def __init__(self, data_manager, is_safe, max_profiles=None, idle_seconds=None):
+        self.data_manager = data_manager
+        self.is_safe = is_safe
+        self.max_profiles = max_profiles or Config.SAFE_SET_CACHE_MAX_PROFILES
+        self.idle_seconds = idle_seconds or Config.SAFE_SET_CACHE_IDLE_SECONDS
+        self._signatures = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'deltas': 0, 'rebuilds': 0, 'evicted': 0}
+
+    def safe_entries(self, user, now=None):
+        """(restaurant, item) pairs currently listed, not expired as of `now`, that are safe for `user`"""
+        now = time.time() if now is None else now
+        bits, table = self._current(user)
+        return [entry for entry in select_slots(table, bits) if entry is not None and entry[1]['expiry_ts'] > now]
+
+    def is_cached_safe(self, user):
+        """Membership test against the user's safe set, for use as a sampling predicate"""
+        bits, table = self._current(user)
+        item_table = self.data_manager.item_table
+
+        def accept(item):
+            # A slot freed and reused after the snapshot belongs to another item; its bit says nothing
+            slot = item_table.slot_of(item)
+            if slot is None or slot >= len(table) or table[slot] is None or table[slot][1] is not item:
+                return False
+            return (bits >> slot) & 1 == 1
+        return accept
+
+    def clear(self):
+        with self._lock:
+            self._signatures.clear()
+
+    def _current(self, user):
+        """The user's safe bitset, with the slot table snapshot it describes"""
+        signature = self._signature(profile_hash(user))
+
+        with signature.lock:
+            version, table = self.data_manager.inventory_snapshot()
+            if signature.version == version:
+                self._count('hits')
+                return signature.bits, table
+
+            changes = None
+            if signature.version is not None:
+                changes = self.data_manager.changes_since(signature.version, version)
+            if changes is None:
+                # New signature, or it fell behind the change log
+                signature.bits = bits_from_slots(
+                    (slot for slot, entry in enumerate(table)
+                     if entry is not None and self.is_safe(entry[1], user)),
+                    len(table)
+                )
+                self._count('rebuilds')
+            else:
+                bits = signature.bits
+                for event, slot, item in changes:
+                    if slot is None:
+                        continue
+                    # A replaced slot holds a changed copy, which is checked afresh
+                    if event in ('added', 'replaced') and self.is_safe(item, user):
+                        bits |= 1 << slot
+                    else:
+                        bits &= ~(1 << slot)
+                signature.bits = bits
+                self._count('deltas')
+            signature.version = version
+            return signature.bits, table
+
+    def _signature(self, key):
+        now = time.monotonic()
+        with self._lock:
+            signature = self._signatures.get(key)
+            if signature is None:
+                signature = self._signatures[key] = _Signature()
+            signature.last_used = now
+            self._signatures.move_to_end(key)
+
+            # Least recently used first: trim to size, then drop idle signatures
+            evicted = 0
+            while len(self._signatures) > self.max_profiles:
+                self._signatures.popitem(last=False)
+                evicted += 1
+            while self._signatures:
+                oldest = next(iter(self._signatures.values()))
+                if now - oldest.last_used <= self.idle_seconds:
+                    break
+                self._signatures.popitem(last=False)
+                evicted += 1
+            self.stats['evicted'] += evicted
+            return signature
+
+    def _count(self, result):
+        with self._lock:
+            self.stats[result] += 1
+        registry.safe_set_lookups.inc((result,))
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, 'profiles': len(self._signatures), 'max_profiles': self.max_profiles}
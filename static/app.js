@@ -96,12 +96,18 @@ function getSuggestions() {
     
     fetch('/api/suggestions', {
         method: 'POST',
-        headers: {'Content-Type': 'application/json'},
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream, application/json'
+        },
         body: JSON.stringify({mood: selectedMood})
     })
-    .then(res => res.json())
-    .then(data => {
-        displayCustomItems(data);
+    .then(res => {
+        const contentType = res.headers.get('Content-Type') || '';
+        if (contentType.startsWith('text/event-stream') && res.body) {
+            return streamSuggestions(res);
+        }
+        return res.json().then(data => displayCustomItems(data));
     })
     .catch(error => {
         console.error('Error:', error);
@@ -110,6 +116,50 @@ function getSuggestions() {
     });
 }
 
+function streamSuggestions(response) {
+    // Render each suggestion as soon as the server forwards it
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let rendered = false;
+    
+    function handleEvent(rawEvent) {
+        let eventName = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach(line => {
+            if (line.startsWith('event:')) eventName = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        
+        if (eventName === 'suggestion') {
+            if (!rendered) {
+                displayCustomItems([]);
+                rendered = true;
+            }
+            document.querySelector('#resultsContent .items-grid')
+                .insertAdjacentHTML('beforeend', renderSuggestionCard(JSON.parse(data)));
+        } else if (eventName === 'done' && !rendered) {
+            displayCustomItems([]);
+            rendered = true;
+        }
+    }
+    
+    function pump() {
+        return reader.read().then(({done, value}) => {
+            if (done) return;
+            buffer += decoder.decode(value, {stream: true});
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                handleEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+            }
+            return pump();
+        });
+    }
+    
+    return pump();
+}
+
 function displaySurpriseBag(items) {
     let html = '<h2 style="color: #333; margin-bottom: 20px;">🎉 Your FREE Surprise Bag from Cornell Dining!</h2>';
     html += '<div class="items-grid">';
@@ -154,24 +204,7 @@ function displayCustomItems(suggestions) {
     html += '<div class="items-grid">';
     
     suggestions.forEach(suggestion => {
-        const item = suggestion.item;
-        const expiryTime = new Date(item.expiry);
-        const hoursLeft = Math.round((expiryTime - new Date()) / (1000 * 60 * 60));
-        
-        html += `
-            <div class="item-card" onclick="toggleItem('${item.item_id}', this)" data-price="${suggestion.discount_price}">
-                <h4>${item.name}</h4>
-                <div class="item-details">📍 ${item.restaurant}</div>
-                <div class="item-details">🍽️ ${item.food_type}</div>
-                <div class="item-details">⏰ Expires in ${hoursLeft} hours</div>
-                <div class="item-details">🎯 AI Score: ${suggestion.score}/40</div>
-                <div class="price">
-                    <span class="original-price">$${(item.original_price/100).toFixed(2)}</span>
-                    <span class="discount-price">$${(suggestion.discount_price/100).toFixed(2)}</span>
-                </div>
-                ${hoursLeft < 4 ? '<div class="badge badge-urgent">⚡ Urgent!</div>' : ''}
-            </div>
-        `;
+        html += renderSuggestionCard(suggestion);
     });
     
     html += '</div>';
@@ -194,6 +227,27 @@ function displayCustomItems(suggestions) {
     document.getElementById('resultsContent').innerHTML = html;
 }
 
+function renderSuggestionCard(suggestion) {
+    const item = suggestion.item;
+    const expiryTime = new Date(item.expiry);
+    const hoursLeft = Math.round((expiryTime - new Date()) / (1000 * 60 * 60));
+    
+    return `
+        <div class="item-card" onclick="toggleItem('${item.item_id}', this)" data-price="${suggestion.discount_price}">
+            <h4>${item.name}</h4>
+            <div class="item-details">📍 ${item.restaurant}</div>
+            <div class="item-details">🍽️ ${item.food_type}</div>
+            <div class="item-details">⏰ Expires in ${hoursLeft} hours</div>
+            <div class="item-details">🎯 AI Score: ${suggestion.score}/40</div>
+            <div class="price">
+                <span class="original-price">$${(item.original_price/100).toFixed(2)}</span>
+                <span class="discount-price">$${(suggestion.discount_price/100).toFixed(2)}</span>
+            </div>
+            ${hoursLeft < 4 ? '<div class="badge badge-urgent">⚡ Urgent!</div>' : ''}
+        </div>
+    `;
+}
+
 function toggleItem(itemId, element) {
     const index = selectedItems.indexOf(itemId);
     
@@ -0,0 +1,101 @@
+"""
+Incremental JSON array parser
+Emits each top-level element of a JSON array as soon as its text is complete
+"""
+
+import json
+
+
+class IncrementalJSONArrayParser:
+    """
+    Parse a JSON array that arrives in arbitrary text chunks.
+
+    Text before the opening bracket (e.g. a markdown code fence) is ignored.
+    Each call to feed() returns the array elements completed by that chunk.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element_start = None
+
+    @property
+    def finished(self):
+        """True once the closing bracket of the array has been seen"""
+        return self._finished
+
+    def feed(self, chunk):
+        """Consume a chunk of text and return the elements it completed"""
+        if self._finished:
+            return []
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+        pos = self._pos
+
+        while pos < len(buffer):
+            char = buffer[pos]
+
+            if not self._started:
+                if char == '[':
+                    self._started = True
+                pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 0:
+                    self._element_start = pos
+            elif char in '{[':
+                if self._depth == 0:
+                    self._element_start = pos
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    # Closing bracket of the outer array
+                    if self._element_start is not None:
+                        completed.append(self._decode(buffer[self._element_start:pos]))
+                        self._element_start = None
+                    self._finished = True
+                    pos += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append(self._decode(buffer[self._element_start:pos + 1]))
+                    self._element_start = None
+            elif char == ',' and self._depth == 0 and self._element_start is not None:
+                # End of a scalar element
+                completed.append(self._decode(buffer[self._element_start:pos]))
+                self._element_start = None
+            elif self._depth == 0 and self._element_start is None and not char.isspace() and char != ',':
+                self._element_start = pos
+            pos += 1
+
+        # Drop consumed text so the buffer stays proportional to one element
+        keep_from = self._element_start if self._element_start is not None else pos
+        self._buffer = buffer[keep_from:]
+        if self._element_start is not None:
+            self._element_start = 0
+        self._pos = pos - keep_from
+        return [element for element in completed if element is not None]
+
+    def _decode(self, text):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return None
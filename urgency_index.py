@@ -0,0 +1,144 @@
+"""
+Urgency buckets for surplus inventory
+Keeps each restaurant's items partitioned into URGENT / SOON / LATER by time
+left before expiry. A heap holds the time at which each item crosses its next
+bucket boundary, and promote() applies the promotions that are due.
+
+DataManager updates the index as it publishes each inventory change and puts
+an UrgencyView of it in the new snapshot. A view carries the time of the next
+due promotion; a read at or after it has DataManager promote and publish a
+fresh view first, so readers never lock or change a view.
+"""
+
+import heapq
+import itertools
+import math
+import time
+
+from config import Config
+from freshness import LATER, SOON, URGENT, URGENCY_BUCKETS, expiry_timestamp
+
+
+class UrgencyIndex:
+    """Per-restaurant urgency buckets with promotion as time passes; not thread-safe, DataManager serializes writers"""
+
+    def __init__(self):
+        self._buckets = {}  # restaurant -> {bucket: {id(item): item}}
+        self._where = {}  # id(item) -> (restaurant, bucket)
+        self._promotions = []  # (boundary_ts, seq, item, target_bucket)
+        self._seq = itertools.count()
+        self._view = UrgencyView()
+        self._changed = set()  # restaurants whose buckets changed since the last snapshot
+
+    def add(self, restaurant, item, now=None):
+        """Place a newly listed item in its bucket and schedule its promotions"""
+        now = time.time() if now is None else now
+        urgent_at, soon_at = self._boundaries(item)
+        bucket = URGENT if now >= urgent_at else SOON if now >= soon_at else LATER
+
+        buckets = self._buckets.setdefault(restaurant, {name: {} for name in URGENCY_BUCKETS})
+        self._place(restaurant, buckets, bucket, item, urgent_at, soon_at)
+
+    def replace(self, old, restaurant, new):
+        """Put a changed copy of a listed item in the original's bucket, with promotions of its own"""
+        location = self._where.pop(id(old), None)
+        if location is None:
+            self.add(restaurant, new)
+            return
+        _, bucket = location
+        buckets = self._buckets[restaurant]
+        buckets[bucket].pop(id(old), None)
+        urgent_at, soon_at = self._boundaries(new)
+        self._place(restaurant, buckets, bucket, new, urgent_at, soon_at)
+
+    @staticmethod
+    def _boundaries(item):
+        """(urgent_at, soon_at): when the item enters the URGENT and SOON buckets"""
+        expiry = expiry_timestamp(item)
+        return expiry - Config.URGENT_EXPIRY_HOURS * 3600, expiry - Config.NORMAL_EXPIRY_HOURS * 3600
+
+    def _place(self, restaurant, buckets, bucket, item, urgent_at, soon_at):
+        buckets[bucket][id(item)] = item
+        self._where[id(item)] = (restaurant, bucket)
+        self._changed.add(restaurant)
+        if bucket == LATER:
+            heapq.heappush(self._promotions, (soon_at, next(self._seq), item, SOON))
+        if bucket != URGENT:
+            heapq.heappush(self._promotions, (urgent_at, next(self._seq), item, URGENT))
+
+    def remove(self, item):
+        """Drop a sold, deleted or expired item; its pending promotions are skipped later"""
+        location = self._where.pop(id(item), None)
+        if location is not None:
+            restaurant, bucket = location
+            self._buckets[restaurant][bucket].pop(id(item), None)
+            self._changed.add(restaurant)
+
+    def promote(self, now=None):
+        """Move every item whose bucket boundary has passed; returns how many moved"""
+        now = time.time() if now is None else now
+        moved = 0
+        while self._promotions and self._promotions[0][0] <= now:
+            _, _, item, target = heapq.heappop(self._promotions)
+            location = self._where.get(id(item))
+            if location is None:
+                continue
+            restaurant, current = location
+            if URGENCY_BUCKETS.index(target) >= URGENCY_BUCKETS.index(current):
+                continue
+            buckets = self._buckets[restaurant]
+            buckets[target][id(item)] = buckets[current].pop(id(item))
+            self._where[id(item)] = (restaurant, target)
+            self._changed.add(restaurant)
+            moved += 1
+        return moved
+
+    def snapshot(self):
+        """UrgencyView of the buckets as they are now; later changes and promotions do not affect it"""
+        promote_at = self._promotions[0][0] if self._promotions else math.inf
+        if self._changed or promote_at != self._view.promote_at:
+            buckets = dict(self._view.buckets)
+            for restaurant in self._changed:
+                members = self._buckets[restaurant]
+                buckets[restaurant] = {name: tuple(members[name].values()) for name in URGENCY_BUCKETS}
+            self._changed.clear()
+            self._view = UrgencyView(buckets, promote_at)
+        return self._view
+
+    def clear(self):
+        self._buckets.clear()
+        self._where.clear()
+        self._promotions.clear()
+        self._view = UrgencyView()
+        self._changed.clear()
+
+
+class UrgencyView:
+    """
+    Immutable restaurant -> {bucket: tuple of items}, as published in an
+    inventory snapshot. `promote_at` is when the next item crosses a bucket
+    boundary; the view is out of date for reads at or after it.
+    """
+
+    __slots__ = ('buckets', 'promote_at')
+
+    def __init__(self, buckets=None, promote_at=math.inf):
+        self.buckets = buckets or {}
+        self.promote_at = promote_at
+
+    def entries(self, bucket, restaurants):
+        """(restaurant, item) pairs of `bucket` across `restaurants`, concatenated in restaurant order"""
+        result = []
+        for restaurant in restaurants:
+            buckets = self.buckets.get(restaurant)
+            if buckets:
+                result.extend((restaurant, item) for item in buckets[bucket])
+        return result
+
+    def counts(self, restaurants):
+        """Bucket sizes across `restaurants`"""
+        totals = {name: 0 for name in URGENCY_BUCKETS}
+        for restaurant in restaurants:
+            for name, members in self.buckets.get(restaurant, {}).items():
+                totals[name] += len(members)
+        return totals
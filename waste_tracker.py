@@ -0,0 +1,57 @@
+"""
+Food waste analytics for Bhookh Buster
+Aggregates the 'expired' events raised when surplus items reach their expiry
+unsold, per dining hall and per food type.
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+
+from config import Config
+
+
+class WasteTracker:
+    """Running totals and a short history of expired (wasted) surplus items"""
+
+    def __init__(self, recent_limit=None):
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=recent_limit or Config.WASTE_RECENT_EVENTS)
+        self.totals = {'items': 0, 'quantity': 0, 'value': 0}
+        self.by_restaurant = {}
+        self.by_food_type = {}
+
+    def record_expired(self, restaurant, item):
+        """Record one item that expired before anyone claimed it"""
+        quantity = item.get('quantity', 0)
+        value = item.get('original_price', 0) * quantity
+        event = {
+            'restaurant_id': restaurant.restaurant_id,
+            'restaurant': restaurant.name,
+            'item_id': item['item_id'],
+            'name': item.get('name'),
+            'food_type': item.get('food_type'),
+            'quantity': quantity,
+            'value': value,
+            'expired_at': datetime.now().isoformat()
+        }
+        with self._lock:
+            self.recent.append(event)
+            self.totals['items'] += 1
+            self.totals['quantity'] += quantity
+            self.totals['value'] += value
+            for table, key in ((self.by_restaurant, restaurant.restaurant_id),
+                               (self.by_food_type, item.get('food_type', 'unknown'))):
+                bucket = table.setdefault(key, {'items': 0, 'quantity': 0, 'value': 0})
+                bucket['items'] += 1
+                bucket['quantity'] += quantity
+                bucket['value'] += value
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'totals': dict(self.totals),
+                'by_restaurant': {k: dict(v) for k, v in self.by_restaurant.items()},
+                'by_food_type': {k: dict(v) for k, v in self.by_food_type.items()},
+                'recent': list(self.recent)
+            }